@@ -0,0 +1,144 @@
+"""
+DAG Airflow de backfill de l'historique météo journalier
+Déclenchement manuel, pour une plage de dates:
+
+    airflow dags trigger weather_backfill -c '{"start": "2021-01-01", "end": "2023-12-31"}'
+
+La plage est découpée en mois; une tâche mappée par mois charge l'historique
+des champs agricoles (idempotent par localisation et par jour). Un mois en
+échec est relancé seul et ne refait que les journées manquantes.
+"""
+
+import os
+from datetime import date, timedelta
+from airflow import DAG
+from airflow.exceptions import AirflowFailException
+from airflow.models.param import Param
+from airflow.operators.python import PythonOperator
+from airflow.utils.dates import days_ago
+from airflow.utils.trigger_rule import TriggerRule
+import pandas as pd
+import sys
+sys.path.append('/opt/airflow/src')
+
+from etl.backfill import DaySummarySource, FileHistorySource, run_backfill
+from etl.load import DatabaseLoader
+from etl.http_cache import response_cache_report
+from etl.quota import get_request_budget
+
+
+# Mois traités simultanément dans un run. Chaque mois est un processus distinct; leurs appels
+# tirent sur le même quota journalier via le budget partagé (OPENWEATHER_BUDGET_PATH, quota.py):
+# plus de mois en parallèle accélère le backfill sans dépasser OPENWEATHER_CALLS_PER_DAY
+ETL_BACKFILL_MAX_ACTIVE_MONTHS = int(os.getenv("ETL_BACKFILL_MAX_ACTIVE_MONTHS", "4"))
+
+default_args = {
+    'owner': 'hack2hire-team',
+    'depends_on_past': False,
+    'email_on_failure': False,
+    'email_on_retry': False,
+    'retries': 3,
+    'retry_delay': timedelta(minutes=5),
+}
+
+dag = DAG(
+    'weather_backfill',
+    default_args=default_args,
+    description="Backfill de l'historique météo journalier des champs agricoles",
+    schedule_interval=None,  # Déclenchement manuel
+    start_date=days_ago(1),
+    catchup=False,
+    params={
+        "start": Param((date.today() - timedelta(days=365)).isoformat(), type="string", format="date"),
+        "end": Param((date.today() - timedelta(days=1)).isoformat(), type="string", format="date"),
+        # Fichier CSV/Parquet local (chemin dans le conteneur); vide = One Call day_summary
+        "source": Param("", type="string"),
+    },
+    tags=['meteo', 'historique', 'backfill'],
+)
+
+
+def plan_months(**context):
+    """Task: Découpage de la plage de dates en mois"""
+    start = date.fromisoformat(context['params']['start'])
+    end = date.fromisoformat(context['params']['end'])
+    if end < start:
+        raise ValueError(f"Plage de dates vide: {start} -> {end}")
+
+    month_starts = [start] + [day.date() for day in pd.date_range(start, end, freq="MS") if day.date() > start]
+    month_ends = [day - timedelta(days=1) for day in month_starts[1:]] + [end]
+    return [
+        {"start": month_start.isoformat(), "end": month_end.isoformat()}
+        for month_start, month_end in zip(month_starts, month_ends)
+    ]
+
+
+def backfill_month(start: str, end: str, **context):
+    """Task mappée: historique d'un mois pour tous les champs agricoles"""
+    loader = DatabaseLoader()
+    locations = list(loader.iter_field_locations())
+    source_path = context['params'].get('source')
+    source = FileHistorySource(source_path) if source_path else DaySummarySource()
+
+    report = run_backfill(locations, date.fromisoformat(start), date.fromisoformat(end), source, loader=loader)
+    report.update(start=start, end=end)
+    context['ti'].xcom_push(key='quota_report', value=get_request_budget().stats())
+    context['ti'].xcom_push(key='response_cache_report', value=response_cache_report())
+
+    # Journées manquantes (erreurs, budget épuisé): le retry de la tâche les reprend
+    if report["failed"] or report["stopped_on_quota"]:
+        raise RuntimeError(f"Backfill incomplet pour {start} -> {end}: {report}")
+    return report
+
+
+def summarize_backfill(**context):
+    """Task: Bilan du backfill, y compris lorsque certains mois ont échoué (le run échoue alors)"""
+    reports = [report for report in context['ti'].xcom_pull(task_ids='backfill_month') or [] if report]
+    months = context['ti'].xcom_pull(task_ids='plan_months') or []
+    completed = {report["start"] for report in reports}
+
+    summary = {
+        "months": len(months),
+        "completed_months": len(reports),
+        # Un mois incomplet (journées en échec, budget épuisé) lève et ne publie pas de bilan
+        "failed_months": [month["start"] for month in months if month["start"] not in completed],
+        "failed_days": sum(report["failed"] for report in reports),
+        "loaded": sum(report["loaded"] for report in reports),
+        "already_loaded": sum(report["already_loaded"] for report in reports),
+        "calls": sum(report["calls"] for report in reports),
+    }
+    context['ti'].xcom_push(key='backfill_report', value=summary)
+
+    # Bilan publié, puis échec: sans cela le run serait marqué réussi (ALL_DONE)
+    if summary["failed_months"] or summary["failed_days"]:
+        raise AirflowFailException(
+            f"Backfill incomplet: {len(summary['failed_months'])}/{summary['months']} mois en échec "
+            f"({', '.join(summary['failed_months'])}), {summary['failed_days']} journées en échec"
+        )
+
+    return f"{summary['completed_months']}/{summary['months']} mois complets, {summary['loaded']} journées chargées"
+
+
+plan_task = PythonOperator(
+    task_id='plan_months',
+    python_callable=plan_months,
+    provide_context=True,
+    dag=dag,
+)
+
+month_task = PythonOperator.partial(
+    task_id='backfill_month',
+    python_callable=backfill_month,
+    max_active_tis_per_dagrun=ETL_BACKFILL_MAX_ACTIVE_MONTHS,
+    dag=dag,
+).expand(op_kwargs=plan_task.output)
+
+summary_task = PythonOperator(
+    task_id='summarize_backfill',
+    python_callable=summarize_backfill,
+    provide_context=True,
+    trigger_rule=TriggerRule.ALL_DONE,
+    dag=dag,
+)
+
+plan_task >> month_task >> summary_task
@@ -1,19 +1,45 @@
 """
 DAG Airflow pour l'ETL automatisé des données météo
 Exécution quotidienne pour collecter et stocker les données
+
+Les champs agricoles sont découpés en shards de ETL_SHARD_SIZE localisations;
+une tâche mappée par shard (extraction, transformation, chargement) s'exécute
+en parallèle des autres et est relancée seule en cas d'échec.
 """
 
+import os
 from datetime import datetime, timedelta
 from airflow import DAG
+from airflow.exceptions import AirflowFailException
 from airflow.operators.python import PythonOperator
 from airflow.utils.dates import days_ago
+from airflow.utils.trigger_rule import TriggerRule
+import pandas as pd
 import sys
 sys.path.append('/opt/airflow/src')
 
-from etl.extract import extract_all_data
-from etl.transform import transform_data_pipeline
-from etl.load import load_data_pipeline
+from loguru import logger
+
+from etl.extract import group_locations
+from etl.http_cache import response_cache_report
+from etl.quota import get_request_budget
+from etl.spatial import encode_geohash
+from etl.load import DatabaseLoader
+from etl.ledger import get_run_ledger
+from etl.pipeline import run_batch_etl, run_streaming_pipeline
+from etl.artifacts import cleanup_artifacts, read_artifact, write_artifact
+from etl.cache import require_shared_cache
+
 
+# Une seule tâche en flux, par paquets à mémoire bornée (grand nombre de champs)
+ETL_STREAMING = os.getenv("ETL_STREAMING", "false").lower() == "true"
+
+# Localisations par shard, et shards exécutés simultanément dans un run (0 = sans limite).
+# Chaque shard est un processus avec son propre pool: jusqu'à
+# ETL_MAX_ACTIVE_SHARDS x (DB_POOL_SIZE + DB_MAX_OVERFLOW) connexions PostgreSQL
+# (4 x (10 + 5) = 60 par défaut), à garder sous max_connections avec l'API.
+ETL_SHARD_SIZE = int(os.getenv("ETL_SHARD_SIZE", "500"))
+ETL_MAX_ACTIVE_SHARDS = int(os.getenv("ETL_MAX_ACTIVE_SHARDS", "4"))
 
 # Configuration par défaut du DAG
 default_args = {
@@ -37,79 +63,169 @@ dag = DAG(
 )
 
 
-def extract_weather_data(**context):
-    """Task: Extraction des données météo"""
-    # Exemple: Plusieurs localités au Sénégal
-    locations = [
-        {"name": "Dakar", "lat": 14.7167, "lon": -17.4677},
-        {"name": "Saint-Louis", "lat": 16.0179, "lon": -16.5119},
-        {"name": "Thiès", "lat": 14.7886, "lon": -16.9260},
-    ]
-
-    all_data = []
-    for location in locations:
-        data = extract_all_data(location["lat"], location["lon"])
-        data["location_name"] = location["name"]
-        all_data.append(data)
-
-    # Stocker dans XCom pour la tâche suivante
-    context['ti'].xcom_push(key='raw_data', value=all_data)
-
-    return f"Extraction réussie pour {len(all_data)} localités"
-
-
-def transform_weather_data(**context):
-    """Task: Transformation des données"""
-    # Récupérer les données de la tâche précédente
-    raw_data_list = context['ti'].xcom_pull(key='raw_data', task_ids='extract_data')
-
-    transformed_data_list = []
-    for raw_data in raw_data_list:
-        transformed = transform_data_pipeline(raw_data)
-        transformed["location_name"] = raw_data.get("location_name")
-        transformed_data_list.append(transformed)
-
-    # Stocker dans XCom
-    context['ti'].xcom_push(key='transformed_data', value=transformed_data_list)
-
-    return f"Transformation réussie pour {len(transformed_data_list)} localités"
-
-
-def load_weather_data(**context):
-    """Task: Chargement dans PostgreSQL"""
-    # Récupérer les données transformées
-    transformed_data_list = context['ti'].xcom_pull(key='transformed_data', task_ids='transform_data')
-
-    results = []
-    for transformed_data in transformed_data_list:
-        result = load_data_pipeline(transformed_data)
-        result["location_name"] = transformed_data.get("location_name")
-        results.append(result)
-
-    return f"Chargement réussi pour {len(results)} localités"
+def plan_location_shards(**context):
+    """Task: Découpage des champs agricoles en shards"""
+    loader = DatabaseLoader()
+
+    # Champs en alerte d'abord dans chaque shard: servis en priorité si le budget API s'épuise
+    alert_geohashes = loader.get_alert_geohashes()
+
+    # Champs voisins consécutifs (bandes de latitude): un shard partage ses appels par cellule de grille
+    locations = []
+    for index, location in enumerate(loader.iter_field_locations()):
+        location["priority"] = int(encode_geohash(location["lat"], location["lon"]) in alert_geohashes)
+        location["shard"] = index // ETL_SHARD_SIZE
+        locations.append(location)
+
+    if not locations:
+        logger.warning("Aucun champ agricole enregistré (POST /api/fields): rien à extraire")
+        return []
+
+    # Les localisations restent dans un artefact; XCom ne porte que les numéros de shard
+    artifact = write_artifact(pd.DataFrame(locations), context['run_id'], "shards")
+    shards = locations[-1]["shard"] + 1
+    cells = len(group_locations(locations))
+    context['ti'].xcom_push(key='grid_report', value={
+        "locations": len(locations),
+        "cells": cells,
+        "fetch_reduction_ratio": round(1 - cells / len(locations), 4),
+        "shards": shards,
+        "shard_size": ETL_SHARD_SIZE,
+    })
+
+    return [{"shard": shard, "plan_path": artifact["path"]} for shard in range(shards)]
+
+
+def run_shard_etl(shard: int, plan_path: str, **context):
+    """Task mappée: extraction, transformation et chargement d'un shard"""
+    require_shared_cache()
+    locations = read_artifact(plan_path, filters=[("shard", "==", shard)]).drop(columns="shard")
+
+    # Extraction concurrente (EXTRACT_MAX_WORKERS appels simultanés, session HTTP partagée),
+    # un appel par cellule de grille (GRID_CELL_DEGREES) recopié pour chaque champ membre;
+    # un retry saute les champs déjà chargés et réutilise les extractions réussies (registre du run);
+    # le shard échoue si un champ n'a pas été chargé, le retry ne reprend que ceux-là
+    try:
+        report = run_batch_etl(
+            locations.to_dict(orient="records"), run_id=context['run_id'], scope=f"shard-{shard:05d}"
+        )
+    finally:
+        context['ti'].xcom_push(key='quota_report', value=get_request_budget().stats())
+        context['ti'].xcom_push(key='response_cache_report', value=response_cache_report())
+    report["shard"] = shard
+
+    return report
+
+
+def summarize_shards(**context):
+    """Task: Bilan des shards, y compris lorsque certains ont échoué (le run échoue alors)"""
+    plan = context['ti'].xcom_pull(task_ids='plan_shards') or []
+    reports = [report for report in context['ti'].xcom_pull(task_ids='etl_shard') or [] if report]
+
+    summary = {
+        "shards": len(plan),
+        "succeeded_shards": len(reports),
+        "failed_shards": sorted(set(item["shard"] for item in plan) - set(report["shard"] for report in reports)),
+        "locations": sum(report["locations"] for report in reports),
+        "skipped": sum(report["skipped"] for report in reports),
+        "extracted": sum(report["extracted"] for report in reports),
+        "forecast_count": sum(report["forecast_count"] for report in reports),
+        # Prévisions identiques à celles en base: non réécrites
+        "forecast_written": sum(report["forecast_written"] for report in reports),
+        "forecast_skipped": sum(report["forecast_skipped"] for report in reports),
+        "rows": sum(report["rows"] for report in reports),
+    }
+    context['ti'].xcom_push(key='etl_report', value=summary)
+
+    # Débit et échecs par étape, toutes tentatives confondues
+    context['ti'].xcom_push(key='run_summary', value=get_run_ledger().summary(context['run_id']))
+
+    # Bilan publié, puis échec: sans cela le run serait marqué réussi (ALL_DONE)
+    if summary["failed_shards"]:
+        raise AirflowFailException(
+            f"{len(summary['failed_shards'])}/{summary['shards']} shards en échec: {summary['failed_shards']}"
+        )
+
+    return (
+        f"{summary['succeeded_shards']}/{summary['shards']} shards chargés: "
+        f"{summary['extracted']} localités, {summary['forecast_written']}/{summary['forecast_count']} "
+        f"prévisions écrites"
+    )
+
+
+def cleanup_etl_artifacts(**context):
+    """Task: Suppression des artefacts et du registre au-delà de ETL_ARTIFACTS_RETENTION_HOURS"""
+    removed = cleanup_artifacts()
+    get_run_ledger().prune(float(os.getenv("ETL_ARTIFACTS_RETENTION_HOURS", "72")))
+    return f"{len(removed)} run(s) d'artefacts supprimé(s)"
+
+
+def run_streaming_etl(**context):
+    """Task: ETL en flux, paquet par paquet (ETL_CHUNK_SIZE, ETL_MAX_MEMORY_MB)"""
+    require_shared_cache()
+    loader = DatabaseLoader()
+    alert_geohashes = loader.get_alert_geohashes()
+
+    # Champs lus par lots depuis la base, sans liste complète en mémoire
+    def prioritized():
+        for location in loader.iter_field_locations():
+            location["priority"] = int(encode_geohash(location["lat"], location["lon"]) in alert_geohashes)
+            yield location
+
+    # Localisations chargées enregistrées dans le registre du run: un retry ne reprend que les manquantes
+    try:
+        report = run_streaming_pipeline(prioritized(), run_id=context['run_id'])
+    finally:
+        context['ti'].xcom_push(key='quota_report', value=get_request_budget().stats())
+        context['ti'].xcom_push(key='response_cache_report', value=response_cache_report())
+    context['ti'].xcom_push(key='streaming_report', value=report)
+
+    return (
+        f"ETL en flux réussi pour {report['extracted']}/{report['locations']} localités "
+        f"({report['rows_per_second']} lignes/s, pic mémoire {report['peak_rss_mb']} Mo)"
+    )
 
 
 # Définition des tâches
-extract_task = PythonOperator(
-    task_id='extract_data',
-    python_callable=extract_weather_data,
-    provide_context=True,
-    dag=dag,
-)
-
-transform_task = PythonOperator(
-    task_id='transform_data',
-    python_callable=transform_weather_data,
-    provide_context=True,
-    dag=dag,
-)
-
-load_task = PythonOperator(
-    task_id='load_data',
-    python_callable=load_weather_data,
-    provide_context=True,
-    dag=dag,
-)
-
-# Définition des dépendances
-extract_task >> transform_task >> load_task
+if ETL_STREAMING:
+    etl_task = PythonOperator(
+        task_id='run_etl',
+        python_callable=run_streaming_etl,
+        provide_context=True,
+        dag=dag,
+    )
+else:
+    plan_task = PythonOperator(
+        task_id='plan_shards',
+        python_callable=plan_location_shards,
+        provide_context=True,
+        dag=dag,
+    )
+
+    # Une instance par shard (retries de default_args propres à chaque instance)
+    shard_task = PythonOperator.partial(
+        task_id='etl_shard',
+        python_callable=run_shard_etl,
+        max_active_tis_per_dagrun=ETL_MAX_ACTIVE_SHARDS or None,
+        dag=dag,
+    ).expand(op_kwargs=plan_task.output)
+
+    summary_task = PythonOperator(
+        task_id='summarize_shards',
+        python_callable=summarize_shards,
+        provide_context=True,
+        trigger_rule=TriggerRule.ALL_DONE,
+        dag=dag,
+    )
+
+    # Exécutée même en cas d'échec, pour borner l'espace disque
+    cleanup_task = PythonOperator(
+        task_id='cleanup_artifacts',
+        python_callable=cleanup_etl_artifacts,
+        provide_context=True,
+        trigger_rule=TriggerRule.ALL_DONE,
+        dag=dag,
+    )
+
+    # Définition des dépendances
+    plan_task >> shard_task >> summary_task >> cleanup_task
@@ -0,0 +1,86 @@
+"""
+Benchmark des échanges entre tâches du DAG: JSON dans XCom (ancien chemin)
+contre artefacts Arrow IPC relus par memory map (src/etl/artifacts.py)
+
+Pour chaque étape: temps d'écriture (tâche productrice), de lecture (tâche
+suivante) et volume stocké. Le volume XCom est celui écrit dans la base de
+métadonnées d'Airflow.
+
+Usage:
+    python benchmarks/bench_artifacts.py --locations 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from loguru import logger
+
+from bench_transform import make_raw_batch
+from src.etl.artifacts import read_artifact, read_raw_artifact, write_artifact, write_raw_artifact
+from src.etl.transform import transform_batch_pipeline
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, default=100000)
+    args = parser.parse_args()
+
+    logger.remove()
+    raw_batch = make_raw_batch(args.locations)
+    transformed = transform_batch_pipeline(raw_batch)
+    frames = {"current_weather": transformed["current_weather"], "forecasts": transformed["forecasts"]}
+
+    print(f"{'étape':<12} {'mode':<8} {'écriture s':>10} {'lecture s':>10} {'Mo':>8}")
+
+    def report(stage, mode, write_seconds, read_seconds, size):
+        print(f"{stage:<12} {mode:<8} {write_seconds:>10.2f} {read_seconds:>10.2f} {size / 1e6:>8.1f}")
+
+    # Extraction -> transformation
+    payload, write_seconds = timed(json.dumps, raw_batch)
+    _, read_seconds = timed(json.loads, payload)
+    report("brut", "xcom", write_seconds, read_seconds, len(payload))
+
+    with tempfile.TemporaryDirectory() as directory:
+        artifact, write_seconds = timed(write_raw_artifact, raw_batch, "bench", directory)
+        _, read_seconds = timed(read_raw_artifact, artifact["path"])
+        report("brut", "arrow", write_seconds, read_seconds, artifact["bytes"])
+
+        # Transformation -> chargement
+        def to_xcom():
+            return json.dumps({name: frame.to_dict(orient="list") for name, frame in frames.items()}, default=str)
+
+        def from_xcom(payload):
+            return {name: pd.DataFrame(columns) for name, columns in json.loads(payload).items()}
+
+        payload, write_seconds = timed(to_xcom)
+        _, read_seconds = timed(from_xcom, payload)
+        report("transformé", "xcom", write_seconds, read_seconds, len(payload))
+
+        def to_artifacts():
+            return {name: write_artifact(frame, "bench", name, directory) for name, frame in frames.items()}
+
+        def from_artifacts(artifacts):
+            return {name: read_artifact(artifact["path"]) for name, artifact in artifacts.items()}
+
+        artifacts, write_seconds = timed(to_artifacts)
+        _, read_seconds = timed(from_artifacts, artifacts)
+        size = sum(artifact["bytes"] for artifact in artifacts.values())
+        report("transformé", "arrow", write_seconds, read_seconds, size)
+        print(f"XCom des artefacts: {len(json.dumps(artifacts))} octets")
+
+
+if __name__ == "__main__":
+    main()
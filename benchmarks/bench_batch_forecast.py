@@ -0,0 +1,88 @@
+"""
+Benchmark: prévisions par champ (N appels GET) contre l'endpoint batch (1 POST)
+
+Insère N localisations avec 7 jours de prévisions dans la base DATABASE_URL,
+puis mesure le temps total des deux chemins. Le cache est désactivé
+(CACHE_TTL_SECONDS=0) pour comparer les accès base de données.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_batch_forecast.py --sizes 10 100 500
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["CACHE_TTL_SECONDS"] = "0"
+
+from loguru import logger
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.etl.load import DatabaseLoader
+
+
+def seed_locations(count: int, seed: int = 42):
+    """Insère `count` localisations aléatoires au Sénégal avec 7 jours de prévisions"""
+    rng = np.random.default_rng(seed)
+    latitudes = np.round(rng.uniform(12.5, 16.5, count), 4)
+    longitudes = np.round(rng.uniform(-17.4, -11.5, count), 4)
+
+    now = datetime.now()
+    forecasts = [
+        {
+            "date": now + timedelta(days=day),
+            "temp_min": 22.0, "temp_max": 33.0, "temp_day": 28.0,
+            "humidity": 75.0, "rain_mm": 2.0, "irrigation_need_mm": 6.5,
+            "disease_risk": "high"
+        }
+        for day in range(7)
+    ]
+
+    loader = DatabaseLoader()
+    for latitude, longitude in zip(latitudes, longitudes):
+        loader.load_forecasts(forecasts, float(latitude), float(longitude))
+
+    return list(zip(latitudes.tolist(), longitudes.tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="Tailles de lot")
+    args = parser.parse_args()
+
+    logger.remove()
+    coordinates = seed_locations(max(args.sizes))
+
+    print(f"{'champs':>7} {'par champ (ms)':>15} {'batch (ms)':>11} {'gain':>7}")
+
+    with TestClient(app) as client:
+        # Construit l'index des localisations avant les mesures
+        client.get("/api/weather/forecast", params={"latitude": coordinates[0][0], "longitude": coordinates[0][1]})
+
+        for size in args.sizes:
+            subset = coordinates[:size]
+
+            start = time.perf_counter()
+            for latitude, longitude in subset:
+                response = client.get("/api/weather/forecast", params={"latitude": latitude, "longitude": longitude})
+                assert response.status_code == 200, response.text
+            per_field = time.perf_counter() - start
+
+            start = time.perf_counter()
+            response = client.post("/api/weather/forecast/batch", json={
+                "locations": [{"latitude": latitude, "longitude": longitude} for latitude, longitude in subset]
+            })
+            batch = time.perf_counter() - start
+            assert response.status_code == 200, response.text
+
+            print(f"{size:>7} {per_field * 1000:>15.1f} {batch * 1000:>11.1f} {per_field / batch:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
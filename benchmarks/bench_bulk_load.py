@@ -0,0 +1,81 @@
+"""
+Benchmark de chargement des prévisions: load_forecasts par localisation contre
+upsert executemany par lots et COPY FROM STDIN (bulk_load_forecasts)
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_bulk_load.py --rows 10000 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+
+from src.etl.load import DatabaseLoader, WeatherForecast
+from src.etl.synthetic import generate_frame, random_locations
+from src.etl.transform import WeatherDataTransformer
+
+DAYS = 7
+
+
+def make_forecasts(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Prévisions synthétiques (src/etl/synthetic.py): rows / 7 localisations x 7 jours"""
+    locations = max(1, -(-rows // DAYS))
+    latitudes, longitudes = random_locations(locations, seed)
+    frame = generate_frame(latitudes, longitudes, days=DAYS, seed=seed)
+    frame = WeatherDataTransformer.calculate_derived_features(frame)
+    return frame.head(rows)
+
+
+def load_per_location(loader: DatabaseLoader, frame: pd.DataFrame) -> int:
+    """Chemin unitaire: un appel load_forecasts par localisation"""
+    count = 0
+    for (latitude, longitude), group in frame.groupby(["latitude", "longitude"], sort=False):
+        count += loader.load_forecasts(group.to_dict(orient="records"), latitude, longitude)
+    return count
+
+
+def load_executemany(loader: DatabaseLoader, frame: pd.DataFrame) -> int:
+    bulk_frame = loader._prepare_bulk_frame(frame.rename(columns={"date": "forecast_date"}), WeatherForecast.__table__)
+    return loader._executemany_frame(WeatherForecast.__table__, bulk_frame, loader.batch_size, upsert=True)
+
+
+def load_copy(loader: DatabaseLoader, frame: pd.DataFrame) -> int:
+    return loader.bulk_load_forecasts(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--per-location-max-rows", type=int, default=100000, help="Ignorer le chemin unitaire au-delà (trop lent)")
+    args = parser.parse_args()
+
+    logger.remove()
+    loader = DatabaseLoader()
+    modes = [("per_location", load_per_location), ("executemany", load_executemany), ("copy", load_copy)]
+
+    print(f"{'lignes':>9} {'mode':<12} {'secondes':>9} {'lignes/s':>11}")
+    for rows in args.rows:
+        frame = make_forecasts(rows)
+        for name, load in modes:
+            if name == "per_location" and rows > args.per_location_max_rows:
+                continue
+
+            with loader.engine.begin() as connection:
+                connection.execute(text("TRUNCATE weather_forecasts"))
+
+            start = time.perf_counter()
+            count = load(loader, frame)
+            elapsed = time.perf_counter() - start
+            print(f"{count:>9} {name:<12} {elapsed:>9.2f} {count / elapsed:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
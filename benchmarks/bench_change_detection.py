@@ -0,0 +1,89 @@
+"""
+Benchmark de la détection des changements au chargement des prévisions:
+rechargement d'une émission dont une fraction des prévisions a changé,
+avec et sans comparaison des empreintes (content_hash)
+
+Mesure la durée, les lignes écrites et le volume de WAL produit (PostgreSQL).
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_change_detection.py --rows 100000 --changed 0 0.1 0.5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+
+from src.etl.load import DatabaseLoader
+from src.etl.synthetic import generate_frame, random_locations
+from src.etl.transform import WeatherDataTransformer, forecast_content_hash
+
+DAYS = 7
+
+
+def make_forecasts(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Prévisions synthétiques transformées, avec leur empreinte"""
+    latitudes, longitudes = random_locations(max(1, -(-rows // DAYS)), seed)
+    frame = WeatherDataTransformer.calculate_derived_features(generate_frame(latitudes, longitudes, days=DAYS, seed=seed))
+    frame = frame.head(rows).copy()
+    frame["content_hash"] = forecast_content_hash(frame)
+    return frame
+
+
+def reissue(frame: pd.DataFrame, changed: float, seed: int = 7) -> pd.DataFrame:
+    """Nouvelle émission: une fraction 'changed' des prévisions a une température différente"""
+    frame = frame.copy()
+    rows = frame.sample(frac=changed, random_state=seed).index
+    frame.loc[rows, "temp_max"] += 1.0
+    frame.loc[rows, "content_hash"] = forecast_content_hash(frame.loc[rows])
+    return frame
+
+
+def wal_bytes(loader: DatabaseLoader, since: str = None):
+    with loader.engine.connect() as connection:
+        if since is None:
+            return connection.execute(text("SELECT pg_current_wal_lsn()::text")).scalar()
+        return connection.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :since)"), {"since": since}).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--changed", type=float, nargs="+", default=[0.0, 0.1, 0.5])
+    args = parser.parse_args()
+
+    logger.remove()
+    loader = DatabaseLoader()
+    postgresql = loader.engine.dialect.name == "postgresql"
+    frame = make_forecasts(args.rows)
+
+    print(f"{'modifiées':>9} {'mode':<18} {'secondes':>9} {'écrites':>9} {'ignorées':>9} {'WAL (Mo)':>9}")
+    for changed in args.changed:
+        issued = reissue(frame, changed)
+        for name in ("rewrite_all", "change_detection"):
+            with loader.engine.begin() as connection:
+                connection.execute(text("TRUNCATE weather_forecasts"))
+            loader.bulk_sync_forecasts(frame)
+
+            if name == "rewrite_all":
+                # Comportement antérieur: sans empreinte en place, toutes les prévisions sont réécrites
+                with loader.engine.begin() as connection:
+                    connection.execute(text("UPDATE weather_forecasts SET content_hash = NULL"))
+
+            lsn = wal_bytes(loader) if postgresql else None
+            start = time.perf_counter()
+            counts = loader.bulk_sync_forecasts(issued.assign(created_at=pd.Timestamp.now()))
+            elapsed = time.perf_counter() - start
+            wal = f"{float(wal_bytes(loader, lsn)) / 1e6:.1f}" if postgresql else "-"
+            print(f"{changed:>9.0%} {name:<18} {elapsed:>9.2f} {counts['written']:>9} {counts['skipped']:>9} {wal:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark de concurrence des endpoints adossés à PostgreSQL
+
+Lance N clients simultanés contre une API en cours d'exécution et mesure le
+débit (requêtes/s) pour chaque niveau de concurrence. Avec un accès base de
+données bloquant, le débit plafonne dès 1 client; avec le pool de threads
+il doit croître jusqu'à la taille du pool (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+
+Usage:
+    # API démarrée sur une base PostgreSQL locale
+    python benchmarks/bench_db_concurrency.py --seed --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LATITUDE = 14.7167
+LONGITUDE = -17.4677
+ENDPOINTS = [
+    "/api/weather/forecast",
+    "/api/predictions/irrigation",
+    "/api/predictions/disease-risk",
+]
+
+
+def seed_forecasts():
+    """Insère 7 jours de prévisions pour la localisation du benchmark"""
+    from src.etl.load import DatabaseLoader
+
+    now = datetime.now()
+    forecasts = [
+        {
+            "date": now + timedelta(days=day),
+            "temp_min": 22.0, "temp_max": 33.0, "temp_day": 28.0,
+            "humidity": 75.0, "rain_mm": 2.0, "irrigation_need_mm": 6.5,
+            "disease_risk": "high"
+        }
+        for day in range(7)
+    ]
+    DatabaseLoader().load_forecasts(forecasts, LATITUDE, LONGITUDE)
+
+
+async def run_level(client: httpx.AsyncClient, url: str, concurrency: int, requests_per_client: int) -> float:
+    """Exécute un niveau de concurrence et retourne le débit en requêtes/s"""
+    params = {"latitude": LATITUDE, "longitude": LONGITUDE, "days": 7}
+
+    async def worker():
+        for i in range(requests_per_client):
+            response = await client.get(url + ENDPOINTS[i % len(ENDPOINTS)], params=params)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return concurrency * requests_per_client / elapsed
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        print(f"{'clients':>8} {'req/s':>10}")
+        for concurrency in args.levels:
+            throughput = await run_level(client, args.url, concurrency, args.requests)
+            print(f"{concurrency:>8} {throughput:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000", help="URL de base de l'API")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="Niveaux de concurrence")
+    parser.add_argument("--requests", type=int, default=50, help="Requêtes par client")
+    parser.add_argument("--seed", action="store_true", help="Insérer les prévisions de test avant le benchmark")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_forecasts()
+
+    asyncio.run(main(args))
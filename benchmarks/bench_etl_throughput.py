@@ -0,0 +1,114 @@
+"""
+Benchmark de débit de l'ETL de bout en bout contre le serveur OpenWeather local
+
+Extraction (extract_many, vrai chemin HTTP: pool, retries, timeouts),
+transformation (transform_data_pipeline) et, avec --load, chargement en
+masse dans DATABASE_URL (base locale dédiée uniquement). Le serveur local
+(src/etl/openweather_stub.py) injecte latence, erreurs 5xx et 429; aucune
+requête ne sort de la machine et aucun quota n'est consommé.
+
+Usage:
+    python benchmarks/bench_etl_throughput.py --locations 1000 --latency-ms 80 --latency-distribution lognormal
+    python benchmarks/bench_etl_throughput.py --locations 1000 --error-rate 0.05 --rate-limit 200
+    DATABASE_URL=postgresql://... python benchmarks/bench_etl_throughput.py --locations 5000 --load
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.etl.openweather_stub import LATENCY_DISTRIBUTIONS, OpenWeatherStub
+
+
+def make_locations(count: int, seed: int = 42):
+    """Champs répartis sur le bassin arachidier (≈ 1.5° x 1.5°)"""
+    rng = np.random.default_rng(seed)
+    return [
+        {"name": f"champ-{i}", "lat": float(lat), "lon": float(lon)}
+        for i, (lat, lon) in enumerate(zip(rng.uniform(13.5, 15.0, count), rng.uniform(-16.8, -15.3, count)))
+    ]
+
+
+def load_transformed(transformed: list) -> int:
+    """Chargement en masse des relevés et prévisions transformés"""
+    from src.etl.load import DatabaseLoader
+
+    loader = DatabaseLoader()
+    records, forecasts = [], []
+    for data in transformed:
+        location = data["metadata"]["location"]
+        records.append({**data["current_weather"], **location})
+        forecasts.extend({**forecast, **location} for forecast in data["forecasts"])
+
+    rows = loader.bulk_load_current_weather(pd.DataFrame(records))
+    rows += loader.bulk_load_forecasts(pd.DataFrame(forecasts))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--cell-degrees", type=float, default=0,
+                        help="Grille d'extraction (0 = un appel par coordonnée)")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0, help="Proportion de réponses 5xx")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Requêtes/s avant 429 (0 = illimité)")
+    parser.add_argument("--load", action="store_true", help="Charger aussi dans DATABASE_URL")
+    args = parser.parse_args()
+
+    logger.remove()
+    stub = OpenWeatherStub(
+        latency_ms=args.latency_ms, latency_distribution=args.latency_distribution,
+        latency_sigma=args.latency_sigma, error_rate=args.error_rate, rate_limit=args.rate_limit
+    ).start()
+    os.environ.update({
+        "OPENWEATHER_API_KEY": "bench",
+        "OPENWEATHER_BASE_URL": stub.url,
+        "USE_MOCK_DATA": "false",
+        # Pas de budget ni de cache: chaque run mesure les appels HTTP
+        "OPENWEATHER_CALLS_PER_MINUTE": "0",
+        "OPENWEATHER_CALLS_PER_DAY": "0",
+        "HTTP_CACHE_TTL_SECONDS": "0",
+    })
+
+    from src.etl.extract import extract_many
+    from src.etl.transform import transform_data_pipeline
+
+    locations = make_locations(args.locations)
+    timings = {}
+
+    start = time.perf_counter()
+    extracted = extract_many(locations, max_workers=args.workers, cell_degrees=args.cell_degrees)
+    timings["extraction"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    transformed = [transform_data_pipeline(data) for data in extracted]
+    timings["transformation"] = time.perf_counter() - start
+
+    if args.load:
+        start = time.perf_counter()
+        rows = load_transformed(transformed)
+        timings["chargement"] = time.perf_counter() - start
+        print(f"{rows} lignes chargées")
+
+    stub.stop()
+
+    total = sum(timings.values())
+    print(f"{len(extracted)}/{len(locations)} localisations, serveur: {stub.stats()}")
+    print(f"{'étape':<16} {'secondes':>9} {'localisations/s':>16}")
+    for stage, elapsed in {**timings, "total": total}.items():
+        print(f"{stage:<16} {elapsed:>9.2f} {len(extracted) / elapsed:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark d'extraction: boucle séquentielle (ancien DAG) contre extract_many
+
+Le serveur One Call local (src/etl/openweather_stub.py) répond après
+--latency-ms pour simuler la latence réseau de l'API OpenWeather; aucune
+requête ne sort de la machine.
+
+Usage:
+    python benchmarks/bench_extract.py --locations 500 --latency-ms 50 --workers 8 32
+    python benchmarks/bench_extract.py --locations 5000 --cell-degrees 0.05
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from loguru import logger
+
+from src.etl.openweather_stub import OpenWeatherStub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--locations", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--serial-max-locations", type=int, default=500, help="Ignorer la boucle séquentielle au-delà")
+    parser.add_argument("--cell-degrees", type=float, default=0,
+                        help="Grille d'extraction (0 = un appel par coordonnée)")
+    args = parser.parse_args()
+
+    logger.remove()
+    server = OpenWeatherStub(latency_ms=args.latency_ms).start()
+    os.environ.update({
+        "OPENWEATHER_API_KEY": "bench",
+        "OPENWEATHER_BASE_URL": server.url,
+        "USE_MOCK_DATA": "false",
+        # Pas de budget ni de cache: chaque run mesure les appels HTTP
+        "OPENWEATHER_CALLS_PER_MINUTE": "0",
+        "OPENWEATHER_CALLS_PER_DAY": "0",
+        "HTTP_CACHE_TTL_SECONDS": "0",
+    })
+
+    from src.etl.extract import extract_all_data, extract_many, group_locations
+
+    # Champs répartis sur le bassin arachidier (≈ 1.5° x 1.5°)
+    rng = np.random.default_rng(42)
+    locations = [
+        {"name": f"champ-{i}", "lat": float(lat), "lon": float(lon)}
+        for i, (lat, lon) in enumerate(zip(rng.uniform(13.5, 15.0, args.locations),
+                                           rng.uniform(-16.8, -15.3, args.locations)))
+    ]
+    cells = len(group_locations(locations, args.cell_degrees))
+    print(f"{len(locations)} champs, {cells} appels ({1 - cells / len(locations):.1%} évités)")
+
+    print(f"{'mode':<14} {'secondes':>9} {'localisations/s':>16}")
+
+    if len(locations) <= args.serial_max_locations:
+        start = time.perf_counter()
+        for location in locations:
+            extract_all_data(location["lat"], location["lon"])
+        elapsed = time.perf_counter() - start
+        print(f"{'séquentiel':<14} {elapsed:>9.2f} {len(locations) / elapsed:>16.1f}")
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        results = extract_many(locations, max_workers=workers, cell_degrees=args.cell_degrees)
+        elapsed = time.perf_counter() - start
+        assert len(results) == len(locations)
+        print(f"{f'{workers} threads':<14} {elapsed:>9.2f} {len(locations) / elapsed:>16.1f}")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark du coût d'un DatabaseLoader par appel (POST /api/fields, load_data_pipeline)
+
+Compare, pour N créations de champ avec un chargeur neuf à chaque appel:
+- per_call_engine: moteur, pool et Base.metadata.create_all à chaque appel
+  (comportement antérieur)
+- shared_engine: moteur et pool partagés du processus (src/etl/database.py)
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_loader_setup.py --calls 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+
+from src.etl.database import database_url, pool_stats
+from src.etl.load import AgriculturalField, Base, DatabaseLoader
+
+NAME = "bench_loader_setup"
+
+
+def per_call_engine(index: int) -> int:
+    loader = DatabaseLoader()
+    engine = create_engine(database_url())
+    Base.metadata.create_all(engine)
+    loader.engine, loader.Session = engine, sessionmaker(bind=engine)
+    try:
+        return loader.create_field(NAME, 14.0 + index / 1000, -16.0, "mil", 1.0)
+    finally:
+        engine.dispose()
+
+
+def shared_engine(index: int) -> int:
+    return DatabaseLoader().create_field(NAME, 14.0 + index / 1000, -16.0, "mil", 1.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    logger.remove()
+    loader = DatabaseLoader()
+    loader.create_tables()
+
+    print(f"{'mode':<16} {'appels':>7} {'ms/appel':>9}")
+    for name, create in [("per_call_engine", per_call_engine), ("shared_engine", shared_engine)]:
+        start = time.perf_counter()
+        for index in range(args.calls):
+            create(index)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<16} {args.calls:>7} {elapsed / args.calls * 1000:>9.2f}")
+
+    with loader.engine.begin() as connection:
+        connection.execute(text(f"DELETE FROM {AgriculturalField.__tablename__} WHERE name = :name"), {"name": NAME})
+    print(pool_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark de latence des endpoints /api/models/*
+
+Compare l'ancien chemin (modèle construit et entraîné à chaque requête)
+avec le registre de modèles chargé au démarrage.
+
+Usage:
+    USE_MOCK_DATA=true python benchmarks/bench_model_endpoints.py --requests 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("USE_MOCK_DATA", "true")
+
+from loguru import logger
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.routers.models import PredictionRequest, _get_forecast_records
+from src.models import drought_detection, disease_risk
+from src.models.rain_prediction import RainPredictor
+
+
+ENDPOINTS = ["rain-prediction", "drought-prediction", "disease-risk"]
+PARAMS = {"latitude": 14.7167, "longitude": -17.4677, "days": 7}
+
+
+def legacy_request(endpoint: str):
+    """Reproduit l'ancien traitement: entraînement complet par requête"""
+    if endpoint == "rain-prediction":
+        model = RainPredictor()
+        return model.predict_forecast(_get_forecast_records(PredictionRequest(**PARAMS)))
+
+    module = drought_detection if endpoint == "drought-prediction" else disease_risk
+    model = module.DroughtDetectionModel() if endpoint == "drought-prediction" else module.DiseaseRiskModel()
+    model.train(module.create_sample_data())
+    return model.predict(_get_forecast_records(PredictionRequest(**PARAMS)))
+
+
+def percentiles(samples):
+    """p50/p99 en millisecondes"""
+    values = np.array(samples) * 1000
+    return np.percentile(values, 50), np.percentile(values, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=30, help="Requêtes par endpoint")
+    args = parser.parse_args()
+
+    logger.remove()
+
+    print(f"{'endpoint':<20} {'mode':<9} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+
+    for endpoint in ENDPOINTS:
+        samples = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            legacy_request(endpoint)
+            samples.append(time.perf_counter() - start)
+        p50, p99 = percentiles(samples)
+        print(f"{endpoint:<20} {'avant':<9} {p50:>10.1f} {p99:>10.1f}")
+
+    with TestClient(app) as client:
+        for endpoint in ENDPOINTS:
+            samples = []
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                response = client.get(f"/api/models/{endpoint}", params=PARAMS)
+                samples.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+            p50, p99 = percentiles(samples)
+            print(f"{endpoint:<20} {'registre':<9} {p50:>10.1f} {p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Benchmark des plans de requête: EXPLAIN ANALYZE des requêtes de l'API
+
+Les requêtes mesurées sont celles de src/api/main.py, exécutées telles
+quelles: un écouteur SQLAlchemy préfixe chaque instruction par
+EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON).
+
+--seed vide puis remplit les tables de la base DATABASE_URL (base locale
+dédiée uniquement) avec des relevés horaires et des prévisions journalières
+synthétiques. --baseline compare à un résultat enregistré par --output et
+sort en erreur si une requête passe en Seq Scan ou ralentit
+au-delà de --tolerance.
+
+Usage:
+    alembic upgrade head
+    DATABASE_URL=postgresql://... python benchmarks/bench_query_plans.py --seed --records 2000000 --output plans.json
+    DATABASE_URL=postgresql://... python benchmarks/bench_query_plans.py --baseline plans.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import event, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+
+from src.api import main as api
+from src.etl.load import DatabaseLoader
+from src.etl.spatial import encode_geohash
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+LARGE_TABLES = ("weather_records", "weather_forecasts")
+
+
+def seed(loader: DatabaseLoader, locations: int, records: int, forecast_days: int, seed: int = 42):
+    """Vide les tables météo puis insère des données synthétiques (generate_series)"""
+    rng = np.random.default_rng(seed)
+    latitudes = np.round(rng.uniform(12.5, 16.5, locations), 4)
+    longitudes = np.round(rng.uniform(-17.4, -11.5, locations), 4)
+    hours = max(1, records // locations)
+
+    with loader.engine.begin() as connection:
+        connection.execute(text("TRUNCATE weather_records, weather_forecasts"))
+        connection.execute(text(
+            "CREATE TEMP TABLE bench_locations (latitude FLOAT, longitude FLOAT, geohash VARCHAR(12)) ON COMMIT DROP"
+        ))
+        connection.execute(
+            text("INSERT INTO bench_locations VALUES (:latitude, :longitude, :geohash)"),
+            [
+                {"latitude": latitude, "longitude": longitude, "geohash": encode_geohash(latitude, longitude)}
+                for latitude, longitude in zip(latitudes.tolist(), longitudes.tolist())
+            ]
+        )
+
+        connection.execute(text("""
+            INSERT INTO weather_records (
+                timestamp, latitude, longitude, geohash, temperature_celsius, feels_like_celsius,
+                humidity_percent, pressure_hpa, wind_speed_ms, clouds_percent, uvi, created_at
+            )
+            SELECT date_trunc('hour', now()) - make_interval(hours => hour),
+                   latitude, longitude, geohash,
+                   20 + random() * 15, 20 + random() * 17, 40 + random() * 50,
+                   1005 + random() * 15, random() * 12, random() * 100, random() * 11, now()
+            FROM bench_locations CROSS JOIN generate_series(0, :hours - 1) AS hour
+        """), {"hours": hours})
+
+        # Prévisions: la moitié de la période dans le passé, l'autre dans le futur
+        connection.execute(text("""
+            INSERT INTO weather_forecasts (
+                forecast_date, created_at, latitude, longitude, geohash, temp_min, temp_max, temp_day,
+                humidity, pressure, wind_speed, clouds, rain_mm, pop, uvi, et0_mm, irrigation_need_mm, disease_risk
+            )
+            SELECT date_trunc('day', now()) + make_interval(days => day) + INTERVAL '12 hours', now(),
+                   latitude, longitude, geohash,
+                   18 + random() * 6, 28 + random() * 8, 24 + random() * 8,
+                   40 + random() * 50, 1005 + random() * 15, random() * 12, random() * 100,
+                   random() * 20, random() * 100, random() * 11, 3 + random() * 4, random() * 7,
+                   (ARRAY['low', 'medium', 'high'])[1 + floor(random() * 3)::int]
+            FROM bench_locations CROSS JOIN generate_series(-(:days / 2), :days - :days / 2 - 1) AS day
+        """), {"days": forecast_days})
+
+    with loader.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE weather_records"))
+        connection.execute(text("VACUUM ANALYZE weather_forecasts"))
+
+    logger.info(f"{locations * hours} relevés et {locations * forecast_days} prévisions insérés")
+
+
+def explain_session(loader: DatabaseLoader):
+    """Session dont chaque requête retourne son plan EXPLAIN ANALYZE au lieu des lignes"""
+    engine = loader.engine.execution_options()
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _explain(conn, cursor, statement, parameters, context, executemany):
+        return EXPLAIN_PREFIX + statement, parameters
+
+    return sessionmaker(bind=engine)()
+
+
+def plan_nodes(plan: dict):
+    """Parcourt récursivement les nœuds d'un plan JSON"""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def summarize(rows) -> dict:
+    """Temps d'exécution, nœuds de scan et Seq Scan sur les grosses tables"""
+    row = rows[0] if isinstance(rows, list) else rows  # fetchall() ou fetchone()
+    explain = row[0][0]
+    nodes = list(plan_nodes(explain["Plan"]))
+    return {
+        "execution_ms": explain["Execution Time"],
+        "planning_ms": explain["Planning Time"],
+        "scans": sorted({
+            f"{node['Node Type']}:{node.get('Index Name') or node.get('Relation Name')}"
+            for node in nodes if "Scan" in node["Node Type"]
+        }),
+        "seq_scans": sorted({
+            node["Relation Name"] for node in nodes
+            if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES
+        }),
+    }
+
+
+def sample_geohashes(loader: DatabaseLoader, count: int):
+    with loader.engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT DISTINCT geohash FROM weather_forecasts WHERE geohash IS NOT NULL LIMIT :count"
+        ), {"count": count}).fetchall()
+    return [row[0] for row in rows]
+
+
+def endpoint_queries(geohashes, batch_size: int):
+    """(nom, requête de l'API, arguments) pour chaque endpoint"""
+    today = datetime.now().date()
+    geohash = geohashes[0]
+    return [
+        ("current_weather", api._query_current_weather, (geohash,)),
+        ("forecast_7d", api._query_forecasts, (geohash, today, today + timedelta(days=7))),
+        ("forecast_batch", api._query_forecasts_batch,
+         (geohashes[:batch_size], today, today + timedelta(days=7))),
+        ("history_daily", api._query_history,
+         (api.HISTORY_VIEWS["daily"], geohash, today - timedelta(days=30), today + timedelta(days=1))),
+        ("history_weekly", api._query_history,
+         (api.HISTORY_VIEWS["weekly"], geohash, today - timedelta(days=90), today + timedelta(days=1))),
+        ("field", api._query_field, (1,)),
+    ]
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    """Régressions par rapport à la référence: Seq Scan apparu ou temps dépassé"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["seq_scans"] and not reference["seq_scans"]:
+            regressions.append(f"{name}: Seq Scan sur {', '.join(result['seq_scans'])}")
+        slowdown = result["execution_ms"] - reference["execution_ms"]
+        if result["execution_ms"] > reference["execution_ms"] * tolerance and slowdown > min_delta_ms:
+            regressions.append(
+                f"{name}: {result['execution_ms']:.2f} ms (référence {reference['execution_ms']:.2f} ms)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="Vider et remplir les tables avant la mesure")
+    parser.add_argument("--locations", type=int, default=2000)
+    parser.add_argument("--records", type=int, default=2000000, help="Relevés horaires à insérer")
+    parser.add_argument("--forecast-days", type=int, default=500, help="Jours de prévisions par localisation")
+    parser.add_argument("--batch-size", type=int, default=100, help="Localisations de la requête batch")
+    parser.add_argument("--repeat", type=int, default=5, help="Exécutions par requête (médiane)")
+    parser.add_argument("--output", help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", help="Résultats de référence (JSON) à comparer")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="Facteur de ralentissement toléré")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Écart ignoré (bruit des requêtes rapides)")
+    args = parser.parse_args()
+
+    logger.remove()
+    loader = DatabaseLoader()
+    if args.seed:
+        seed(loader, args.locations, args.records, args.forecast_days)
+
+    geohashes = sample_geohashes(loader, args.batch_size)
+    if not geohashes:
+        sys.exit("Aucune prévision en base: relancer avec --seed")
+
+    session = explain_session(loader)
+
+    results = {}
+    print(f"{'requête':<16} {'exec (ms)':>10} {'plan (ms)':>10}  scans")
+    for name, query, query_args in endpoint_queries(geohashes, args.batch_size):
+        runs = [summarize(query(session, *query_args)) for _ in range(args.repeat)]
+        result = {
+            "execution_ms": statistics.median(run["execution_ms"] for run in runs),
+            "planning_ms": statistics.median(run["planning_ms"] for run in runs),
+            "scans": runs[-1]["scans"],
+            "seq_scans": runs[-1]["seq_scans"],
+        }
+        results[name] = result
+        print(f"{name:<16} {result['execution_ms']:>10.2f} {result['planning_ms']:>10.2f}  {', '.join(result['scans'])}")
+
+    session.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark mémoire: ETL matérialisé (tout extraire, tout transformer, tout
+charger) contre run_streaming_pipeline (paquets, files bornées)
+
+Chaque mode tourne dans son propre processus pour mesurer son pic de mémoire
+résidente (ru_maxrss). Extraction en données simulées (USE_MOCK_DATA=true),
+chargement dans DATABASE_URL (défaut: SQLite temporaire).
+
+Usage:
+    python benchmarks/bench_streaming.py --locations 50000 --chunk-size 500
+    DATABASE_URL=postgresql://... python benchmarks/bench_streaming.py --locations 50000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = ("materialise", "flux")
+
+
+def locations(count: int):
+    """Localisations produites paresseusement, dans l'ordre de iter_field_locations"""
+    import numpy as np
+
+    from src.etl.spatial import GRID_CELL_DEGREES
+    from src.etl.synthetic import random_locations
+
+    latitudes, longitudes = random_locations(count)
+    order = np.lexsort((longitudes, (latitudes / GRID_CELL_DEGREES).astype(int)))
+    for index in order.tolist():
+        yield {"name": f"champ-{index}", "lat": float(latitudes[index]), "lon": float(longitudes[index])}
+
+
+def run_mode(mode: str, count: int, chunk_size: int, max_memory_mb: float) -> dict:
+    from loguru import logger
+
+    logger.remove()
+    start = time.perf_counter()
+    if mode == "flux":
+        from src.etl.pipeline import run_streaming_pipeline
+
+        report = run_streaming_pipeline(locations(count), chunk_size=chunk_size, max_memory_mb=max_memory_mb)
+        rows = report["rows"]
+    else:
+        from src.etl.extract import extract_many
+        from src.etl.load import load_batch_pipeline
+        from src.etl.transform import transform_batch_pipeline
+
+        result = load_batch_pipeline(transform_batch_pipeline(extract_many(list(locations(count)))))
+        rows = result["weather_record_count"] + result["forecast_count"]
+
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows / elapsed),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--max-memory-mb", type=float, default=0)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.locations, args.chunk_size, args.max_memory_mb)))
+        return
+
+    print(f"{'mode':<12} {'lignes':>9} {'secondes':>9} {'lignes/s':>9} {'pic Mo':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in MODES:
+            env = dict(os.environ, USE_MOCK_DATA="true")
+            env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(directory, mode + '.db')}")
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--locations", str(args.locations),
+                 "--chunk-size", str(args.chunk_size), "--max-memory-mb", str(args.max_memory_mb)],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['mode']:<12} {result['rows']:>9} {result['seconds']:>9.2f} "
+                  f"{result['rows_per_second']:>9} {result['peak_rss_mb']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark du générateur synthétique: boucle de dicts (ancien create_sample_data)
+contre generate_weather vectorisé
+
+Usage:
+    python benchmarks/bench_synthetic.py --rows 100000 1000000 10000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.etl.synthetic import generate_weather, random_locations
+
+DAYS = 1000
+
+
+def legacy_rows(rows: int):
+    """Reproduit l'ancien générateur: un dict par jour, tirages scalaires"""
+    dates = pd.date_range(start='2023-01-01', periods=rows, freq='min')  # 'D' déborde au-delà de ~100k
+    data = []
+    for i, date in enumerate(dates):
+        temp_mean = 25 + 10 * np.sin(2 * np.pi * i / 365.25) + np.random.normal(0, 3)
+        humidity = max(30, min(95, 70 + 10 * np.sin(2 * np.pi * i / 365.25) + np.random.normal(0, 10)))
+        rain_mm = max(0, np.random.exponential(0.5))
+        data.append({'date': date, 'temp_mean': temp_mean, 'humidity': humidity, 'rain_mm': rain_mm})
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000, 10000000])
+    parser.add_argument("--legacy-max-rows", type=int, default=1000000, help="Ignorer la boucle au-delà")
+    args = parser.parse_args()
+
+    print(f"{'lignes':>10} {'mode':<12} {'secondes':>9} {'lignes/s':>12} {'Mo':>8}")
+    for rows in args.rows:
+        if rows <= args.legacy_max_rows:
+            start = time.perf_counter()
+            legacy_rows(rows)
+            elapsed = time.perf_counter() - start
+            print(f"{rows:>10} {'boucle':<12} {elapsed:>9.2f} {rows / elapsed:>12.0f} {'':>8}")
+
+        latitudes, longitudes = random_locations(max(1, rows // DAYS))
+        start = time.perf_counter()
+        data = generate_weather(latitudes, longitudes, "2023-01-01", DAYS)
+        elapsed = time.perf_counter() - start
+        size = sum(column.nbytes for column in data.values()) / 1e6
+        print(f"{rows:>10} {'vectorisé':<12} {elapsed:>9.2f} {rows / elapsed:>12.0f} {size:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
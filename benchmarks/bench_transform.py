@@ -0,0 +1,102 @@
+"""
+Benchmark de transformation: transform_data_pipeline par localisation contre
+transform_batch_pipeline (un DataFrame typé pour le lot, features dérivées
+calculées en une passe)
+
+Les réponses brutes sont produites par le générateur synthétique
+(src/etl/synthetic.py). --load charge ensuite le DataFrame tel quel
+(load_batch_pipeline) dans DATABASE_URL (base locale dédiée uniquement).
+
+Usage:
+    python benchmarks/bench_transform.py --locations 100000
+    DATABASE_URL=postgresql://... python benchmarks/bench_transform.py --locations 100000 --load
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+
+from src.etl.synthetic import generate_weather, random_locations
+from src.etl.transform import transform_batch_pipeline, transform_data_pipeline
+
+DAYS = 7
+
+
+def make_raw_batch(locations: int, seed: int = 42):
+    """Données extraites synthétiques: 'location' et 7 prévisions One Call par localisation"""
+    latitudes, longitudes = random_locations(locations, seed)
+    data = generate_weather(latitudes, longitudes, days=DAYS, seed=seed)
+    columns = {name: np.round(values.astype(np.float64), 2).tolist() for name, values in data.items()
+               if values.dtype == np.float32}
+    timestamps = data["date"].astype(np.int64).tolist()
+
+    forecasts = [
+        {
+            "dt": timestamps[i],
+            "temp": {"min": columns["temp_min"][i], "max": columns["temp_max"][i], "day": columns["temp_day"][i]},
+            "humidity": columns["humidity"][i],
+            "pressure": columns["pressure"][i],
+            "wind_speed": columns["wind_speed"][i],
+            "clouds": columns["clouds"][i],
+            "rain": columns["rain_mm"][i],
+            "pop": columns["pop"][i] / 100,
+            "uvi": columns["uvi"][i],
+        }
+        for i in range(len(timestamps))
+    ]
+    return [
+        {"location": {"latitude": float(latitude), "longitude": float(longitude)},
+         "location_name": f"champ-{index}",
+         "weather": {"current": {**forecasts[index * DAYS], "temp": forecasts[index * DAYS]["temp"]["day"],
+                                 "weather": [{"description": "clear sky"}]}},
+         "forecast": forecasts[index * DAYS:(index + 1) * DAYS]}
+        for index, (latitude, longitude) in enumerate(zip(latitudes, longitudes))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, default=100000)
+    parser.add_argument("--legacy-max-locations", type=int, default=10000,
+                        help="Localisations transformées par l'ancien chemin (débit extrapolé)")
+    parser.add_argument("--load", action="store_true", help="Charger le DataFrame dans DATABASE_URL")
+    args = parser.parse_args()
+
+    logger.remove()
+    raw_batch = make_raw_batch(args.locations)
+    print(f"{'mode':<18} {'localisations':>13} {'secondes':>9} {'localisations/s':>16} {'lignes/s':>10}")
+
+    def report(mode, locations, elapsed):
+        rows = locations * (DAYS + 1)
+        print(f"{mode:<18} {locations:>13} {elapsed:>9.2f} {locations / elapsed:>16.1f} {rows / elapsed:>10.0f}")
+
+    legacy = raw_batch[:args.legacy_max_locations]
+    start = time.perf_counter()
+    for raw_data in legacy:
+        transform_data_pipeline(raw_data)
+    report("par localisation", len(legacy), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    transformed = transform_batch_pipeline(raw_batch)
+    report("lot", len(raw_batch), time.perf_counter() - start)
+    frame = transformed["forecasts"]
+    print(f"Prévisions: {len(frame)} lignes, {frame.memory_usage(deep=True).sum() / 1e6:.0f} Mo")
+
+    if args.load:
+        from src.etl.load import load_batch_pipeline
+
+        start = time.perf_counter()
+        result = load_batch_pipeline(transformed)
+        report("chargement", len(raw_batch), time.perf_counter() - start)
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
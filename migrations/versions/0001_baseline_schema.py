@@ -0,0 +1,152 @@
+"""Schéma de base: tables météo et champs agricoles
+
+Crée les tables si elles n'existent pas; sur une base créée auparavant par
+Base.metadata.create_all, ajoute les colonnes geohash / clouds, renseigne
+le geohash des anciennes lignes et la contrainte unique des prévisions.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.etl.spatial import encode_geohash
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_tables(existing: set) -> None:
+    if "weather_records" not in existing:
+        op.create_table(
+            "weather_records",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("timestamp", sa.DateTime, nullable=False, index=True),
+            sa.Column("latitude", sa.Float, nullable=False),
+            sa.Column("longitude", sa.Float, nullable=False),
+            sa.Column("geohash", sa.String(12), index=True),
+            sa.Column("temperature_celsius", sa.Float),
+            sa.Column("feels_like_celsius", sa.Float),
+            sa.Column("humidity_percent", sa.Float),
+            sa.Column("pressure_hpa", sa.Float),
+            sa.Column("wind_speed_ms", sa.Float),
+            sa.Column("clouds_percent", sa.Float),
+            sa.Column("uvi", sa.Float),
+            sa.Column("weather_description", sa.String),
+            sa.Column("created_at", sa.DateTime),
+        )
+
+    if "weather_forecasts" not in existing:
+        op.create_table(
+            "weather_forecasts",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("forecast_date", sa.DateTime, nullable=False, index=True),
+            sa.Column("created_at", sa.DateTime, index=True),
+            sa.Column("latitude", sa.Float, nullable=False),
+            sa.Column("longitude", sa.Float, nullable=False),
+            sa.Column("geohash", sa.String(12), index=True),
+            sa.Column("temp_min", sa.Float),
+            sa.Column("temp_max", sa.Float),
+            sa.Column("temp_day", sa.Float),
+            sa.Column("humidity", sa.Float),
+            sa.Column("pressure", sa.Float),
+            sa.Column("wind_speed", sa.Float),
+            sa.Column("clouds", sa.Float),
+            sa.Column("rain_mm", sa.Float),
+            sa.Column("pop", sa.Float),
+            sa.Column("uvi", sa.Float),
+            sa.Column("temp_amplitude", sa.Float),
+            sa.Column("water_stress_index", sa.Float),
+            sa.Column("et0_mm", sa.Float),
+            sa.Column("irrigation_need_mm", sa.Float),
+            sa.Column("disease_risk", sa.String),
+            sa.UniqueConstraint("geohash", "forecast_date", name="uq_weather_forecasts_geohash_forecast_date"),
+        )
+
+    if "agricultural_fields" not in existing:
+        op.create_table(
+            "agricultural_fields",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("name", sa.String, nullable=False),
+            sa.Column("latitude", sa.Float, nullable=False),
+            sa.Column("longitude", sa.Float, nullable=False),
+            sa.Column("crop_type", sa.String),
+            sa.Column("area_hectares", sa.Float),
+            sa.Column("metadata", sa.JSON),
+            sa.Column("created_at", sa.DateTime),
+        )
+
+
+def _backfill_geohash(table: str) -> None:
+    """Calcule le geohash des anciennes lignes, une fois par localisation distincte"""
+    connection = op.get_bind()
+    locations = connection.execute(sa.text(
+        f"SELECT DISTINCT latitude, longitude FROM {table} WHERE geohash IS NULL"
+    )).fetchall()
+
+    for latitude, longitude in locations:
+        connection.execute(
+            sa.text(
+                f"UPDATE {table} SET geohash = :geohash "
+                "WHERE geohash IS NULL AND latitude = :latitude AND longitude = :longitude"
+            ),
+            {"geohash": encode_geohash(latitude, longitude), "latitude": latitude, "longitude": longitude}
+        )
+
+
+def _upgrade_legacy_tables(existing: set) -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    for table in ("weather_records", "weather_forecasts"):
+        if table not in existing:
+            continue
+
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        if "geohash" not in columns:
+            op.add_column(table, sa.Column("geohash", sa.String(12)))
+            op.create_index(f"ix_{table}_geohash", table, ["geohash"])
+        if table == "weather_forecasts" and "clouds" not in columns:
+            op.add_column(table, sa.Column("clouds", sa.Float))
+
+        _backfill_geohash(table)
+
+    if "weather_forecasts" in existing:
+        constraints = {constraint["name"] for constraint in inspector.get_unique_constraints("weather_forecasts")}
+        if "uq_weather_forecasts_geohash_forecast_date" not in constraints:
+            # Même règle que scripts/dedupe_forecasts.sql: la dernière émission gagne
+            op.execute("""
+                DELETE FROM weather_forecasts
+                WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY geohash, forecast_date
+                            ORDER BY created_at DESC, id DESC
+                        ) AS issuance_rank
+                        FROM weather_forecasts
+                    ) ranked
+                    WHERE issuance_rank > 1
+                )
+            """)
+            with op.batch_alter_table("weather_forecasts") as batch:
+                batch.create_unique_constraint(
+                    "uq_weather_forecasts_geohash_forecast_date", ["geohash", "forecast_date"]
+                )
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    _upgrade_legacy_tables(existing)
+    _create_tables(existing)
+
+
+def downgrade() -> None:
+    op.drop_table("agricultural_fields")
+    op.drop_table("weather_forecasts")
+    op.drop_table("weather_records")
@@ -0,0 +1,183 @@
+"""TimescaleDB: hypertables, compression, rétention et agrégats continus
+
+- weather_records / weather_forecasts deviennent des hypertables
+- compression native des anciens chunks (segmentés par geohash)
+- politiques de rétention des données brutes
+- agrégats continus weather_records_daily / weather_records_weekly lus par
+  l'endpoint d'historique de l'API
+
+Sans l'extension timescaledb (PostgreSQL standard), les deux agrégats sont
+créés comme de simples vues aux mêmes colonnes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from loguru import logger
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Hypertables: colonne de temps, taille des chunks, compression et rétention
+HYPERTABLES = {
+    "weather_records": {
+        "time_column": "timestamp",
+        "chunk_interval": "7 days",
+        "compress_after": "30 days",
+        "retention": "730 days",
+    },
+    "weather_forecasts": {
+        "time_column": "forecast_date",
+        "chunk_interval": "30 days",
+        # Les prévisions passées ne sont plus mises à jour par l'upsert
+        "compress_after": "90 days",
+        "retention": "365 days",
+    },
+}
+
+# Agrégats continus: largeur du bucket et fenêtre de rafraîchissement
+AGGREGATES = {
+    "weather_records_daily": {
+        "bucket": "1 day",
+        "start_offset": "3 days",
+        "end_offset": "1 hour",
+        "schedule_interval": "1 hour",
+    },
+    "weather_records_weekly": {
+        "bucket": "7 days",
+        "start_offset": "21 days",
+        "end_offset": "1 day",
+        "schedule_interval": "1 day",
+    },
+}
+
+AGGREGATE_COLUMNS = """
+    geohash,
+    AVG(temperature_celsius) AS temperature_avg,
+    MIN(temperature_celsius) AS temperature_min,
+    MAX(temperature_celsius) AS temperature_max,
+    AVG(humidity_percent) AS humidity_avg,
+    AVG(pressure_hpa) AS pressure_avg,
+    AVG(wind_speed_ms) AS wind_speed_avg,
+    MAX(wind_speed_ms) AS wind_speed_max,
+    AVG(clouds_percent) AS clouds_avg,
+    MAX(uvi) AS uvi_max,
+    COUNT(*) AS record_count
+"""
+
+
+def _has_timescaledb() -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+    ).scalar() is not None
+
+
+def _create_hypertable(table: str, settings: dict) -> None:
+    time_column = settings["time_column"]
+
+    # Toute contrainte unique d'une hypertable doit inclure la colonne de temps
+    primary_key = sa.inspect(op.get_bind()).get_pk_constraint(table)
+    if primary_key["constrained_columns"] == ["id"]:
+        op.drop_constraint(primary_key["name"], table, type_="primary")
+        op.create_primary_key(f"{table}_pkey", table, ["id", time_column])
+
+    op.execute(f"""
+        SELECT create_hypertable(
+            '{table}', '{time_column}',
+            chunk_time_interval => INTERVAL '{settings["chunk_interval"]}',
+            migrate_data => TRUE,
+            if_not_exists => TRUE
+        )
+    """)
+
+    op.execute(f"""
+        ALTER TABLE {table} SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'geohash',
+            timescaledb.compress_orderby = '{time_column} DESC'
+        )
+    """)
+    op.execute(
+        f"SELECT add_compression_policy('{table}', INTERVAL '{settings['compress_after']}', if_not_exists => TRUE)"
+    )
+    op.execute(
+        f"SELECT add_retention_policy('{table}', INTERVAL '{settings['retention']}', if_not_exists => TRUE)"
+    )
+
+
+def _create_continuous_aggregate(view: str, settings: dict) -> None:
+    # CREATE MATERIALIZED VIEW ... timescaledb.continuous refuse les blocs transactionnels
+    with op.get_context().autocommit_block():
+        op.execute(f"""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT time_bucket(INTERVAL '{settings["bucket"]}', timestamp) AS bucket, {AGGREGATE_COLUMNS}
+            FROM weather_records
+            GROUP BY bucket, geohash
+            WITH NO DATA
+        """)
+        op.execute(f"""
+            SELECT add_continuous_aggregate_policy(
+                '{view}',
+                start_offset => INTERVAL '{settings["start_offset"]}',
+                end_offset => INTERVAL '{settings["end_offset"]}',
+                schedule_interval => INTERVAL '{settings["schedule_interval"]}',
+                if_not_exists => TRUE
+            )
+        """)
+
+
+def _create_plain_view(view: str, settings: dict) -> None:
+    # time_bucket hebdomadaire démarre le lundi, comme date_trunc('week')
+    unit = "day" if settings["bucket"] == "1 day" else "week"
+    op.execute(f"""
+        CREATE OR REPLACE VIEW {view} AS
+        SELECT date_trunc('{unit}', timestamp) AS bucket, {AGGREGATE_COLUMNS}
+        FROM weather_records
+        GROUP BY bucket, geohash
+    """)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        logger.warning("Migration TimescaleDB ignorée: base non PostgreSQL")
+        return
+
+    if not _has_timescaledb():
+        logger.warning("Extension timescaledb absente: agrégats créés comme vues simples")
+        for view, settings in AGGREGATES.items():
+            _create_plain_view(view, settings)
+        return
+
+    for table, settings in HYPERTABLES.items():
+        _create_hypertable(table, settings)
+
+    for view, settings in AGGREGATES.items():
+        _create_continuous_aggregate(view, settings)
+
+
+def downgrade() -> None:
+    """Supprime agrégats et politiques; les hypertables restent en place"""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    if not _has_timescaledb():
+        for view in AGGREGATES:
+            op.execute(f"DROP VIEW IF EXISTS {view}")
+        return
+
+    with op.get_context().autocommit_block():
+        for view in AGGREGATES:
+            op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view}")
+
+    for table in HYPERTABLES:
+        op.execute(f"SELECT remove_retention_policy('{table}', if_exists => TRUE)")
+        op.execute(f"SELECT remove_compression_policy('{table}', if_exists => TRUE)")
@@ -0,0 +1,58 @@
+"""Index composites (localisation, temps) alignés sur les requêtes de l'API
+
+- weather_records: (geohash, timestamp DESC) pour le dernier relevé et
+  l'historique d'une localisation
+- weather_forecasts: la contrainte unique (geohash, forecast_date) de la
+  révision 0001 sert déjà les lectures par plage de dates
+
+Les index simples sur geohash, préfixes des index composites, sont supprimés,
+ainsi que l'index seul sur forecast_date: toutes les lectures de prévisions
+filtrent sur geohash, et le planificateur le choisissait à tort pour la
+requête batch (plage de dates sur toutes les localisations, puis filtre).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _indexes(table: str) -> set:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    if "ix_weather_records_geohash_timestamp" not in _indexes("weather_records"):
+        op.create_index(
+            "ix_weather_records_geohash_timestamp",
+            "weather_records",
+            ["geohash", sa.text("timestamp DESC")]
+        )
+
+    for table, index in (
+        ("weather_records", "ix_weather_records_geohash"),
+        ("weather_forecasts", "ix_weather_forecasts_geohash"),
+        ("weather_forecasts", "ix_weather_forecasts_forecast_date"),
+        # Index par défaut de create_hypertable (révision 0002)
+        ("weather_forecasts", "weather_forecasts_forecast_date_idx"),
+    ):
+        if index in _indexes(table):
+            op.drop_index(index, table_name=table)
+
+
+def downgrade() -> None:
+    for table in ("weather_records", "weather_forecasts"):
+        op.create_index(f"ix_{table}_geohash", table, ["geohash"])
+    op.create_index("ix_weather_forecasts_forecast_date", "weather_forecasts", ["forecast_date"])
+
+    op.drop_index("ix_weather_records_geohash_timestamp", table_name="weather_records")
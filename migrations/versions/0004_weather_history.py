@@ -0,0 +1,79 @@
+"""Historique météo journalier (backfill)
+
+- weather_history: une ligne par localisation et par jour, contrainte
+  unique (geohash, date) utilisée par l'upsert du backfill
+- avec TimescaleDB: hypertable par date (chunks de 90 jours), compression
+  des chunks de plus de 180 jours, sans rétention
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_timescaledb() -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+    ).scalar() is not None
+
+
+def upgrade() -> None:
+    if "weather_history" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "weather_history",
+            sa.Column("id", sa.Integer, autoincrement=True, nullable=False),
+            sa.Column("date", sa.DateTime, nullable=False),
+            sa.Column("latitude", sa.Float, nullable=False),
+            sa.Column("longitude", sa.Float, nullable=False),
+            sa.Column("geohash", sa.String(12)),
+            sa.Column("temp_min", sa.Float),
+            sa.Column("temp_max", sa.Float),
+            sa.Column("temp_mean", sa.Float),
+            sa.Column("humidity", sa.Float),
+            sa.Column("pressure", sa.Float),
+            sa.Column("wind_speed", sa.Float),
+            sa.Column("clouds", sa.Float),
+            sa.Column("rain_mm", sa.Float),
+            sa.Column("source", sa.String(32)),
+            sa.Column("created_at", sa.DateTime),
+            sa.PrimaryKeyConstraint("id", name="weather_history_pkey"),
+            sa.UniqueConstraint("geohash", "date", name="uq_weather_history_geohash_date"),
+        )
+
+    if op.get_bind().dialect.name != "postgresql" or not _has_timescaledb():
+        return
+
+    # Toute contrainte unique d'une hypertable doit inclure la colonne de temps
+    op.drop_constraint("weather_history_pkey", "weather_history", type_="primary")
+    op.create_primary_key("weather_history_pkey", "weather_history", ["id", "date"])
+    op.execute("""
+        SELECT create_hypertable(
+            'weather_history', 'date',
+            chunk_time_interval => INTERVAL '90 days',
+            migrate_data => TRUE,
+            if_not_exists => TRUE
+        )
+    """)
+    op.execute("""
+        ALTER TABLE weather_history SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'geohash',
+            timescaledb.compress_orderby = 'date DESC'
+        )
+    """)
+    op.execute("SELECT add_compression_policy('weather_history', INTERVAL '180 days', if_not_exists => TRUE)")
+
+
+def downgrade() -> None:
+    op.drop_table("weather_history")
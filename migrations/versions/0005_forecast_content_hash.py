@@ -0,0 +1,34 @@
+"""Empreinte de contenu des prévisions
+
+- weather_forecasts.content_hash: empreinte des valeurs d'une prévision
+  (forecast_content_hash); l'upsert ne réécrit pas une prévision dont
+  l'empreinte est inchangée
+- les lignes existantes restent sans empreinte et seront réécrites une
+  fois au prochain chargement
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("weather_forecasts")}
+    if "content_hash" not in columns:
+        # Colonne nullable sans défaut: ajout instantané, y compris sur une hypertable compressée
+        op.add_column("weather_forecasts", sa.Column("content_hash", sa.String(16)))
+
+
+def downgrade() -> None:
+    op.drop_column("weather_forecasts", "content_hash")
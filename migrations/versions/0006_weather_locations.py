@@ -0,0 +1,48 @@
+"""Localisations ingérées
+
+- weather_locations: une ligne par geohash chargé, tenue à jour par le
+  chargeur; le résolveur de l'API la lit au lieu d'un SELECT DISTINCT sur
+  weather_forecasts et weather_records
+- remplie une fois depuis les prévisions et relevés existants
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "weather_locations" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "weather_locations",
+            sa.Column("geohash", sa.String(12), primary_key=True),
+            sa.Column("latitude", sa.Float, nullable=False),
+            sa.Column("longitude", sa.Float, nullable=False),
+            sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        )
+
+    op.execute("""
+        INSERT INTO weather_locations (geohash, latitude, longitude)
+        SELECT geohash, MIN(latitude), MIN(longitude) FROM (
+            SELECT geohash, latitude, longitude FROM weather_forecasts WHERE geohash IS NOT NULL
+            UNION
+            SELECT geohash, latitude, longitude FROM weather_records WHERE geohash IS NOT NULL
+        ) AS ingested
+        GROUP BY geohash
+        ON CONFLICT (geohash) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("weather_locations")
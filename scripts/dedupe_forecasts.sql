@@ -0,0 +1,29 @@
+-- Migration des bases existantes vers une prévision par localisation et par jour.
+-- Conserve la dernière émission (created_at) de chaque (geohash, forecast_date),
+-- puis crée l'index unique utilisé par l'upsert de DatabaseLoader.load_forecasts.
+--
+-- Prérequis: geohash renseigné sur les anciennes lignes
+--     python -c "from src.etl.load import DatabaseLoader; DatabaseLoader().backfill_geohash()"
+--
+-- Usage: psql "$DATABASE_URL" -f scripts/dedupe_forecasts.sql
+
+BEGIN;
+
+DELETE FROM weather_forecasts
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY geohash, forecast_date
+            ORDER BY created_at DESC, id DESC
+        ) AS issuance_rank
+        FROM weather_forecasts
+    ) ranked
+    WHERE issuance_rank > 1
+);
+
+ALTER TABLE weather_forecasts
+    ADD CONSTRAINT uq_weather_forecasts_geohash_forecast_date UNIQUE (geohash, forecast_date);
+
+COMMIT;
+
+ANALYZE weather_forecasts;
@@ -23,10 +23,10 @@ WHERE NOT EXISTS (SELECT FROM pg_database WHERE datname = 'mlflow');
 
 CREATE EXTENSION IF NOT EXISTS timescaledb;
 
--- Création des tables (gérées par SQLAlchemy dans l'application, mais peut être fait ici)
--- Note: Les tables sont créées par `Base.metadata.create_all(self.engine)` dans `load.py`.
--- Il est donc préférable de laisser l'application gérer le schéma.
--- Si vous préférez gérer le schéma ici, décommentez et adaptez les commandes ci-dessous.
+-- Création des tables: le schéma est géré par les migrations Alembic (`alembic upgrade head`),
+-- qui créent aussi les hypertables, la compression, la rétention et les agrégats continus
+-- (migrations/versions/0002_timescaledb_hypertables.py).
+-- Le bloc ci-dessous est conservé à titre de référence uniquement.
 
 /*
 CREATE TABLE IF NOT EXISTS weather_records (
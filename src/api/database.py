@@ -0,0 +1,65 @@
+"""
+Accès base de données pour l'API
+Les requêtes SQLAlchemy synchrones sont exécutées dans un pool de threads borné
+pour ne jamais bloquer la boucle d'événements des endpoints async
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+
+from src.etl.database import DB_MAX_OVERFLOW, DB_POOL_SIZE, database_url, get_engine, get_session_factory
+from src.etl.load import DatabaseLoader
+
+load_dotenv()
+
+# Moteur et pool partagés avec les DatabaseLoader du processus (création de champs, ETL)
+DATABASE_URL = database_url()
+engine = get_engine(DATABASE_URL)
+SessionLocal = get_session_factory(DATABASE_URL)
+
+# Un thread par connexion disponible: un thread n'attend jamais une connexion libre
+_db_executor = ThreadPoolExecutor(
+    max_workers=DB_POOL_SIZE + DB_MAX_OVERFLOW,
+    thread_name_prefix="db"
+)
+
+
+_loader: Optional[DatabaseLoader] = None
+_loader_lock = threading.Lock()
+
+
+def get_loader() -> DatabaseLoader:
+    """Chargeur du processus (moteur et pool partagés), créé au premier appel"""
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = DatabaseLoader()
+    return _loader
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def run_in_db_thread(func: Callable, *args, **kwargs) -> Any:
+    """
+    Exécute un appel base de données bloquant dans le pool de threads dédié
+
+    Args:
+        func: Fonction synchrone à exécuter
+        *args, **kwargs: Arguments transmis à la fonction
+
+    Returns:
+        Résultat de la fonction
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, partial(func, *args, **kwargs))
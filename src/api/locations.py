@@ -0,0 +1,104 @@
+"""
+Résolution des coordonnées demandées vers la localisation ingérée la plus proche
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from loguru import logger
+
+from src.etl.spatial import LocationIndex
+
+LOCATION_SNAP_RADIUS_KM = float(os.getenv("LOCATION_SNAP_RADIUS_KM", "5"))
+LOCATION_INDEX_TTL_SECONDS = int(os.getenv("LOCATION_INDEX_TTL_SECONDS", "300"))
+LOCATION_INDEX_MIN_REFRESH_SECONDS = int(os.getenv("LOCATION_INDEX_MIN_REFRESH_SECONDS", "30"))
+
+
+class LocationResolver:
+    """
+    Associe une coordonnée à la localisation ingérée la plus proche
+
+    L'index des localisations connues (table weather_locations, tenue à jour
+    par le chargeur) est reconstruit après expiration du TTL, ou plus tôt si
+    une recherche échoue (nouvelle localisation chargée par l'ETL). Un seul
+    thread reconstruit à la fois; les autres continuent avec l'index en place.
+    """
+
+    def __init__(self, radius_km: float = LOCATION_SNAP_RADIUS_KM,
+                 ttl_seconds: int = LOCATION_INDEX_TTL_SECONDS,
+                 min_refresh_seconds: int = LOCATION_INDEX_MIN_REFRESH_SECONDS):
+        self.radius_km = radius_km
+        self.ttl_seconds = ttl_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.index = LocationIndex([])
+        self.refreshed_at: Optional[float] = None
+        self.refreshing = False
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self, db, max_age: float = 0.0) -> bool:
+        """
+        Reconstruit l'index depuis weather_locations si son âge dépasse max_age
+
+        Si une reconstruction est déjà en cours, retourne aussitôt et l'index
+        en place reste utilisé; seul le tout premier chargement est attendu.
+
+        Returns:
+            True si l'index a été reconstruit par cet appel
+        """
+        if not self._refresh_lock.acquire(blocking=self.refreshed_at is None):
+            return False
+        try:
+            # Reconstruit entre-temps par un autre thread
+            if self._age() <= max_age:
+                return False
+            self.refreshing = True
+
+            rows = db.execute(text("SELECT geohash, latitude, longitude FROM weather_locations")).fetchall()
+            index = LocationIndex(dict(row._mapping) for row in rows)
+            self.index, self.refreshed_at = index, time.monotonic()
+        finally:
+            self.refreshing = False
+            self._refresh_lock.release()
+
+        logger.info(f"Index des localisations reconstruit ({len(index)} localisations)")
+        return True
+
+    def _age(self) -> float:
+        return float("inf") if self.refreshed_at is None else time.monotonic() - self.refreshed_at
+
+    def resolve(self, db, latitude: float, longitude: float) -> Optional[Dict]:
+        """
+        Retourne la localisation ingérée la plus proche dans le rayon configuré
+
+        Args:
+            db: Session base de données (utilisée si l'index doit être reconstruit)
+            latitude: Latitude demandée
+            longitude: Longitude demandée
+
+        Returns:
+            Dict latitude / longitude / geohash / distance_km, ou None
+        """
+        if self._age() > self.ttl_seconds:
+            self.refresh(db, max_age=self.ttl_seconds)
+
+        location = self.index.nearest(latitude, longitude, self.radius_km)
+
+        if location is None and self._age() > self.min_refresh_seconds:
+            if self.refresh(db, max_age=self.min_refresh_seconds):
+                location = self.index.nearest(latitude, longitude, self.radius_km)
+
+        return location
+
+
+_resolver: Optional[LocationResolver] = None
+
+
+def get_location_resolver() -> LocationResolver:
+    """Retourne le résolveur de localisations du processus"""
+    global _resolver
+    if _resolver is None:
+        _resolver = LocationResolver()
+    return _resolver
@@ -0,0 +1,202 @@
+"""
+Artefacts Arrow IPC échangés entre les tâches du DAG
+- Une arborescence par run: <ETL_ARTIFACTS_DIR>/<run_id>/<nom>/part-00000.arrow
+- Les tâches ne s'échangent par XCom que le chemin et le nombre de lignes
+- Fichiers IPC non compressés, relus par memory_map: les colonnes Arrow
+  pointent directement dans les pages du fichier, sans décodage
+- Rétention: les runs plus anciens que ETL_ARTIFACTS_RETENTION_HOURS sont supprimés
+"""
+
+import glob
+import json
+import os
+import re
+import shutil
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+from dotenv import load_dotenv
+
+from .spatial import encode_geohash
+
+load_dotenv()
+
+# <racine du dépôt>/data/artifacts, soit le volume ./data monté dans les conteneurs Airflow
+DEFAULT_ARTIFACTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "artifacts"
+)
+
+# Réponses brutes: une ligne par localisation, réponse complète en JSON
+# (les coordonnées restent en colonnes pour sélectionner sans décoder)
+RAW_COLUMNS = ("location_name", "latitude", "longitude", "payload")
+
+
+def artifacts_dir() -> str:
+    return os.getenv("ETL_ARTIFACTS_DIR", DEFAULT_ARTIFACTS_DIR)
+
+
+def run_directory(run_id: str, base_dir: Optional[str] = None) -> str:
+    """
+    Répertoire des artefacts d'un run
+
+    Les run_id Airflow contiennent ':' et '+' (scheduled__2024-01-01T06:00:00+00:00):
+    tout caractère hors [A-Za-z0-9._-] est remplacé par '_'.
+    """
+    return os.path.join(base_dir or artifacts_dir(), re.sub(r"[^A-Za-z0-9._-]", "_", run_id))
+
+
+def write_artifact(frame: pd.DataFrame, run_id: str, name: str, base_dir: Optional[str] = None,
+                   part_rows: Optional[int] = None) -> Dict:
+    """
+    Écrit un DataFrame en Arrow IPC, découpé en fichiers de part_rows lignes
+
+    Les fichiers ne sont pas compressés: plus volumineux qu'en Parquet, ils
+    se relisent sans décodage. Un artefact existant du même nom est
+    remplacé (retry de la tâche).
+
+    Args:
+        frame: Données à écrire
+        run_id: Identifiant du run (dag_run.run_id)
+        name: Nom de l'artefact (ex: 'forecasts')
+        base_dir: Racine des artefacts (défaut: ETL_ARTIFACTS_DIR)
+        part_rows: Lignes par fichier (défaut: ETL_ARTIFACT_PART_ROWS)
+
+    Returns:
+        Dict 'path', 'rows', 'parts', 'bytes' (à transmettre par XCom)
+    """
+    part_rows = part_rows or int(os.getenv("ETL_ARTIFACT_PART_ROWS", "1000000"))
+    path = os.path.join(run_directory(run_id, base_dir), name)
+
+    try:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        parts = 0
+        for parts, start in enumerate(range(0, max(table.num_rows, 1), part_rows), start=1):
+            with pa.OSFile(os.path.join(path, f"part-{parts - 1:05d}.arrow"), "wb") as sink, \
+                    pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table.slice(start, part_rows))
+
+        size = sum(os.path.getsize(part) for part in glob.glob(os.path.join(path, "*.arrow")))
+        logger.info(f"Artefact {name}: {table.num_rows} lignes, {parts} fichier(s), {size / 1e6:.1f} Mo -> {path}")
+        return {"path": path, "rows": table.num_rows, "parts": parts, "bytes": size}
+
+    except Exception as e:
+        logger.error(f"Erreur lors de l'écriture de l'artefact {path}: {e}")
+        raise
+
+
+def read_artifact(path: str, columns: Optional[List[str]] = None,
+                  filters: Optional[List[Tuple]] = None) -> pd.DataFrame:
+    """
+    Lit un artefact écrit par write_artifact
+
+    Les fichiers sont projetés en mémoire (memory_map) et ouverts en IPC:
+    la table Arrow est une vue sans copie des pages du fichier, lues à la
+    demande par le système. Seules les lignes et colonnes retenues sont
+    copiées, par le filtre puis par la conversion en DataFrame.
+
+    Args:
+        path: Chemin renvoyé par write_artifact
+        columns: Colonnes à lire (défaut: toutes)
+        filters: Prédicats [(colonne, opérateur, valeur)], syntaxe pyarrow.parquet
+
+    Returns:
+        DataFrame (types de colonnes conservés)
+    """
+    table = _map_table(path)
+    if filters:
+        table = table.filter(pq.filters_to_expression(filters))
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _map_table(path: str) -> pa.Table:
+    """Table Arrow d'un artefact, vue sur ses fichiers projetés en mémoire"""
+    parts = sorted(glob.glob(os.path.join(path, "part-*.arrow")))
+    if not parts:
+        raise FileNotFoundError(f"Artefact introuvable: {path}")
+
+    # Les buffers gardent le fichier projeté ouvert tant que la table existe
+    tables = [pa.ipc.open_file(pa.memory_map(part)).read_all() for part in parts]
+    return pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+
+
+def write_raw_artifact(raw_data_list: List[Dict], run_id: str, base_dir: Optional[str] = None,
+                       name: str = "raw") -> Dict:
+    """
+    Écrit les données extraites (une ligne par localisation, réponse en JSON)
+
+    Les réponses One Call n'ont pas de schéma fixe ('rain' et 'alerts'
+    optionnels): elles restent en JSON, à côté des colonnes d'identification.
+    """
+    frame = pd.DataFrame({
+        "location_name": [raw_data.get("location_name") for raw_data in raw_data_list],
+        "latitude": [raw_data.get("location", {}).get("latitude") for raw_data in raw_data_list],
+        "longitude": [raw_data.get("location", {}).get("longitude") for raw_data in raw_data_list],
+        "payload": [json.dumps(raw_data, default=str) for raw_data in raw_data_list],
+    }, columns=list(RAW_COLUMNS))
+    return write_artifact(frame, run_id, name, base_dir)
+
+
+def read_raw_artifact(path: str, geohashes: Optional[Iterable[str]] = None) -> List[Dict]:
+    """
+    Données extraites, dans l'ordre d'écriture
+
+    Args:
+        path: Chemin renvoyé par write_raw_artifact
+        geohashes: Localisations à relire (défaut: toutes); la sélection se
+            fait sur les colonnes de coordonnées, seules les réponses
+            retenues sont décodées
+    """
+    table = _map_table(path)
+    if geohashes is not None:
+        geohashes = set(geohashes)
+        keep = [encode_geohash(lat, lon) in geohashes
+                for lat, lon in zip(table.column("latitude").to_numpy(), table.column("longitude").to_numpy())]
+        table = table.filter(pa.array(keep, type=pa.bool_()))
+    return [json.loads(payload) for payload in table.column("payload").to_pylist()]
+
+
+def cleanup_artifacts(retention_hours: Optional[float] = None, base_dir: Optional[str] = None) -> List[str]:
+    """
+    Supprime les runs dont les artefacts n'ont pas été modifiés depuis retention_hours
+
+    Les runs récents restent disponibles pour les retries et le débogage;
+    au-delà, l'espace disque ne dépend que du nombre de runs par période.
+
+    Args:
+        retention_hours: Durée de conservation (défaut: ETL_ARTIFACTS_RETENTION_HOURS)
+        base_dir: Racine des artefacts (défaut: ETL_ARTIFACTS_DIR)
+
+    Returns:
+        Répertoires de runs supprimés
+    """
+    retention_hours = float(os.getenv("ETL_ARTIFACTS_RETENTION_HOURS", "72")) if retention_hours is None \
+        else retention_hours
+    base_dir = base_dir or artifacts_dir()
+    if not os.path.isdir(base_dir):
+        return []
+
+    deadline = time.time() - retention_hours * 3600
+    removed = []
+    for entry in os.scandir(base_dir):
+        if not entry.is_dir():
+            continue
+        modified = max(
+            (os.path.getmtime(os.path.join(root, name)) for root, _, names in os.walk(entry.path) for name in names),
+            default=entry.stat().st_mtime
+        )
+        if modified < deadline:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.path)
+
+    if removed:
+        logger.info(f"{len(removed)} run(s) d'artefacts supprimé(s) (rétention {retention_hours:.0f} h)")
+    return removed
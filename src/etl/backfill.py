@@ -0,0 +1,246 @@
+"""
+Backfill de l'historique météo journalier
+- Partition = (localisation, jour), chargée par upsert sur (geohash, date):
+  relancer un backfill ne duplique rien
+- Reprise: les partitions déjà présentes dans weather_history sont ignorées
+- Jours traités par fenêtres de ETL_BACKFILL_DAYS_PER_BATCH; dans une fenêtre,
+  les couples (jour, cellule de grille) sont extraits en parallèle et la
+  fenêtre est chargée en une transaction (une interruption ne perd au plus
+  qu'une fenêtre)
+- Sources: OpenWeather One Call day_summary (mock via USE_MOCK_DATA), ou
+  fichier local CSV/Parquet
+
+Usage:
+    python -m src.etl.backfill --start 2021-01-01 --end 2023-12-31
+    python -m src.etl.backfill --start 2021-01-01 --end 2021-12-31 --source data/raw/historique.csv
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from loguru import logger
+from dotenv import load_dotenv
+
+from .extract import WeatherDataExtractor, group_locations
+from .load import DatabaseLoader
+from .quota import QuotaExceededError
+from .spatial import GRID_CELL_DEGREES, encode_geohash, grid_cell
+
+load_dotenv()
+
+# Mesures journalières de weather_history
+HISTORY_MEASURES = ("temp_min", "temp_max", "temp_mean", "humidity", "pressure", "wind_speed", "clouds", "rain_mm")
+
+
+def day_summary_to_row(payload: Dict) -> Dict:
+    """
+    Mesures journalières d'une réponse /onecall/day_summary
+
+    temp_mean est la moyenne des quatre moments de la journée
+    (matin, après-midi, soir, nuit).
+    """
+    temperature = payload.get("temperature", {})
+    moments = [temperature.get(moment) for moment in ("morning", "afternoon", "evening", "night")]
+    moments = [value for value in moments if value is not None]
+
+    return {
+        "temp_min": temperature.get("min"),
+        "temp_max": temperature.get("max"),
+        "temp_mean": sum(moments) / len(moments) if moments else None,
+        "humidity": payload.get("humidity", {}).get("afternoon"),
+        "pressure": payload.get("pressure", {}).get("afternoon"),
+        "wind_speed": payload.get("wind", {}).get("max", {}).get("speed"),
+        "clouds": payload.get("cloud_cover", {}).get("afternoon"),
+        "rain_mm": payload.get("precipitation", {}).get("total", 0.0),
+    }
+
+
+class DaySummarySource:
+    """Historique depuis l'endpoint One Call day_summary (un appel par cellule et par jour)"""
+
+    name = "day_summary"
+
+    def __init__(self, extractor: Optional[WeatherDataExtractor] = None):
+        self.extractor = extractor or WeatherDataExtractor()
+        self.max_workers = self.extractor.max_workers
+
+    def fetch(self, latitude: float, longitude: float, day: date) -> Optional[Dict]:
+        return day_summary_to_row(self.extractor.get_day_summary(latitude, longitude, day))
+
+
+class FileHistorySource:
+    """
+    Historique depuis un fichier local CSV ou Parquet
+
+    Colonnes attendues: 'date', 'latitude', 'longitude' et tout ou partie de
+    HISTORY_MEASURES. Une ligne sert toutes les localisations de sa cellule
+    de grille, comme un appel day_summary.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str, cell_degrees: Optional[float] = None):
+        self.path = path
+        self.cell_degrees = GRID_CELL_DEGREES if cell_degrees is None else cell_degrees
+        self.max_workers = 1
+
+        frame = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+        missing = {"date", "latitude", "longitude"} - set(frame.columns)
+        if missing:
+            raise ValueError(f"Colonnes manquantes dans {path}: {sorted(missing)}")
+
+        measures = [name for name in HISTORY_MEASURES if name in frame.columns]
+        days = pd.to_datetime(frame["date"]).dt.date
+        self.rows: Dict[Tuple, Dict] = {
+            (self._cell(latitude, longitude), day): dict(zip(measures, values))
+            for latitude, longitude, day, *values in zip(
+                frame["latitude"], frame["longitude"], days, *(frame[name] for name in measures)
+            )
+        }
+        logger.info(f"Historique local: {len(self.rows)} journées lues depuis {path}")
+
+    def _cell(self, latitude: float, longitude: float):
+        if not self.cell_degrees:
+            return round(latitude, 4), round(longitude, 4)
+        return grid_cell(latitude, longitude, self.cell_degrees)
+
+    def fetch(self, latitude: float, longitude: float, day: date) -> Optional[Dict]:
+        return self.rows.get((self._cell(latitude, longitude), day))
+
+
+def date_range(start: date, end: date) -> List[date]:
+    """Jours de start à end inclus"""
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def run_backfill(locations: List[Dict], start: date, end: date, source=None,
+                 days_per_batch: Optional[int] = None, max_workers: Optional[int] = None,
+                 loader: Optional[DatabaseLoader] = None) -> Dict:
+    """
+    Charge l'historique journalier d'un ensemble de localisations
+
+    Args:
+        locations: Dicts avec 'lat', 'lon' (et éventuellement 'name')
+        start: Premier jour
+        end: Dernier jour (inclus)
+        source: DaySummarySource (défaut) ou FileHistorySource
+        days_per_batch: Jours par fenêtre chargée (défaut: ETL_BACKFILL_DAYS_PER_BATCH)
+        max_workers: Extractions simultanées (défaut: celles de la source)
+        loader: Chargeur (défaut: nouveau chargeur)
+
+    Returns:
+        Rapport: partitions demandées, déjà présentes, chargées, en échec, appels
+    """
+    source = source or DaySummarySource()
+    loader = loader or DatabaseLoader()
+    days_per_batch = days_per_batch or int(os.getenv("ETL_BACKFILL_DAYS_PER_BATCH", "31"))
+    max_workers = max_workers or source.max_workers
+
+    days = date_range(start, end)
+    geohashes = [encode_geohash(location["lat"], location["lon"]) for location in locations]
+    done = loader.get_history_partitions(pd.Timestamp(start), pd.Timestamp(end))
+    groups = group_locations(locations)
+
+    report = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "source": source.name,
+        "locations": len(locations),
+        "partitions": len(days) * len(set(geohashes)),
+        "already_loaded": len(done & {(geohash, day) for geohash in set(geohashes) for day in days}),
+        "loaded": 0,
+        "failed": 0,
+        "calls": 0,
+        "stopped_on_quota": False,
+    }
+    started_at = time.perf_counter()
+    logger.info(
+        f"Backfill {start} -> {end}: {report['partitions']} partitions, "
+        f"{report['already_loaded']} déjà chargées ({source.name})"
+    )
+
+    def _fetch(task):
+        day, cell = task
+        try:
+            return source.fetch(cell[0], cell[1], day)
+        except QuotaExceededError:
+            report["stopped_on_quota"] = True
+            return None
+        except Exception as e:
+            logger.error(f"Historique du {day} indisponible pour {cell}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backfill") as executor:
+        for offset in range(0, len(days), days_per_batch):
+            window = days[offset:offset + days_per_batch]
+
+            # Une extraction par (jour, cellule) ayant au moins une localisation manquante
+            tasks = {}
+            for day in window:
+                for cell, members in groups.items():
+                    pending = [index for index in members if (geohashes[index], day) not in done]
+                    if pending:
+                        tasks[(day, cell)] = pending
+            if not tasks:
+                continue
+
+            rows = []
+            for (day, cell), values in zip(tasks, executor.map(_fetch, tasks)):
+                report["calls"] += 1
+                if values is None:
+                    report["failed"] += len({geohashes[index] for index in tasks[(day, cell)]})
+                    continue
+                for index in tasks[(day, cell)]:
+                    rows.append({
+                        "date": pd.Timestamp(day),
+                        "latitude": locations[index]["lat"],
+                        "longitude": locations[index]["lon"],
+                        **values,
+                        "source": source.name,
+                    })
+                    done.add((geohashes[index], day))
+
+            if rows:
+                report["loaded"] += loader.load_history(pd.DataFrame(rows))
+            logger.info(f"Backfill {window[0]} -> {window[-1]}: {len(rows)} journées chargées")
+
+            if report["stopped_on_quota"]:
+                logger.warning("Budget API épuisé: backfill interrompu, relancer pour reprendre")
+                break
+
+    report["seconds"] = round(time.perf_counter() - started_at, 3)
+    logger.info(
+        f"Backfill terminé: {report['loaded']} partitions chargées, {report['already_loaded']} ignorées, "
+        f"{report['failed']} en échec, {report['calls']} extractions en {report['seconds']}s"
+    )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de l'historique météo journalier")
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True)
+    parser.add_argument("--source", help="Fichier CSV/Parquet local (défaut: One Call day_summary)")
+    parser.add_argument("--location", action="append", metavar="LAT,LON",
+                        help="Localisation (répétable; défaut: champs agricoles)")
+    parser.add_argument("--days-per-batch", type=int)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    loader = DatabaseLoader()
+    if args.location:
+        locations = [dict(zip(("lat", "lon"), map(float, value.split(",")))) for value in args.location]
+    else:
+        locations = list(loader.iter_field_locations())
+
+    source = FileHistorySource(args.source) if args.source else DaySummarySource()
+    report = run_backfill(locations, args.start, args.end, source, args.days_per_batch, args.workers, loader)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
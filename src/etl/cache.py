@@ -0,0 +1,326 @@
+"""
+Cache des prévisions météo
+- Backend en mémoire: LRU borné avec expiration (TTL)
+- Backend Redis optionnel, partagé entre l'API et l'ETL Airflow
+
+Les clés sont construites par geohash (clé de localisation des tables) et
+horizon; chaque backend tient l'ensemble des clés d'un geohash, si bien que
+l'ETL invalide une localisation sans parcourir le cache lorsqu'il y écrit de
+nouvelles prévisions. Cette invalidation n'atteint l'API que si le cache est
+partagé (Redis): l'ETL Airflow refuse de démarrer avec un cache en mémoire
+(require_shared_cache).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from loguru import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+FORECAST_PREFIX = "forecast:"
+
+
+def forecast_cache_key(geohash: str, days: int, start_date) -> str:
+    """
+    Construit la clé de cache d'une requête de prévisions
+
+    Args:
+        geohash: Geohash de la localisation ingérée
+        days: Horizon en jours
+        start_date: Premier jour de la période
+
+    Returns:
+        Clé 'forecast:<geohash>:<date>:<jours>'
+    """
+    return f"{FORECAST_PREFIX}{geohash}:{start_date}:{days}"
+
+
+def _key_geohash(key: str) -> Optional[str]:
+    """Geohash d'une clé de prévisions, None pour une autre clé"""
+    if not key.startswith(FORECAST_PREFIX):
+        return None
+    return key[len(FORECAST_PREFIX):].split(":", 1)[0]
+
+
+class TTLCache:
+    """Cache LRU en mémoire avec expiration et nombre d'entrées borné (propre au processus)"""
+
+    backend = "memory"
+    shared = False
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        # Clés en cache par geohash, pour l'invalidation d'une localisation
+        self._keys_by_geohash: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retourne la valeur en cache ou None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._discard(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Valeurs en cache (ou None) dans l'ordre des clés"""
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: Any):
+        """Stocke une valeur, en évinçant l'entrée la moins récemment utilisée si plein"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            geohash = _key_geohash(key)
+            if geohash is not None:
+                self._keys_by_geohash.setdefault(geohash, set()).add(key)
+            while len(self._data) > self.max_entries:
+                self._discard(next(iter(self._data)))
+                self.evictions += 1
+
+    def set_many(self, values: Dict[str, Any]):
+        for key, value in values.items():
+            self.set(key, value)
+
+    def delete_geohashes(self, geohashes: Iterable[str]) -> int:
+        """Supprime toutes les clés des localisations données"""
+        removed = 0
+        with self._lock:
+            for geohash in geohashes:
+                for key in self._keys_by_geohash.pop(geohash, ()):
+                    if self._data.pop(key, None) is not None:
+                        removed += 1
+        return removed
+
+    def _discard(self, key: str):
+        del self._data[key]
+        keys = self._keys_by_geohash.get(_key_geohash(key))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_geohash[_key_geohash(key)]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._keys_by_geohash.clear()
+
+    def stats(self) -> Dict:
+        """Compteurs du cache"""
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisCache:
+    """
+    Cache Redis (expiration native, éviction selon maxmemory-policy du serveur)
+
+    Les valeurs sont sérialisées en JSON; une erreur Redis est traitée comme
+    un défaut de cache pour ne jamais faire échouer une requête. Chaque
+    geohash a un ensemble 'forecast-keys:<geohash>' de ses clés: lectures et
+    écritures d'un lot en un aller-retour (MGET, pipeline), invalidation
+    sans SCAN.
+    """
+
+    backend = "redis"
+    shared = True
+
+    def __init__(self, ttl_seconds: int = 3600, url: Optional[str] = None):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("CACHE_BACKEND=redis nécessite le paquet 'redis'") from e
+
+        if url is None:
+            url = os.getenv("REDIS_URL")
+        if url:
+            self.client = redis.Redis.from_url(url)
+        else:
+            self.client = redis.Redis(
+                host=os.getenv("REDIS_HOST", "localhost"),
+                port=int(os.getenv("REDIS_PORT", "6379")),
+                password=os.getenv("REDIS_PASSWORD") or None,
+            )
+
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Valeurs en cache (ou None) dans l'ordre des clés, en un seul MGET"""
+        if not keys:
+            return []
+        try:
+            raws = self.client.mget(keys)
+        except Exception as e:
+            logger.warning(f"Cache Redis indisponible: {e}")
+            self.errors += 1
+            raws = [None] * len(keys)
+
+        values = [None if raw is None else json.loads(raw) for raw in raws]
+        hits = sum(value is not None for value in values)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return values
+
+    def set(self, key: str, value: Any):
+        self.set_many({key: value})
+
+    def set_many(self, values: Dict[str, Any]):
+        """Écrit les valeurs et les ensembles de clés par geohash en un pipeline"""
+        if not values:
+            return
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for key, value in values.items():
+                pipeline.set(key, json.dumps(value, default=_json_default), ex=self.ttl_seconds)
+                geohash = _key_geohash(key)
+                if geohash is not None:
+                    pipeline.sadd(_geohash_keys(geohash), key)
+                    pipeline.expire(_geohash_keys(geohash), self.ttl_seconds)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Écriture cache Redis impossible: {e}")
+            self.errors += 1
+
+    def delete_geohashes(self, geohashes: Iterable[str]) -> int:
+        """Supprime les clés des localisations données (ensembles lus puis vidés, sans SCAN)"""
+        index_keys = [_geohash_keys(geohash) for geohash in geohashes]
+        if not index_keys:
+            return 0
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for index_key in index_keys:
+                pipeline.smembers(index_key)
+            keys = set().union(*pipeline.execute())
+            removed = self.client.delete(*keys) if keys else 0
+            self.client.delete(*index_keys)
+            return removed
+        except Exception as e:
+            logger.warning(f"Invalidation cache Redis impossible: {e}")
+            self.errors += 1
+            return 0
+
+    def clear(self):
+        for pattern in (f"{FORECAST_PREFIX}*", _geohash_keys("*")):
+            keys = list(self.client.scan_iter(match=pattern, count=500))
+            if keys:
+                self.client.delete(*keys)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "errors": self.errors,
+        }
+
+
+def _geohash_keys(geohash: str) -> str:
+    """Ensemble Redis des clés en cache d'un geohash"""
+    return f"forecast-keys:{geohash}"
+
+
+def _json_default(value):
+    """Sérialise les dates en ISO 8601"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+_cache = None
+
+
+def get_cache():
+    """
+    Retourne le cache du processus selon CACHE_BACKEND (memory ou redis)
+    """
+    global _cache
+    if _cache is None:
+        backend = os.getenv("CACHE_BACKEND", "memory").lower()
+        ttl_seconds = int(os.getenv("CACHE_TTL_SECONDS", "3600"))
+
+        if backend == "redis":
+            _cache = RedisCache(ttl_seconds=ttl_seconds)
+        else:
+            _cache = TTLCache(
+                max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "10000")),
+                ttl_seconds=ttl_seconds
+            )
+        logger.info(f"Cache des prévisions: {_cache.backend} (TTL {ttl_seconds}s)")
+
+    return _cache
+
+
+def require_shared_cache():
+    """
+    Vérifie que le cache est partagé avec l'API, avant un chargement hors du processus de l'API
+
+    Raises:
+        RuntimeError: si le cache est propre au processus (CACHE_BACKEND=memory): l'API
+            servirait les anciennes prévisions jusqu'à expiration (CACHE_TTL_SECONDS)
+    """
+    cache = get_cache()
+    if not cache.shared:
+        raise RuntimeError(
+            f"Cache des prévisions '{cache.backend}' propre au processus: l'invalidation au chargement "
+            f"n'atteindrait pas l'API. Configurer CACHE_BACKEND=redis pour l'API et l'ETL"
+        )
+
+
+def invalidate_locations(geohashes: Iterable[str]) -> int:
+    """
+    Invalide toutes les entrées en cache des localisations données
+
+    Args:
+        geohashes: Geohashes des localisations dont les prévisions ont changé
+
+    Returns:
+        Nombre de clés supprimées
+    """
+    geohashes = list(geohashes)
+    if not geohashes:
+        return 0
+    removed = get_cache().delete_geohashes(geohashes)
+    logger.info(f"{removed} entrées de cache invalidées pour {len(geohashes)} localisations")
+    return removed
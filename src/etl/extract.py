@@ -6,28 +6,104 @@ Module d'extraction des données depuis les APIs externes
 """
 
 import os
+import threading
 import requests
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timezone
 import pandas as pd
-import random
+from requests.adapters import HTTPAdapter
+from tenacity import RetryCallState, Retrying, retry_if_exception, stop_after_attempt, wait_exponential
 from loguru import logger
 from dotenv import load_dotenv
 
+from .http_cache import ResponseCache, get_response_cache
+from .quota import QuotaExceededError, RequestBudget, get_request_budget
+from .spatial import GRID_CELL_DEGREES, grid_cell, grid_cell_center
+from .synthetic import day_summary_payload, onecall_payload
+
 load_dotenv()
 
+# Arrondi des coordonnées pour dédupliquer les appels d'un run (≈ 11 m)
+COORDINATE_PRECISION = 4
+
+# Codes HTTP transitoires: nouvelle tentative avec backoff exponentiel
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Codes pour lesquels l'en-tête Retry-After remplace le backoff (plafonné, secondes)
+RETRY_AFTER_STATUS_CODES = {429, 503}
+RETRY_AFTER_MAX_SECONDS = float(os.getenv("OPENWEATHER_RETRY_AFTER_MAX_SECONDS", "60"))
+
+_backoff = wait_exponential(multiplier=0.5, max=30)
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Erreur réseau, timeout ou réponse HTTP transitoire"""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Délai demandé par l'en-tête Retry-After (secondes ou date HTTP), None sinon"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _wait_before_retry(retry_state: RetryCallState) -> float:
+    """Retry-After sur 429 / 503 lorsqu'il est fourni, backoff exponentiel sinon"""
+    error = retry_state.outcome.exception()
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None \
+            and error.response.status_code in RETRY_AFTER_STATUS_CODES:
+        delay = _retry_after_seconds(error.response)
+        if delay is not None:
+            return min(delay, RETRY_AFTER_MAX_SECONDS)
+    return _backoff(retry_state)
+
 
 class WeatherDataExtractor:
-    """Extracteur de données météorologiques depuis OpenWeather API"""
+    """
+    Extracteur de données météorologiques depuis OpenWeather API
 
-    def __init__(self):
+    Les appels partagent une session HTTP (connexions keep-alive réutilisées,
+    pool dimensionné sur la concurrence), avec timeout par requête et
+    nouvelles tentatives avec backoff exponentiel. Les réponses sont servies
+    par le cache disque quand il les contient; chaque appel réel consomme le
+    budget de requêtes partagé (quota.py).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, budget: Optional[RequestBudget] = None,
+                 response_cache: Optional[ResponseCache] = None):
         self.api_key = os.getenv("OPENWEATHER_API_KEY")
         self.base_url = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/3.0")
         self.use_mock = os.getenv("USE_MOCK_DATA", "False").lower() == "true"
+        self.timeout = float(os.getenv("OPENWEATHER_TIMEOUT_SECONDS", "10"))
+        self.max_retries = int(os.getenv("OPENWEATHER_MAX_RETRIES", "3"))
+        self.max_workers = max_workers or int(os.getenv("EXTRACT_MAX_WORKERS", "16"))
+        self.budget = budget or get_request_budget()
 
         if not self.api_key and not self.use_mock:
             raise ValueError("OPENWEATHER_API_KEY n'est pas définie dans .env")
 
+        if response_cache is None and not self.use_mock:
+            response_cache = get_response_cache()
+        self.response_cache = response_cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
     def _generate_mock_weather_data(self, latitude: float, longitude: float) -> Dict:
         """
         Génère des données météo simulées réalistes pour le développement
@@ -37,55 +113,10 @@ class WeatherDataExtractor:
             longitude: Longitude
 
         Returns:
-            Dict avec structure identique à OpenWeather API
+            Dict avec structure identique à OpenWeather API (déterministe par
+            coordonnée et par jour, voir src/etl/synthetic.py)
         """
-        now = datetime.now()
-
-        # Données actuelles simulées (climat tropical africain)
-        current = {
-            "dt": int(now.timestamp()),
-            "temp": random.uniform(25, 35),  # Températures typiques Afrique
-            "feels_like": random.uniform(26, 37),
-            "humidity": random.randint(40, 85),
-            "pressure": random.randint(1010, 1020),
-            "wind_speed": random.uniform(2, 8),
-            "clouds": random.randint(10, 90),
-            "uvi": random.uniform(6, 12),
-            "weather": [{"description": random.choice([
-                "clear sky", "few clouds", "scattered clouds",
-                "light rain", "moderate rain", "partly cloudy"
-            ])}]
-        }
-
-        # Prévisions 7 jours simulées
-        daily = []
-        for day in range(7):
-            forecast_date = now + timedelta(days=day)
-            temp_base = random.uniform(24, 34)
-
-            daily_forecast = {
-                "dt": int(forecast_date.timestamp()),
-                "temp": {
-                    "min": temp_base - random.uniform(3, 6),
-                    "max": temp_base + random.uniform(2, 5),
-                    "day": temp_base
-                },
-                "humidity": random.randint(45, 80),
-                "pressure": random.randint(1010, 1020),
-                "wind_speed": random.uniform(2, 10),
-                "clouds": random.randint(10, 90),
-                "rain": random.uniform(0, 15) if random.random() > 0.4 else 0,
-                "pop": random.uniform(0.1, 0.9),
-                "uvi": random.uniform(6, 11)
-            }
-            daily.append(daily_forecast)
-
-        mock_data = {
-            "lat": latitude,
-            "lon": longitude,
-            "current": current,
-            "daily": daily
-        }
+        mock_data = onecall_payload(latitude, longitude)
 
         logger.info(f"Données MOCK générées pour ({latitude}, {longitude})")
         return mock_data
@@ -115,10 +146,7 @@ class WeatherDataExtractor:
                 "exclude": "minutely,alerts"
             }
 
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-
-            data = response.json()
+            data = self._request(url, params)
             logger.info(f"Données météo récupérées pour ({latitude}, {longitude})")
 
             return data
@@ -127,7 +155,47 @@ class WeatherDataExtractor:
             logger.error(f"Erreur lors de la récupération des données météo: {e}")
             raise
 
-    def get_forecast(self, latitude: float, longitude: float, days: int = 7) -> List[Dict]:
+    def _request(self, url: str, params: Dict) -> Dict:
+        """GET via le cache disque, sinon la session partagée (timeout, nouvelles tentatives)"""
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.make_key(url, params)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        data = self._fetch(url, params)
+
+        if cache_key is not None:
+            self.response_cache.set(cache_key, url, data)
+
+        return data
+
+    def _fetch(self, url: str, params: Dict) -> Dict:
+        """
+        GET via la session partagée, avec timeout et nouvelles tentatives
+
+        Jusqu'à max_retries nouvelles tentatives après le premier appel, en
+        respectant Retry-After sur 429 / 503. Chaque tentative, y compris les
+        nouvelles, consomme une requête du budget: le fournisseur les compte
+        toutes dans le quota.
+        """
+        retrying = Retrying(
+            retry=retry_if_exception(_is_retryable),
+            stop=stop_after_attempt(self.max_retries + 1),
+            wait=_wait_before_retry,
+            reraise=True
+        )
+
+        for attempt in retrying:
+            with attempt:
+                self.budget.acquire()
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                return response.json()
+
+    def get_forecast(self, latitude: float, longitude: float, days: int = 7,
+                     data: Optional[Dict] = None) -> List[Dict]:
         """
         Récupère les prévisions météo pour les prochains jours
 
@@ -135,12 +203,14 @@ class WeatherDataExtractor:
             latitude: Latitude du champ agricole
             longitude: Longitude du champ agricole
             days: Nombre de jours de prévision
+            data: Réponse One Call déjà récupérée (évite un second appel)
 
         Returns:
             Liste des prévisions journalières
         """
         try:
-            data = self.get_current_weather(latitude, longitude)
+            if data is None:
+                data = self.get_current_weather(latitude, longitude)
             forecasts = data.get("daily", [])[:days]
 
             logger.info(f"Prévisions {days} jours récupérées pour ({latitude}, {longitude})")
@@ -151,6 +221,48 @@ class WeatherDataExtractor:
             logger.error(f"Erreur lors de la récupération des prévisions: {e}")
             raise
 
+    def get_day_summary(self, latitude: float, longitude: float, day: date) -> Dict:
+        """
+        Récupère les agrégats météo d'un jour passé (One Call day_summary)
+
+        Args:
+            latitude: Latitude
+            longitude: Longitude
+            day: Jour demandé
+
+        Returns:
+            Dict au format /onecall/day_summary (temperature, humidity, precipitation...)
+        """
+        if self.use_mock:
+            return day_summary_payload(latitude, longitude, day)
+
+        try:
+            params = {
+                "lat": latitude,
+                "lon": longitude,
+                "date": day.isoformat(),
+                "appid": self.api_key,
+                "units": "metric",
+            }
+            return self._request(f"{self.base_url}/onecall/day_summary", params)
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Erreur lors de la récupération de l'historique du {day}: {e}")
+            raise
+
+
+_weather_extractor: Optional[WeatherDataExtractor] = None
+_weather_extractor_lock = threading.Lock()
+
+
+def get_weather_extractor() -> WeatherDataExtractor:
+    """Extracteur du processus (session HTTP et budget partagés), créé au premier appel"""
+    global _weather_extractor
+    with _weather_extractor_lock:
+        if _weather_extractor is None:
+            _weather_extractor = WeatherDataExtractor()
+    return _weather_extractor
+
 
 class AgriculturalDataExtractor:
     """Extracteur de données agricoles depuis FAO et Copernicus"""
@@ -189,26 +301,34 @@ class AgriculturalDataExtractor:
             raise
 
 
-def extract_all_data(latitude: float, longitude: float) -> Dict:
+def extract_all_data(latitude: float, longitude: float,
+                     weather_extractor: Optional[WeatherDataExtractor] = None,
+                     agricultural_data: Optional[Dict] = None) -> Dict:
     """
     Fonction principale pour extraire toutes les données nécessaires
 
     Args:
         latitude: Latitude du champ
         longitude: Longitude du champ
+        weather_extractor: Extracteur partagé (sa session HTTP est réutilisée)
+        agricultural_data: Données agricoles déjà extraites pour le run
 
     Returns:
         Dict contenant toutes les données extraites
     """
-    weather_extractor = WeatherDataExtractor()
-    agri_extractor = AgriculturalDataExtractor()
+    weather_extractor = weather_extractor or WeatherDataExtractor()
+    if agricultural_data is None:
+        agricultural_data = AgriculturalDataExtractor().get_crop_data().to_dict()
+
+    # Une seule réponse One Call contient la météo actuelle et les prévisions
+    weather = weather_extractor.get_current_weather(latitude, longitude)
 
     data = {
         "timestamp": datetime.now().isoformat(),
         "location": {"latitude": latitude, "longitude": longitude},
-        "weather": weather_extractor.get_current_weather(latitude, longitude),
-        "forecast": weather_extractor.get_forecast(latitude, longitude),
-        "agricultural_data": agri_extractor.get_crop_data().to_dict()
+        "weather": weather,
+        "forecast": weather_extractor.get_forecast(latitude, longitude, data=weather),
+        "agricultural_data": agricultural_data
     }
 
     logger.info("Extraction complète des données réussie")
@@ -216,6 +336,115 @@ def extract_all_data(latitude: float, longitude: float) -> Dict:
     return data
 
 
+def group_locations(locations: List[Dict], cell_degrees: Optional[float] = None) -> Dict[Tuple[float, float], List[int]]:
+    """
+    Regroupe les localisations qui partagent un même appel API
+
+    Args:
+        locations: Dicts avec 'lat' et 'lon'
+        cell_degrees: Côté des cellules de la grille (défaut: GRID_CELL_DEGREES;
+            0 = regroupement des seules coordonnées arrondies identiques)
+
+    Returns:
+        Coordonnée à interroger (centre de cellule) -> indices des localisations membres
+    """
+    cell_degrees = GRID_CELL_DEGREES if cell_degrees is None else cell_degrees
+    groups: Dict[Tuple[float, float], List[int]] = {}
+
+    for index, location in enumerate(locations):
+        if cell_degrees > 0:
+            latitude, longitude = grid_cell_center(grid_cell(location["lat"], location["lon"], cell_degrees), cell_degrees)
+        else:
+            latitude, longitude = location["lat"], location["lon"]
+        key = (round(latitude, COORDINATE_PRECISION), round(longitude, COORDINATE_PRECISION))
+        groups.setdefault(key, []).append(index)
+
+    return groups
+
+
+def extract_many(locations: List[Dict], max_workers: Optional[int] = None,
+                 budget: Optional[RequestBudget] = None, cell_degrees: Optional[float] = None) -> List[Dict]:
+    """
+    Extrait les données de plusieurs localisations en parallèle
+
+    Un seul extracteur (et donc un seul pool de connexions) est partagé par
+    les threads; le débit est borné par max_workers et par le budget de
+    requêtes plutôt que par la latence de chaque appel.
+
+    - un seul appel par cellule de grille, au centre de la cellule; le
+      résultat est recopié pour chaque localisation membre, avec ses propres
+      coordonnées pour la transformation et le chargement
+    - les cellules de plus haute 'priority' sont extraites en premier, et
+      restent servies si le budget journalier s'épuise en cours de run
+
+    Args:
+        locations: Dicts avec 'lat', 'lon' et éventuellement 'name', 'priority'
+        max_workers: Appels simultanés (défaut: EXTRACT_MAX_WORKERS)
+        budget: Budget de requêtes (défaut: budget du processus)
+        cell_degrees: Côté des cellules de la grille (défaut: GRID_CELL_DEGREES)
+
+    Returns:
+        Données extraites des localisations réussies, dans l'ordre d'entrée
+        (avec 'location_name' et 'grid_cell')
+    """
+    weather_extractor = WeatherDataExtractor(max_workers=max_workers, budget=budget)
+    budget = weather_extractor.budget
+    agricultural_data = AgriculturalDataExtractor().get_crop_data().to_dict()
+    calls_before = budget.calls
+
+    # Une extraction par cellule, par priorité décroissante
+    groups = group_locations(locations, cell_degrees)
+    priorities = {
+        key: max(locations[index].get("priority", 0) for index in members)
+        for key, members in groups.items()
+    }
+    cells = sorted(groups, key=lambda key: -priorities[key])
+    budget.record_deduplicated(len(locations) - len(cells))
+
+    skipped = []
+
+    def _extract(key) -> Optional[Dict]:
+        try:
+            return extract_all_data(key[0], key[1], weather_extractor, agricultural_data)
+        except QuotaExceededError:
+            skipped.append(key)
+            return None
+        except Exception as e:
+            logger.error(f"Extraction impossible pour {key}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=weather_extractor.max_workers, thread_name_prefix="extract") as executor:
+        extracted_by_cell = dict(zip(cells, executor.map(_extract, cells)))
+
+    members_data: Dict[int, Dict] = {}
+    for key, members in groups.items():
+        data = extracted_by_cell[key]
+        if data is None:
+            continue
+        for index in members:
+            location = locations[index]
+            members_data[index] = {
+                **data,
+                "location": {"latitude": location["lat"], "longitude": location["lon"]},
+                "location_name": location.get("name"),
+                "grid_cell": {"latitude": key[0], "longitude": key[1]},
+            }
+    extracted = [members_data[index] for index in sorted(members_data)]
+
+    failed = len(locations) - len(extracted)
+    reduction = 1 - len(cells) / len(locations) if locations else 0.0
+    logger.info(
+        f"Extraction de {len(extracted)}/{len(locations)} localisations ({failed} échecs, "
+        f"{len(skipped)} cellules hors budget) - {len(cells)} cellules, réduction des appels {reduction:.1%}, "
+        f"{budget.calls - calls_before} appels API, {budget.remaining_today()} restants aujourd'hui"
+    )
+
+    if locations and not extracted:
+        raise RuntimeError("Aucune localisation n'a pu être extraite")
+
+    return extracted
+
+
 if __name__ == "__main__":
     # Exemple: Dakar, Sénégal
     DAKAR_LAT = 14.7167
@@ -0,0 +1,221 @@
+"""
+Cache disque des réponses HTTP des extracteurs (SQLite)
+- Clé adressée par contenu: endpoint, paramètres (coordonnées arrondies,
+  sans clé d'API) et tranche de temps
+- Expiration (TTL), taille bornée avec éviction LRU (total tenu à jour
+  à chaque écriture, sans parcours de la table), statistiques
+- Partagé entre les retries Airflow et les appels répétés de l'API ML
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from loguru import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Paramètres exclus de la clé (secrets sans effet sur la réponse)
+EXCLUDED_PARAMS = {"appid", "api_key", "token"}
+
+
+class ResponseCache:
+    """Cache de réponses JSON persistant sur disque, borné en taille (LRU)"""
+
+    def __init__(self, path: str, ttl_seconds: int = 3600, max_bytes: int = 256 * 1024 * 1024,
+                 coordinate_precision: int = 4):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.coordinate_precision = coordinate_precision
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS ix_responses_expires_at ON responses (expires_at)")
+        # Taille totale tenue à jour dans la transaction de chaque écriture (partagée entre processus);
+        # calculée une seule fois pour un fichier créé avant cette table
+        self._connection.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._connection.execute(
+            "INSERT OR IGNORE INTO cache_meta (name, value) "
+            "SELECT 'size', COALESCE(SUM(size), 0) FROM responses"
+        )
+
+    def make_key(self, endpoint: str, params: Dict, now: Optional[float] = None) -> str:
+        """
+        Clé de cache d'un appel
+
+        Args:
+            endpoint: URL appelée
+            params: Paramètres de la requête
+            now: Horodatage (défaut: maintenant)
+
+        Returns:
+            Empreinte SHA-256 de l'endpoint, des paramètres normalisés et de
+            la tranche de temps de largeur ttl_seconds
+        """
+        normalized = {}
+        for name, value in params.items():
+            if name in EXCLUDED_PARAMS:
+                continue
+            if name in ("lat", "lon") and value is not None:
+                value = round(float(value), self.coordinate_precision)
+            normalized[name] = value
+
+        bucket = int((now or time.time()) // max(self.ttl_seconds, 1))
+        content = json.dumps([endpoint, normalized, bucket], sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retourne la réponse en cache ou None (absente ou expirée)"""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, expires_at, size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] < now:
+                if row is not None:
+                    with self._transaction():
+                        deleted = self._connection.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount
+                        self._add_size(-row[2] if deleted else 0)
+                self.misses += 1
+                return None
+
+            self._connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, endpoint: str, value: Any):
+        """Stocke une réponse puis évince les moins récemment lues au-delà de max_bytes"""
+        body = json.dumps(value)
+        now = time.time()
+        with self._lock, self._transaction():
+            previous = self._connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, body, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, body, len(body), now + self.ttl_seconds, now)
+            )
+            total = self._add_size(len(body) - (previous[0] if previous else 0))
+            if total > self.max_bytes:
+                self._evict(now, total)
+
+    @contextmanager
+    def _transaction(self):
+        """Transaction d'écriture: réponses et taille totale changent ensemble"""
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def _add_size(self, delta: int) -> int:
+        """Ajoute delta à la taille totale et la retourne"""
+        if delta:
+            self._connection.execute("UPDATE cache_meta SET value = value + ? WHERE name = 'size'", (delta,))
+        return self._connection.execute("SELECT value FROM cache_meta WHERE name = 'size'").fetchone()[0]
+
+    def _evict(self, now: float, total: int):
+        """Au-delà de max_bytes: supprime les réponses expirées, puis les moins récemment lues"""
+        expired = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses WHERE expires_at < ?", (now,)
+        ).fetchone()[0]
+        if expired:
+            self._connection.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            total = self._add_size(-expired)
+        if total <= self.max_bytes:
+            return
+
+        freed = 0
+        keys = []
+        for key, size in self._connection.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC"):
+            keys.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", keys)
+        self._add_size(-freed)
+        self.evictions += len(keys)
+
+    def clear(self):
+        with self._lock, self._transaction():
+            self._connection.execute("DELETE FROM responses")
+            self._connection.execute("UPDATE cache_meta SET value = 0 WHERE name = 'size'")
+
+    def stats(self) -> Dict:
+        """Compteurs du cache"""
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            size = self._add_size(0)
+        total = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Retourne le cache de réponses du processus (None si HTTP_CACHE_TTL_SECONDS=0)
+    """
+    global _response_cache
+    ttl_seconds = int(os.getenv("HTTP_CACHE_TTL_SECONDS", "3600"))
+    if ttl_seconds <= 0:
+        return None
+
+    with _response_cache_lock:
+        if _response_cache is None:
+            default_path = os.path.join(
+                os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                "data", "cache", "http_cache.sqlite"
+            )
+            _response_cache = ResponseCache(
+                path=os.getenv("HTTP_CACHE_PATH", default_path),
+                ttl_seconds=ttl_seconds,
+                max_bytes=int(os.getenv("HTTP_CACHE_MAX_MB", "256")) * 1024 * 1024
+            )
+            logger.info(f"Cache HTTP des extracteurs: {_response_cache.path} (TTL {ttl_seconds}s)")
+
+    return _response_cache
+
+
+def response_cache_report() -> Optional[Dict]:
+    """Statistiques du cache de réponses du processus (None si désactivé), pour les XCom des tâches"""
+    response_cache = get_response_cache()
+    return response_cache.stats() if response_cache is not None else None
@@ -0,0 +1,186 @@
+"""
+Registre d'exécution des runs ETL (SQLite)
+- Un état par (run, localisation, étape): done ou failed, lignes, durée,
+  nombre de tentatives, dernière erreur
+- Un retry ou une relance du même run saute les localisations déjà
+  chargées et réutilise les extractions déjà faites (aucun appel API)
+- Bilan par run: débit et échecs par étape
+
+La localisation est identifiée par son geohash, clé des tables chargées.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set
+from loguru import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DONE = "done"
+FAILED = "failed"
+
+
+class RunLedger:
+    """États des étapes ETL par run et par localisation, persistés sur disque"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Tâches mappées concurrentes: WAL et attente des verrous d'écriture
+        self._connection = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS stages (
+                run_id TEXT NOT NULL,
+                location TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                status TEXT NOT NULL,
+                scope TEXT,
+                rows INTEGER,
+                seconds REAL,
+                attempts INTEGER NOT NULL DEFAULT 1,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, location, stage)
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS ix_stages_updated_at ON stages (updated_at)")
+
+    def record(self, run_id: str, stage: str, locations: Iterable[str], status: str,
+               scope: Optional[str] = None, rows: Optional[Dict[str, int]] = None,
+               seconds: Optional[float] = None, error: Optional[str] = None):
+        """
+        Enregistre l'état d'une étape pour un lot de localisations
+
+        Args:
+            run_id: Identifiant du run
+            stage: extract, transform ou load
+            locations: Geohash des localisations
+            status: done ou failed
+            scope: Lot d'origine (ex: shard)
+            rows: Lignes produites par localisation
+            seconds: Durée de l'étape pour le lot, répartie entre ses localisations
+            error: Message d'erreur (failed)
+        """
+        locations = list(dict.fromkeys(locations))
+        if not locations:
+            return
+        share = seconds / len(locations) if seconds is not None else None
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany(
+                    """
+                    INSERT INTO stages (run_id, location, stage, status, scope, rows, seconds, error, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (run_id, location, stage) DO UPDATE SET
+                        status = excluded.status, scope = excluded.scope, rows = excluded.rows,
+                        seconds = excluded.seconds, error = excluded.error,
+                        updated_at = excluded.updated_at, attempts = attempts + 1
+                    """,
+                    [
+                        (run_id, location, stage, status, scope, (rows or {}).get(location), share,
+                         error[:500] if error else None, now)
+                        for location in locations
+                    ]
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def completed(self, run_id: str, stage: str) -> Set[str]:
+        """Localisations dont l'étape est terminée dans le run"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT location FROM stages WHERE run_id = ? AND stage = ? AND status = ?",
+                (run_id, stage, DONE)
+            )
+            return {location for location, in rows}
+
+    def summary(self, run_id: str, max_failures: int = 20) -> Dict:
+        """
+        Bilan d'un run
+
+        Returns:
+            Dict avec, par étape, localisations terminées / en échec, lignes,
+            durée cumulée, débit et relances, puis les dernières erreurs
+        """
+        with self._lock:
+            stages = self._connection.execute(
+                """
+                SELECT stage,
+                       SUM(status = 'done'), SUM(status = 'failed'),
+                       COALESCE(SUM(CASE WHEN status = 'done' THEN rows END), 0),
+                       COALESCE(SUM(CASE WHEN status = 'done' THEN seconds END), 0),
+                       SUM(attempts > 1),
+                       MIN(updated_at - COALESCE(seconds, 0)), MAX(updated_at)
+                FROM stages WHERE run_id = ? GROUP BY stage
+                """,
+                (run_id,)
+            ).fetchall()
+            failures = self._connection.execute(
+                "SELECT location, stage, scope, attempts, error FROM stages "
+                "WHERE run_id = ? AND status = ? ORDER BY updated_at DESC LIMIT ?",
+                (run_id, FAILED, max_failures)
+            ).fetchall()
+
+        report = {"run_id": run_id, "stages": {}, "failures": []}
+        first, last = None, None
+        for stage, done, failed, rows, seconds, retried, started, updated in stages:
+            report["stages"][stage] = {
+                "done": done,
+                "failed": failed,
+                "rows": rows,
+                "seconds": round(seconds, 3),
+                "rows_per_second": round(rows / seconds, 1) if seconds else None,
+                "retried": retried,
+            }
+            first = started if first is None else min(first, started)
+            last = updated if last is None else max(last, updated)
+
+        report["wall_seconds"] = round(last - first, 3) if stages else 0.0
+        report["failures"] = [
+            {"location": location, "stage": stage, "scope": scope, "attempts": attempts, "error": error}
+            for location, stage, scope, attempts, error in failures
+        ]
+        return report
+
+    def prune(self, retention_hours: float) -> int:
+        """Supprime les runs sans activité depuis retention_hours"""
+        deadline = time.time() - retention_hours * 3600
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM stages WHERE run_id IN "
+                "(SELECT run_id FROM stages GROUP BY run_id HAVING MAX(updated_at) < ?)",
+                (deadline,)
+            )
+        if cursor.rowcount:
+            logger.info(f"{cursor.rowcount} états d'étapes supprimés du registre (rétention {retention_hours:.0f} h)")
+        return cursor.rowcount
+
+
+_run_ledger: Optional[RunLedger] = None
+_run_ledger_lock = threading.Lock()
+
+
+def get_run_ledger() -> RunLedger:
+    """Retourne le registre d'exécution du processus (ETL_LEDGER_PATH)"""
+    global _run_ledger
+    with _run_ledger_lock:
+        if _run_ledger is None:
+            default_path = os.path.join(
+                os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                "data", "cache", "etl_ledger.sqlite"
+            )
+            _run_ledger = RunLedger(os.getenv("ETL_LEDGER_PATH", default_path))
+            logger.info(f"Registre d'exécution ETL: {_run_ledger.path}")
+
+    return _run_ledger
@@ -0,0 +1,232 @@
+"""
+Serveur local imitant l'API OpenWeather One Call 3.0
+- Contrat /onecall attendu par WeatherDataExtractor (lat, lon, appid, units, exclude)
+  et /onecall/day_summary (lat, lon, date) pour l'historique
+- Réponses déterministes par coordonnée (arrondie) et par jour (src/etl/synthetic.py)
+- Injection de latence (fixe, uniforme, log-normale), d'erreurs 5xx et de
+  limitation 429 (seau à jetons, en-tête Retry-After)
+
+Pointer OPENWEATHER_BASE_URL sur l'URL du serveur pour exercer le vrai
+chemin HTTP (pool de connexions, nouvelles tentatives, timeouts, cache)
+sans consommer de quota.
+
+Usage:
+    python -m src.etl.openweather_stub --port 8085 --latency-ms 80 --latency-distribution lognormal --error-rate 0.02
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8085 USE_MOCK_DATA=false ...
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+from loguru import logger
+
+from .quota import TokenBucket
+from .synthetic import day_summary_payload, onecall_payload
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+class OpenWeatherStub:
+    """
+    Serveur One Call local (threads, HTTP/1.1 keep-alive)
+
+    Args:
+        host: Adresse d'écoute
+        port: Port (0 = port libre choisi par le système)
+        latency_ms: Latence médiane par requête
+        latency_distribution: fixed, uniform (0.5x à 1.5x) ou lognormal (queue longue)
+        latency_sigma: Écart-type du log de la latence (lognormal)
+        error_rate: Proportion de réponses 500/502/503
+        rate_limit: Requêtes par seconde au-delà desquelles répondre 429 (0 = illimité)
+        burst: Capacité du seau à jetons (défaut: rate_limit)
+        api_key: Clé appid exigée (None = toute clé acceptée)
+        seed: Graine des tirages de latence et d'erreurs
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 latency_distribution: str = "fixed", latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, rate_limit: float = 0.0, burst: Optional[float] = None,
+                 api_key: Optional[str] = None, seed: int = 42):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Distribution de latence inconnue: {latency_distribution}")
+
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.api_key = api_key
+        self._bucket = TokenBucket(rate_limit, burst or rate_limit) if rate_limit else None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "ok": 0, "errors": 0, "throttled": 0, "rejected": 0}
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _latency(self) -> float:
+        """Latence tirée selon la distribution, en secondes"""
+        if not self.latency_ms:
+            return 0.0
+        with self._lock:
+            if self.latency_distribution == "uniform":
+                factor = self._rng.uniform(0.5, 1.5)
+            elif self.latency_distribution == "lognormal":
+                factor = self._rng.lognormvariate(0, self.latency_sigma)
+            else:
+                factor = 1.0
+        return self.latency_ms * factor / 1000
+
+    def _injected_error(self) -> Optional[int]:
+        if not self.error_rate:
+            return None
+        with self._lock:
+            if self._rng.random() < self.error_rate:
+                return self._rng.choice((500, 502, 503))
+        return None
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def respond(self, path: str, query: Dict) -> tuple:
+        """
+        Traite une requête
+
+        Returns:
+            (code HTTP, corps JSON, en-têtes supplémentaires)
+        """
+        if path.endswith("/stats"):
+            return 200, self.stats(), {}
+
+        self._count("requests")
+
+        day_summary = path.endswith("/onecall/day_summary")
+        if not path.endswith("/onecall") and not day_summary:
+            self._count("rejected")
+            return 404, {"cod": 404, "message": "Internal error"}, {}
+
+        if self.api_key is not None and query.get("appid") != self.api_key:
+            self._count("rejected")
+            return 401, {"cod": 401, "message": "Invalid API key"}, {}
+
+        try:
+            latitude, longitude = float(query["lat"]), float(query["lon"])
+        except (KeyError, ValueError):
+            self._count("rejected")
+            return 400, {"cod": "400", "message": "wrong latitude or longitude"}, {}
+
+        if day_summary and not re.fullmatch(r"\d{4}-\d{2}-\d{2}", query.get("date", "")):
+            self._count("rejected")
+            return 400, {"cod": "400", "message": "date must be YYYY-MM-DD"}, {}
+
+        if self._bucket is not None and not self._bucket.try_acquire():
+            self._count("throttled")
+            return 429, {"cod": 429, "message": "Too many requests"}, {"Retry-After": "1"}
+
+        time.sleep(self._latency())
+
+        status = self._injected_error()
+        if status is not None:
+            self._count("errors")
+            return status, {"cod": status, "message": "Injected failure"}, {}
+
+        if day_summary:
+            payload = day_summary_payload(latitude, longitude, query["date"])
+        else:
+            payload = onecall_payload(latitude, longitude)
+            for part in query.get("exclude", "").split(","):
+                payload.pop(part.strip(), None)
+
+        self._count("ok")
+        return 200, payload, {}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+                status, body, headers = stub.respond(parsed.path.rstrip("/"), query)
+
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "OpenWeatherStub":
+        """Démarre le serveur dans un thread démon"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Serveur OpenWeather local sur {self.url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "OpenWeatherStub":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> Dict:
+        """Compteurs des requêtes servies"""
+        with self._lock:
+            return dict(self.counters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur OpenWeather One Call local")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=0, help="Requêtes/s avant 429 (0 = illimité)")
+    parser.add_argument("--api-key")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    stub = OpenWeatherStub(
+        host=args.host, port=args.port, latency_ms=args.latency_ms,
+        latency_distribution=args.latency_distribution, latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate, rate_limit=args.rate_limit, api_key=args.api_key, seed=args.seed
+    )
+    stub.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
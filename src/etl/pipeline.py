@@ -0,0 +1,428 @@
+"""
+Pipeline ETL en flux: extraction -> transformation -> chargement par paquets
+- Les localisations sont consommées paresseusement, par paquets de taille fixe
+- Files bornées entre les étapes (contre-pression): l'extraction attend quand
+  la transformation ou le chargement prennent du retard
+- Plafond mémoire: l'extraction du paquet suivant attend que les paquets en
+  cours soient chargés, puis réduit la taille des paquets si le plafond
+  reste dépassé
+- Mémoire et débit relevés pour chaque paquet
+
+run_batch_etl exécute les trois étapes à la suite pour un lot de
+localisations (un shard du DAG), avec points de reprise par localisation.
+"""
+
+import gc
+import os
+import queue
+import resource
+import threading
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional
+from loguru import logger
+from dotenv import load_dotenv
+
+from .artifacts import read_raw_artifact, run_directory, write_raw_artifact
+from .extract import extract_many
+from .ledger import DONE, FAILED, RunLedger, get_run_ledger
+from .load import DatabaseLoader, load_batch_pipeline
+from .spatial import encode_geohash
+from .transform import transform_batch_pipeline
+
+load_dotenv()
+
+# Fin de flux entre deux étapes
+_DONE = object()
+
+
+def current_rss_mb() -> float:
+    """Mémoire résidente actuelle du processus (pic depuis le démarrage hors Linux)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_batch_etl(locations: List[Dict], loader: Optional[DatabaseLoader] = None,
+                  run_id: Optional[str] = None, scope: str = "batch",
+                  ledger: Optional[RunLedger] = None) -> Dict:
+    """
+    Extrait, transforme et charge un lot de localisations
+
+    Avec un run_id, chaque étape est enregistrée dans le registre d'exécution
+    et les extractions dans un artefact '<scope>/raw' du run: une relance du
+    même run ignore les localisations déjà chargées et réutilise les
+    extractions réussies au lieu de rappeler l'API.
+
+    Les localisations extraites sont chargées même si d'autres ont échoué
+    (erreur, budget journalier épuisé); le lot lève ensuite une erreur pour
+    que la relance reprenne les seules localisations manquantes.
+
+    Args:
+        locations: Localisations ('lat', 'lon', ...)
+        loader: Chargeur à réutiliser (défaut: nouveau chargeur)
+        run_id: Identifiant du run (défaut: aucun point de reprise)
+        scope: Nom du lot dans le run (ex: shard)
+        ledger: Registre d'exécution (défaut: registre du processus)
+
+    Returns:
+        Rapport du lot: localisations, déjà chargées, extractions réutilisées,
+        extraites, prévisions écrites / inchangées, lignes chargées, débit
+
+    Raises:
+        RuntimeError: Localisations du lot non chargées (après chargement des autres)
+    """
+    start = time.perf_counter()
+    keys = [_key(location) for location in locations]
+    report = {
+        "locations": len(locations), "skipped": 0, "reused": 0, "extracted": 0,
+        "forecast_count": 0, "forecast_written": 0, "forecast_skipped": 0, "rows": 0,
+    }
+
+    if run_id is not None:
+        ledger = ledger or get_run_ledger()
+        loaded = ledger.completed(run_id, "load")
+        pending = [(location, key) for location, key in zip(locations, keys) if key not in loaded]
+        report["skipped"] = len(locations) - len(pending)
+        if not pending:
+            logger.info(f"{scope}: {len(locations)} localisations déjà chargées dans le run {run_id}")
+            return {**report, "seconds": round(time.perf_counter() - start, 3), "rows_per_second": None}
+
+        # Extractions réussies d'une tentative précédente, relues depuis l'artefact du lot
+        extracted = ledger.completed(run_id, "extract") & {key for _, key in pending}
+        raw_path = os.path.join(run_directory(run_id), scope, "raw")
+        reused = []
+        if extracted and os.path.isdir(raw_path):
+            reused = read_raw_artifact(raw_path, geohashes=extracted)
+        reused_keys = {_raw_key(raw_data) for raw_data in reused}
+        to_extract = [location for location, key in pending if key not in reused_keys]
+        report["reused"] = len(reused)
+    else:
+        pending = list(zip(locations, keys))
+        reused, to_extract = [], locations
+
+    extract_start = time.perf_counter()
+    try:
+        raw_data = extract_many(to_extract) if to_extract else []
+    except RuntimeError as e:
+        if run_id is not None:
+            ledger.record(run_id, "extract", [key for _, key in pending if key not in reused_keys], FAILED,
+                          scope, error=str(e))
+        if not reused:
+            raise
+        raw_data = []
+
+    if run_id is not None:
+        extract_seconds = time.perf_counter() - extract_start
+        new_keys = [_raw_key(data) for data in raw_data]
+        ledger.record(run_id, "extract", new_keys, DONE, scope, seconds=extract_seconds)
+        ledger.record(run_id, "extract", {_key(location) for location in to_extract} - set(new_keys), FAILED,
+                      scope, error="Extraction impossible")
+        raw_data = reused + raw_data
+        write_raw_artifact(raw_data, run_id, name=os.path.join(scope, "raw"))
+    report["extracted"] = len(raw_data)
+
+    transform_start = time.perf_counter()
+    transformed = transform_batch_pipeline(raw_data)
+    del raw_data
+    transformed_keys = [_raw_key(location) for location in transformed["locations"]]
+    if run_id is not None:
+        rows = {key: location["num_forecasts"] for key, location in zip(transformed_keys, transformed["locations"])}
+        ledger.record(run_id, "transform", transformed_keys, DONE, scope, rows,
+                      time.perf_counter() - transform_start)
+
+    load_start = time.perf_counter()
+    try:
+        result = load_batch_pipeline(transformed, loader)
+    except Exception as e:
+        if run_id is not None:
+            ledger.record(run_id, "load", transformed_keys, FAILED, scope, error=str(e))
+        raise
+    if run_id is not None:
+        ledger.record(run_id, "load", transformed_keys, DONE, scope, rows, time.perf_counter() - load_start)
+
+    # Extraction en échec ou sautée (budget), transformation impossible
+    failed = sorted({key for _, key in pending} - set(transformed_keys))
+    if failed:
+        if run_id is not None:
+            ledger.record(run_id, "transform", set(failed) & set(new_keys), FAILED, scope,
+                          error="Transformation impossible")
+        logger.error(f"{scope}: {len(failed)} localisations non chargées: {', '.join(failed[:10])}")
+        raise RuntimeError(f"{scope}: {len(failed)}/{len(pending)} localisations non chargées")
+
+    elapsed = time.perf_counter() - start
+    rows = result["weather_record_count"] + result["forecast_count"]
+    return {
+        **report,
+        "forecast_count": result["forecast_count"],
+        "forecast_written": result["forecast_written"],
+        "forecast_skipped": result["forecast_skipped"],
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+    }
+
+
+def _key(location: Dict) -> str:
+    return encode_geohash(location["lat"], location["lon"])
+
+
+def _raw_key(raw_data: Dict) -> str:
+    """Geohash d'une localisation extraite ou transformée ('location': latitude, longitude)"""
+    return encode_geohash(raw_data["location"]["latitude"], raw_data["location"]["longitude"])
+
+
+def run_streaming_pipeline(locations: Iterable[Dict], chunk_size: Optional[int] = None,
+                           max_memory_mb: Optional[float] = None, queue_size: Optional[int] = None,
+                           extract: Callable[[List[Dict]], List[Dict]] = extract_many,
+                           transform: Callable[[List[Dict]], Dict] = transform_batch_pipeline,
+                           load: Optional[Callable[[Dict], Dict]] = None,
+                           run_id: Optional[str] = None, scope: str = "stream",
+                           ledger: Optional[RunLedger] = None) -> Dict:
+    """
+    Exécute l'ETL paquet par paquet, les trois étapes en parallèle
+
+    Seuls queue_size paquets attendent entre deux étapes: la mémoire dépend
+    de la taille des paquets, pas du nombre total de localisations.
+
+    Avec un run_id, les localisations chargées par chaque paquet sont
+    enregistrées dans le registre d'exécution: une relance du même run
+    ignore celles déjà chargées. Les paquets suivants sont traités même si
+    un paquet échoue; le run lève ensuite une erreur pour être relancé.
+
+    Args:
+        locations: Localisations ('lat', 'lon', ...), éventuellement un générateur
+        chunk_size: Localisations par paquet (défaut: ETL_CHUNK_SIZE)
+        max_memory_mb: Plafond de mémoire résidente (défaut: ETL_MAX_MEMORY_MB, 0 = aucun)
+        queue_size: Paquets en attente entre deux étapes (défaut: ETL_QUEUE_SIZE)
+        extract: Étape d'extraction d'un paquet
+        transform: Étape de transformation d'un paquet
+        load: Étape de chargement d'un paquet (défaut: load_batch_pipeline,
+            un seul chargeur et donc un seul pool de connexions pour le run)
+        run_id: Identifiant du run (défaut: aucun point de reprise)
+        scope: Nom du lot dans le run
+        ledger: Registre d'exécution (défaut: registre du processus)
+
+    Returns:
+        Rapport du run: totaux, débit, pic mémoire et détail par paquet
+
+    Raises:
+        RuntimeError: Localisations non chargées (paquet en échec ou incomplet)
+    """
+    chunk_size = chunk_size or int(os.getenv("ETL_CHUNK_SIZE", "500"))
+    max_memory_mb = float(os.getenv("ETL_MAX_MEMORY_MB", "0")) if max_memory_mb is None else max_memory_mb
+    queue_size = queue_size or int(os.getenv("ETL_QUEUE_SIZE", "1"))
+    if load is None:
+        loader = DatabaseLoader()
+        load = lambda transformed: load_batch_pipeline(transformed, loader)  # noqa: E731
+
+    extracted_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    transformed_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    # in_flight: paquets extraits mais pas encore chargés
+    state = {"chunk_size": chunk_size, "in_flight": 0}
+    state_lock = threading.Lock()
+    chunks: List[Dict] = []
+    skipped = 0
+
+    if run_id is not None:
+        ledger = ledger or get_run_ledger()
+        loaded_keys = ledger.completed(run_id, "load")
+        source = locations
+
+        def _pending():
+            """Localisations pas encore chargées dans le run"""
+            nonlocal skipped
+            for location in source:
+                if _key(location) in loaded_keys:
+                    skipped += 1
+                    continue
+                yield location
+
+        locations = _pending()
+
+    def _put(target: "queue.Queue", item) -> bool:
+        """put bloquant (contre-pression), interrompu si une autre étape a échoué"""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(source: "queue.Queue"):
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _wait_for_memory():
+        """Attend que les paquets en cours libèrent la mémoire, sinon réduit les paquets"""
+        if not max_memory_mb:
+            return
+        while current_rss_mb() > max_memory_mb and not stop.is_set():
+            with state_lock:
+                pending = state["in_flight"]
+            if pending:
+                time.sleep(0.05)
+                continue
+
+            gc.collect()
+            if current_rss_mb() > max_memory_mb and state["chunk_size"] > 1:
+                state["chunk_size"] = max(1, state["chunk_size"] // 2)
+                logger.warning(
+                    f"Plafond mémoire de {max_memory_mb:.0f} Mo dépassé ({current_rss_mb():.0f} Mo): "
+                    f"paquets réduits à {state['chunk_size']} localisations"
+                )
+            return
+
+    def _extract_stage():
+        try:
+            iterator = iter(locations)
+            index = 0
+            while not stop.is_set():
+                _wait_for_memory()
+                chunk = list(islice(iterator, state["chunk_size"]))
+                if not chunk:
+                    break
+
+                keys = [_key(location) for location in chunk] if run_id is not None else None
+                start = time.perf_counter()
+                try:
+                    raw_data = extract(chunk)
+                except RuntimeError as e:
+                    # Aucune localisation du paquet extraite: le run continue, puis échoue
+                    logger.error(f"Paquet {index} non extrait: {e}")
+                    raw_data = []
+                stats = {
+                    "chunk": index,
+                    "locations": len(chunk),
+                    "extracted": len(raw_data),
+                    "extract_seconds": round(time.perf_counter() - start, 3),
+                }
+
+                with state_lock:
+                    state["in_flight"] += 1
+                if not _put(extracted_queue, (stats, keys, raw_data)):
+                    break
+                index += 1
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(extracted_queue, _DONE)
+
+    def _transform_stage():
+        try:
+            while True:
+                item = _get(extracted_queue)
+                if item is _DONE:
+                    break
+                stats, keys, raw_data = item
+
+                start = time.perf_counter()
+                transformed = transform(raw_data) if raw_data else None
+                del raw_data
+                stats["transform_seconds"] = round(time.perf_counter() - start, 3)
+
+                if not _put(transformed_queue, (stats, keys, transformed)):
+                    break
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(transformed_queue, _DONE)
+
+    started_at = time.perf_counter()
+    peak_rss_mb = current_rss_mb()
+    stages = [
+        threading.Thread(target=_extract_stage, name="etl-extract", daemon=True),
+        threading.Thread(target=_transform_stage, name="etl-transform", daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+
+    # Chargement dans le thread appelant
+    try:
+        while True:
+            item = _get(transformed_queue)
+            if item is _DONE:
+                break
+            stats, keys, transformed = item
+
+            start = time.perf_counter()
+            result = load(transformed) if transformed is not None else {}
+            stats["load_seconds"] = round(time.perf_counter() - start, 3)
+            stats["rows"] = int(result.get("weather_record_count", 0)) + int(result.get("forecast_count", 0))
+            stats["forecast_skipped"] = int(result.get("forecast_skipped", 0))
+            stats["loaded"] = stats["extracted"]
+
+            if run_id is not None:
+                loaded = [_raw_key(location) for location in transformed["locations"]] if transformed else []
+                stats["loaded"] = len(set(loaded))
+                ledger.record(run_id, "load", loaded, DONE, scope, seconds=stats["load_seconds"])
+                ledger.record(run_id, "load", set(keys) - set(loaded), FAILED, scope,
+                              error=f"Paquet {stats['chunk']} incomplet")
+            del item, transformed
+
+            with state_lock:
+                state["in_flight"] -= 1
+            stats["rss_mb"] = round(current_rss_mb(), 1)
+            stage_seconds = stats["extract_seconds"] + stats["transform_seconds"] + stats["load_seconds"]
+            stats["rows_per_second"] = round(stats["rows"] / stage_seconds, 1) if stage_seconds else None
+            peak_rss_mb = max(peak_rss_mb, stats["rss_mb"])
+            chunks.append(stats)
+
+            logger.info(
+                f"Paquet {stats['chunk']}: {stats['extracted']}/{stats['locations']} localisations, "
+                f"{stats['rows']} lignes, {stats['rss_mb']} Mo"
+            )
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        for stage in stages:
+            stage.join()
+
+    if errors:
+        logger.error(f"Pipeline en flux interrompu: {errors[0]}")
+        raise errors[0]
+
+    elapsed = time.perf_counter() - started_at
+    rows = sum(chunk["rows"] for chunk in chunks)
+    report = {
+        "chunks": len(chunks),
+        "chunk_size": state["chunk_size"],
+        "locations": sum(chunk["locations"] for chunk in chunks),
+        "skipped": skipped,
+        "extracted": sum(chunk["extracted"] for chunk in chunks),
+        "missing": sum(chunk["locations"] - chunk["loaded"] for chunk in chunks),
+        "failed_chunks": sum(1 for chunk in chunks if chunk["loaded"] < chunk["locations"]),
+        "rows": rows,
+        "forecast_skipped": sum(chunk["forecast_skipped"] for chunk in chunks),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "max_memory_mb": max_memory_mb or None,
+        "chunk_stats": chunks,
+    }
+
+    logger.info(
+        f"Pipeline en flux complété: {report['extracted']}/{report['locations']} localisations en "
+        f"{report['chunks']} paquets, {rows} lignes en {elapsed:.1f}s ({report['rows_per_second']} lignes/s), "
+        f"pic mémoire {report['peak_rss_mb']} Mo"
+    )
+
+    # Paquets en échec ou incomplets: la relance ne reprend que les localisations manquantes
+    if report["missing"]:
+        raise RuntimeError(
+            f"{report['missing']}/{report['locations']} localisations non chargées "
+            f"({report['failed_chunks']} paquets en échec ou incomplets)"
+        )
+    return report
@@ -0,0 +1,261 @@
+"""
+Budget de requêtes vers l'API OpenWeather One Call
+- Seau à jetons pour le nombre d'appels par minute (attente si vide)
+- Plafond d'appels par jour UTC (refus une fois atteint)
+- Compteurs de consommation pour le rapport de fin de run
+
+Le seau et le compteur du jour sont stockés dans un fichier SQLite
+(OPENWEATHER_BUDGET_PATH) partagé par tous les processus: shards mappés,
+mois du backfill, retries et API tirent sur le même quota d'abonnement.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from loguru import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class QuotaExceededError(RuntimeError):
+    """Le budget journalier d'appels est épuisé"""
+
+
+def utc_today() -> str:
+    """Jour UTC courant (les quotas OpenWeather sont remis à zéro à minuit UTC)"""
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe: `rate` jetons par seconde, au plus `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self) -> bool:
+        """Prend un jeton s'il est disponible, sans attendre"""
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self) -> float:
+        """
+        Prend un jeton, en attendant qu'il soit disponible
+
+        Returns:
+            Temps d'attente en secondes
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+class RequestBudget:
+    """
+    Budget d'appels par minute et par jour (0 = illimité)
+
+    Avec un chemin (path), le seau et le compteur du jour vivent dans un
+    fichier SQLite partagé: plusieurs instances et plusieurs processus
+    consomment le même quota, chaque réservation étant une transaction
+    BEGIN IMMEDIATE. Sans chemin, le budget est propre à l'instance (tests).
+    Les compteurs calls / rejected / deduplicated / waited_seconds restent
+    ceux de l'instance (rapport du run).
+    """
+
+    def __init__(self, calls_per_minute: int = 60, calls_per_day: int = 1000,
+                 path: Optional[str] = None, name: str = "openweather"):
+        self.calls_per_minute = calls_per_minute
+        self.calls_per_day = calls_per_day
+        self.path = path
+        self.name = name
+        self._bucket = TokenBucket(calls_per_minute / 60, calls_per_minute) if calls_per_minute else None
+        self._lock = threading.Lock()
+        self.day = utc_today()
+        self._calls_today = 0
+        self.calls = 0
+        self.rejected = 0
+        self.deduplicated = 0
+        self.waited_seconds = 0.0
+
+        self._connection = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._connection = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS budgets (
+                    name TEXT PRIMARY KEY,
+                    day TEXT NOT NULL,
+                    calls_today INTEGER NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def acquire(self):
+        """
+        Réserve un appel: attend un jeton du quota par minute, refuse au-delà
+        du quota journalier
+
+        Raises:
+            QuotaExceededError: si le budget journalier est épuisé
+        """
+        waited = self._acquire_shared() if self._connection is not None else self._acquire_local()
+        with self._lock:
+            self.calls += 1
+            self.waited_seconds += waited
+
+    def _acquire_local(self) -> float:
+        with self._lock:
+            if utc_today() != self.day:
+                self.day = utc_today()
+                self._calls_today = 0
+
+            if self.calls_per_day and self._calls_today >= self.calls_per_day:
+                self.rejected += 1
+                raise QuotaExceededError(f"Budget journalier de {self.calls_per_day} appels épuisé")
+
+            self._calls_today += 1
+
+        return self._bucket.acquire() if self._bucket is not None else 0.0
+
+    def _acquire_shared(self) -> float:
+        """Réservation dans le fichier partagé; attente hors transaction si le seau est vide"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._connection.execute("BEGIN IMMEDIATE")
+                try:
+                    day, calls_today, tokens, updated_at = self._read_state()
+                    now = time.time()
+                    if self.calls_per_day and calls_today >= self.calls_per_day:
+                        delay = None
+                    elif self._bucket is not None:
+                        tokens = min(self._bucket.capacity, tokens + (now - updated_at) * self._bucket.rate)
+                        delay = 0.0 if tokens >= 1 else (1 - tokens) / self._bucket.rate
+                    else:
+                        delay = 0.0
+
+                    if delay == 0.0:
+                        tokens -= 1 if self._bucket is not None else 0
+                        calls_today += 1
+                    if delay is not None:
+                        self._connection.execute(
+                            "INSERT OR REPLACE INTO budgets (name, day, calls_today, tokens, updated_at) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            (self.name, day, calls_today, tokens, now)
+                        )
+                    self._connection.execute("COMMIT")
+                except Exception:
+                    self._connection.execute("ROLLBACK")
+                    raise
+
+                if delay is None:
+                    self.rejected += 1
+                    raise QuotaExceededError(f"Budget journalier de {self.calls_per_day} appels épuisé")
+                if delay == 0.0:
+                    return waited
+
+            time.sleep(delay)
+            waited += delay
+
+    def _read_state(self):
+        """(jour, appels du jour, jetons, mise à jour) du budget partagé, remis à zéro au changement de jour UTC"""
+        today = utc_today()
+        capacity = self._bucket.capacity if self._bucket is not None else 0.0
+        row = self._connection.execute(
+            "SELECT day, calls_today, tokens, updated_at FROM budgets WHERE name = ?", (self.name,)
+        ).fetchone()
+        if row is None:
+            return today, 0, capacity, time.time()
+        day, calls_today, tokens, updated_at = row
+        if day != today:
+            return today, 0, tokens, updated_at
+        return row
+
+    @property
+    def calls_today(self) -> int:
+        """Appels du jour UTC, tous processus confondus pour un budget partagé"""
+        if self._connection is None:
+            return self._calls_today if self.day == utc_today() else 0
+        with self._lock:
+            return self._read_state()[1]
+
+    def record_deduplicated(self, count: int = 1):
+        """Compte les appels évités (même localisation dans un run)"""
+        with self._lock:
+            self.deduplicated += count
+
+    def remaining_today(self) -> Optional[int]:
+        if not self.calls_per_day:
+            return None
+        return max(0, self.calls_per_day - self.calls_today)
+
+    def stats(self) -> Dict:
+        """Compteurs de consommation du budget"""
+        return {
+            "shared": self._connection is not None,
+            "calls_per_minute": self.calls_per_minute,
+            "calls_per_day": self.calls_per_day,
+            "calls": self.calls,
+            "calls_today": self.calls_today,
+            "remaining_today": self.remaining_today(),
+            "rejected": self.rejected,
+            "deduplicated": self.deduplicated,
+            "waited_seconds": round(self.waited_seconds, 3),
+        }
+
+
+_budget: Optional[RequestBudget] = None
+
+
+_budget_lock = threading.Lock()
+
+
+def get_request_budget() -> RequestBudget:
+    """
+    Retourne le budget selon OPENWEATHER_CALLS_PER_MINUTE et
+    OPENWEATHER_CALLS_PER_DAY (défauts: offre One Call 3.0 gratuite), partagé
+    entre processus via OPENWEATHER_BUDGET_PATH (vide = propre au processus)
+    """
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            default_path = os.path.join(
+                os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                "data", "cache", "openweather_budget.sqlite"
+            )
+            _budget = RequestBudget(
+                calls_per_minute=int(os.getenv("OPENWEATHER_CALLS_PER_MINUTE", "60")),
+                calls_per_day=int(os.getenv("OPENWEATHER_CALLS_PER_DAY", "1000")),
+                path=os.getenv("OPENWEATHER_BUDGET_PATH", default_path) or None
+            )
+            logger.info(
+                f"Budget OpenWeather: {_budget.calls_per_minute or '∞'} appels/min, "
+                f"{_budget.calls_per_day or '∞'} appels/jour ({_budget.path or 'propre au processus'})"
+            )
+    return _budget
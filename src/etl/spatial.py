@@ -0,0 +1,131 @@
+"""
+Indexation spatiale des localisations météo
+- Clé geohash calculée au chargement et indexée en base
+- Index en mémoire (BallTree haversine) pour retrouver la localisation
+  ingérée la plus proche en O(log n)
+- Grille régulière pour regrouper les champs voisins sous un même appel API
+"""
+
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = int(os.getenv("GEOHASH_PRECISION", "9"))
+# Taille des cellules de la grille d'extraction (0.05° ≈ 5.5 km; 0 = désactivée)
+GRID_CELL_DEGREES = float(os.getenv("GRID_CELL_DEGREES", "0.05"))
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode une coordonnée en geohash
+
+    Args:
+        latitude: Latitude
+        longitude: Longitude
+        precision: Nombre de caractères (9 ≈ cellule de 5 m)
+
+    Returns:
+        Geohash de la coordonnée
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits = bits << 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits = bits << 1
+                lat_range[1] = mid
+
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(geohash)
+
+
+def grid_cell(latitude: float, longitude: float, cell_degrees: float = GRID_CELL_DEGREES) -> Tuple[int, int]:
+    """
+    Cellule de la grille contenant une coordonnée
+
+    Args:
+        latitude: Latitude
+        longitude: Longitude
+        cell_degrees: Côté de la cellule en degrés
+
+    Returns:
+        Indices (ligne, colonne) de la cellule
+    """
+    return math.floor(latitude / cell_degrees), math.floor(longitude / cell_degrees)
+
+
+def grid_cell_center(cell: Tuple[int, int], cell_degrees: float = GRID_CELL_DEGREES) -> Tuple[float, float]:
+    """Coordonnées du centre d'une cellule de la grille"""
+    return (cell[0] + 0.5) * cell_degrees, (cell[1] + 0.5) * cell_degrees
+
+
+class LocationIndex:
+    """Index des localisations ingérées pour la recherche du plus proche voisin"""
+
+    def __init__(self, locations: Iterable[Dict]):
+        """
+        Construit l'index
+
+        Args:
+            locations: Dicts avec 'latitude', 'longitude' et 'geohash'
+        """
+        self.locations: List[Dict] = list(locations)
+        self._tree = None
+
+        if self.locations:
+            coords = np.radians([[loc["latitude"], loc["longitude"]] for loc in self.locations])
+            self._tree = BallTree(coords, metric="haversine")
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def nearest(self, latitude: float, longitude: float, radius_km: float) -> Optional[Dict]:
+        """
+        Retourne la localisation la plus proche dans le rayon donné
+
+        Args:
+            latitude: Latitude demandée
+            longitude: Longitude demandée
+            radius_km: Rayon de recherche maximal
+
+        Returns:
+            Localisation (avec 'distance_km') ou None
+        """
+        if self._tree is None:
+            return None
+
+        distances, indices = self._tree.query(np.radians([[latitude, longitude]]), k=1)
+        distance_km = float(distances[0][0]) * EARTH_RADIUS_KM
+
+        if distance_km > radius_km:
+            return None
+
+        return {**self.locations[int(indices[0][0])], "distance_km": round(distance_km, 4)}
@@ -0,0 +1,312 @@
+"""
+Générateur vectorisé de données météo synthétiques
+- N localisations x D jours produits en une fois, sous forme de colonnes NumPy
+- Structure saisonnière sahélienne (saison des pluies centrée sur août,
+  maximum de chaleur en avril-mai) et gradient nord-sud
+- Corrélation spatiale: anomalies interpolées depuis une grille latente
+  (une valeur par nœud et par jour, fonction de la graine, des coordonnées du
+  nœud et de la date), donc identiques quel que soit le lot généré
+- Reproductible: graine fixe (DEFAULT_SEED)
+
+Sert au mode mock de l'extracteur (prévisions et historique), au serveur
+OpenWeather local, aux données d'entraînement des modèles et aux benchmarks
+(10M+ lignes).
+"""
+
+import hashlib
+from datetime import date, datetime
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SEED = 42
+
+# Emprise du Sénégal (lat_min, lat_max, lon_min, lon_max)
+SENEGAL_BBOX = (12.3, 16.7, -17.5, -11.3)
+
+# Pas de la grille latente des anomalies (≈ 110 km)
+LATENT_SPACING_DEGREES = 1.0
+
+# Flux indépendants de la grille latente
+THERMAL_STREAM = 1
+MOISTURE_STREAM = 2
+
+WEATHER_DESCRIPTIONS = np.array([
+    "clear sky", "few clouds", "scattered clouds",
+    "partly cloudy", "light rain", "moderate rain"
+])
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """Fonction de mélange splitmix64 (arithmétique modulo 2^64)"""
+    x = x + _GOLDEN
+    x = (x ^ (x >> np.uint64(30))) * _MIX_1
+    x = (x ^ (x >> np.uint64(27))) * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+
+def _hash_normal(seed: int, stream: int, *keys: np.ndarray) -> np.ndarray:
+    """Tirage N(0, 1) déterministe pour chaque combinaison de clés entières (Box-Muller)"""
+    state = np.full(np.broadcast_shapes(*(np.shape(key) for key in keys)), seed, dtype=np.uint64)
+    state = _mix(state ^ np.uint64(stream))
+    for key in keys:
+        state = _mix(state ^ np.asarray(key, dtype=np.int64).view(np.uint64))
+
+    u1 = ((state >> np.uint64(32)).astype(np.float64) + 0.5) / 2.0 ** 32
+    u2 = ((state & np.uint64(0xFFFFFFFF)).astype(np.float64) + 0.5) / 2.0 ** 32
+    return np.sqrt(-2 * np.log(u1)) * np.cos(2 * np.pi * u2)
+
+
+def _latent_field(seed: int, stream: int, latitudes: np.ndarray, longitudes: np.ndarray,
+                  day_numbers: np.ndarray) -> np.ndarray:
+    """
+    Anomalie N(0, 1) spatialement et temporellement corrélée, (N, D) en float32
+
+    Interpolation bilinéaire des 4 nœuds de grille voisins, chaque nœud
+    portant un bruit lissé sur 3 jours.
+    """
+    grid_y = latitudes / LATENT_SPACING_DEGREES
+    grid_x = longitudes / LATENT_SPACING_DEGREES
+    y0, x0 = np.floor(grid_y), np.floor(grid_x)
+    fy, fx = grid_y - y0, grid_x - x0
+
+    corners = np.stack([
+        np.stack([y0, x0], axis=1), np.stack([y0, x0 + 1], axis=1),
+        np.stack([y0 + 1, x0], axis=1), np.stack([y0 + 1, x0 + 1], axis=1),
+    ], axis=1).astype(np.int64)
+    weights = np.stack([(1 - fy) * (1 - fx), (1 - fy) * fx, fy * (1 - fx), fy * fx], axis=1)
+    # Variance unitaire quelle que soit la position dans la maille
+    weights /= np.sqrt((weights ** 2).sum(axis=1, keepdims=True))
+
+    nodes, inverse = np.unique(corners.reshape(-1, 2), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1, 4)
+
+    days = np.concatenate([day_numbers[:1] - 1, day_numbers, day_numbers[-1:] + 1])
+    noise = _hash_normal(seed, stream, nodes[:, :1], nodes[:, 1:], days[None, :])
+    node_values = ((noise[:, :-2] + 2 * noise[:, 1:-1] + noise[:, 2:]) / np.sqrt(6)).astype(np.float32)
+
+    field = np.zeros((len(latitudes), len(day_numbers)), dtype=np.float32)
+    for corner in range(4):
+        field += weights[:, corner, None].astype(np.float32) * node_values[inverse[:, corner]]
+    return field
+
+
+def random_locations(count: int, seed: int = DEFAULT_SEED,
+                     bbox: Tuple[float, float, float, float] = SENEGAL_BBOX) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coordonnées aléatoires (arrondies à 4 décimales) dans une emprise
+
+    Returns:
+        (latitudes, longitudes)
+    """
+    rng = np.random.default_rng(seed)
+    latitudes = np.round(rng.uniform(bbox[0], bbox[1], count), 4)
+    longitudes = np.round(rng.uniform(bbox[2], bbox[3], count), 4)
+    return latitudes, longitudes
+
+
+def _simulate(latitudes: np.ndarray, longitudes: np.ndarray, start: date, days: int,
+              seed: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    n = len(latitudes)
+    dates = np.datetime64(start, "D") + np.arange(days)
+    day_numbers = dates.astype(np.int64)
+    day_of_year = (dates - dates.astype("datetime64[Y]")).astype(np.int64).astype(np.float32) + 1
+
+    # Saisonnalité (D,) et gradient nord-sud (N, 1)
+    rainy_season = np.exp(-((day_of_year - 225) / 40) ** 2)
+    heat_season = np.cos(2 * np.pi * (day_of_year - 125) / 365.25)
+    north = (latitudes - 14.5).astype(np.float32)[:, None]
+
+    thermal = _latent_field(seed, THERMAL_STREAM, latitudes, longitudes, day_numbers)
+    moisture = _latent_field(seed, MOISTURE_STREAM, latitudes, longitudes, day_numbers)
+
+    def noise():
+        return rng.standard_normal((n, days), dtype=np.float32)
+
+    temp_day = 28 + 3 * heat_season - 2 * rainy_season + 0.8 * north + 1.5 * thermal - 0.5 * moisture + noise()
+    temp_amplitude = np.clip(11 - 5 * rainy_season + 1.5 * noise() - 0.8 * moisture, 3, None)
+    temp_min = temp_day - 0.55 * temp_amplitude
+    temp_max = temp_day + 0.45 * temp_amplitude
+
+    humidity = np.clip(45 + 35 * rainy_season - 4 * north + 8 * moisture + 5 * noise(), 10, 100)
+    clouds = np.clip(20 + 55 * rainy_season + 15 * moisture + 10 * noise(), 0, 100)
+    pop = 1 / (1 + np.exp(-(-4.5 + 5.5 * rainy_season - 0.5 * north + 1.2 * moisture)))
+    raining = rng.random((n, days), dtype=np.float32) < pop
+    rain_mm = np.where(raining, rng.standard_exponential((n, days), dtype=np.float32) * (3 + 9 * rainy_season), 0)
+
+    columns = {
+        "temp_min": temp_min,
+        "temp_max": temp_max,
+        "temp_day": temp_day,
+        "temp_mean": (temp_min + temp_max) / 2,
+        "temp_amplitude": temp_amplitude,
+        "feels_like": temp_day + 0.04 * (humidity - 50) + 0.5 * noise(),
+        "humidity": humidity,
+        "pressure": 1012 - 3 * rainy_season + 1.5 * noise(),
+        "wind_speed": np.clip(4 + 2 * (1 - rainy_season) + 1.5 * noise(), 0, None),
+        "clouds": clouds,
+        "rain_mm": rain_mm,
+        "pop": pop * 100,
+        "uvi": np.clip(10 + heat_season - 4 * clouds / 100 + 0.5 * noise(), 0, None),
+    }
+
+    data = {
+        "location_id": np.repeat(np.arange(n, dtype=np.int32), days),
+        "latitude": np.repeat(latitudes, days),
+        "longitude": np.repeat(longitudes, days),
+        "date": np.tile(dates.astype("datetime64[s]") + np.timedelta64(12, "h"), n),
+    }
+    for name, values in columns.items():
+        data[name] = np.broadcast_to(values, (n, days)).astype(np.float32).ravel()
+    return data
+
+
+def generate_weather(latitudes: Union[Sequence[float], np.ndarray], longitudes: Union[Sequence[float], np.ndarray],
+                     start: Optional[Union[date, str]] = None, days: int = 7,
+                     seed: int = DEFAULT_SEED) -> Dict[str, np.ndarray]:
+    """
+    Météo journalière synthétique de N localisations sur D jours
+
+    Args:
+        latitudes: Latitudes des localisations
+        longitudes: Longitudes des localisations
+        start: Premier jour (défaut: aujourd'hui)
+        days: Nombre de jours
+        seed: Graine (grille latente et bruit local)
+
+    Returns:
+        Colonnes de N x D valeurs, localisation par localisation:
+        location_id, latitude, longitude, date, puis les mesures au format
+        transformé (temp_min, temp_max, temp_day, temp_mean, temp_amplitude,
+        feels_like, humidity, pressure, wind_speed, clouds, rain_mm, pop en %, uvi)
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    start = pd.Timestamp(start or date.today()).date()
+    return _simulate(latitudes, longitudes, start, days, seed, np.random.default_rng(seed))
+
+
+def generate_frame(latitudes: Union[Sequence[float], np.ndarray], longitudes: Union[Sequence[float], np.ndarray],
+                   start: Optional[Union[date, str]] = None, days: int = 7,
+                   seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """generate_weather sous forme de DataFrame"""
+    return pd.DataFrame(generate_weather(latitudes, longitudes, start, days, seed))
+
+
+def onecall_payload(latitude: float, longitude: float, day: Optional[datetime] = None,
+                    days: int = 8, seed: int = DEFAULT_SEED) -> Dict:
+    """
+    Réponse One Call simulée, identique pour une même coordonnée arrondie et un même jour
+
+    Args:
+        latitude: Latitude
+        longitude: Longitude
+        day: Jour de référence (défaut: aujourd'hui)
+        days: Nombre de prévisions journalières (8 pour l'API réelle)
+        seed: Graine
+
+    Returns:
+        Dict avec structure identique à OpenWeather API
+    """
+    latitude, longitude = round(latitude, 4), round(longitude, 4)
+    start = (day or datetime.now()).date()
+    local_seed = hashlib.sha256(f"{seed}:{latitude}:{longitude}:{start.isoformat()}".encode()).digest()
+    rng = np.random.default_rng(int.from_bytes(local_seed[:8], "little"))
+
+    data = _simulate(np.array([latitude]), np.array([longitude]), start, days, seed, rng)
+    timestamps = data["date"].astype(np.int64).tolist()
+    descriptions = WEATHER_DESCRIPTIONS[np.select(
+        [data["rain_mm"] > 5, data["rain_mm"] > 0, data["clouds"] < 20, data["clouds"] < 40, data["clouds"] < 70],
+        [5, 4, 0, 1, 2], default=3
+    )]
+    values = {name: np.round(column.astype(np.float64), 2).tolist() for name, column in data.items()
+              if column.dtype == np.float32}
+
+    current = {
+        "dt": timestamps[0],
+        "temp": values["temp_day"][0],
+        "feels_like": values["feels_like"][0],
+        "humidity": int(values["humidity"][0]),
+        "pressure": int(values["pressure"][0]),
+        "wind_speed": values["wind_speed"][0],
+        "clouds": int(values["clouds"][0]),
+        "uvi": values["uvi"][0],
+        "weather": [{"description": str(descriptions[0])}]
+    }
+
+    daily = [
+        {
+            "dt": timestamps[i],
+            "temp": {"min": values["temp_min"][i], "max": values["temp_max"][i], "day": values["temp_day"][i]},
+            "humidity": int(values["humidity"][i]),
+            "pressure": int(values["pressure"][i]),
+            "wind_speed": values["wind_speed"][i],
+            "clouds": int(values["clouds"][i]),
+            "rain": values["rain_mm"][i],
+            "pop": round(values["pop"][i] / 100, 2),
+            "uvi": values["uvi"][i],
+            "weather": [{"description": str(descriptions[i])}]
+        }
+        for i in range(days)
+    ]
+
+    return {
+        "lat": latitude,
+        "lon": longitude,
+        "timezone": "Africa/Dakar",
+        "timezone_offset": 0,
+        "current": current,
+        "daily": daily
+    }
+
+
+def day_summary_payload(latitude: float, longitude: float, day: Union[str, date],
+                        seed: int = DEFAULT_SEED) -> Dict:
+    """
+    Réponse One Call day_summary simulée (agrégats d'un jour passé)
+
+    Identique pour une même coordonnée arrondie et un même jour.
+
+    Args:
+        latitude: Latitude
+        longitude: Longitude
+        day: Jour demandé (date ou 'YYYY-MM-DD')
+        seed: Graine
+
+    Returns:
+        Dict avec structure identique à l'endpoint /onecall/day_summary
+    """
+    latitude, longitude = round(latitude, 4), round(longitude, 4)
+    day = pd.Timestamp(day).date()
+    local_seed = hashlib.sha256(f"{seed}:{latitude}:{longitude}:{day.isoformat()}".encode()).digest()
+    rng = np.random.default_rng(int.from_bytes(local_seed[:8], "little"))
+
+    data = _simulate(np.array([latitude]), np.array([longitude]), day, 1, seed, rng)
+    values = {name: round(float(column[0]), 2) for name, column in data.items() if column.dtype == np.float32}
+    temp_min, temp_max = values["temp_min"], values["temp_max"]
+
+    return {
+        "lat": latitude,
+        "lon": longitude,
+        "tz": "+00:00",
+        "date": day.isoformat(),
+        "units": "metric",
+        "cloud_cover": {"afternoon": values["clouds"]},
+        "humidity": {"afternoon": values["humidity"]},
+        "precipitation": {"total": values["rain_mm"]},
+        "temperature": {
+            "min": temp_min,
+            "max": temp_max,
+            "afternoon": values["temp_day"],
+            "night": round(temp_min + 0.1 * (temp_max - temp_min), 2),
+            "evening": round(temp_min + 0.6 * (temp_max - temp_min), 2),
+            "morning": round(temp_min + 0.25 * (temp_max - temp_min), 2),
+        },
+        "pressure": {"afternoon": values["pressure"]},
+        "wind": {"max": {"speed": round(values["wind_speed"] * 1.5, 2), "direction": 45}},
+    }
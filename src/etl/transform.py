@@ -2,12 +2,71 @@
 Module de transformation et nettoyage des données
 """
 
+import time
 import pandas as pd
 import numpy as np
 from typing import Dict, List
 from datetime import datetime, timedelta
+from dateutil.tz import tzlocal
 from loguru import logger
 
+# Champs journaliers One Call repris tels quels (hors 'dt' et 'temp')
+FORECAST_FIELDS = ["humidity", "pressure", "wind_speed", "clouds", "rain", "pop", "uvi"]
+
+# Mesures des prévisions transformées
+FORECAST_MEASURES = [
+    "temp_min", "temp_max", "temp_day", "humidity", "pressure",
+    "wind_speed", "clouds", "rain_mm", "pop", "uvi"
+]
+
+# Mesures actuelles transformées -> champ One Call 'current'
+CURRENT_FIELDS = {
+    "temperature_celsius": "temp",
+    "feels_like_celsius": "feels_like",
+    "humidity_percent": "humidity",
+    "pressure_hpa": "pressure",
+    "wind_speed_ms": "wind_speed",
+    "clouds_percent": "clouds",
+    "uvi": "uvi",
+}
+
+LOCATION_COLUMNS = ["location_id", "latitude", "longitude"]
+
+# Colonnes stockées d'une prévision, couvertes par son empreinte de contenu
+FORECAST_CONTENT_COLUMNS = FORECAST_MEASURES + [
+    "temp_amplitude", "water_stress_index", "et0_mm", "irrigation_need_mm", "disease_risk"
+]
+
+# Décimales retenues pour l'empreinte: float32 (lot) et float64 (unitaire) donnent la même valeur
+CONTENT_HASH_DECIMALS = 3
+
+
+def epoch_to_datetime(seconds) -> pd.Series:
+    """Epochs en secondes -> datetimes naïfs en heure locale (comme datetime.fromtimestamp)"""
+    # tzlocal convertit élément par élément: seules les valeurs distinctes
+    # (quelques jours pour tout un lot) sont converties
+    codes, uniques = pd.factorize(pd.Series(seconds))
+    converted = pd.to_datetime(uniques, unit="s", utc=True).tz_convert(tzlocal()).tz_localize(None)
+    return pd.Series(converted.take(codes))
+
+
+def forecast_content_hash(forecasts: pd.DataFrame) -> pd.Series:
+    """
+    Empreinte du contenu de chaque prévision (16 caractères hexadécimaux)
+
+    Calculée sur FORECAST_CONTENT_COLUMNS, hors clé (localisation, date) et
+    date d'émission: deux émissions aux valeurs identiques ont la même
+    empreinte, et le chargement ne réécrit pas la ligne en place.
+    """
+    content = forecasts.reindex(columns=FORECAST_CONTENT_COLUMNS)
+    measures = [name for name in FORECAST_CONTENT_COLUMNS if name != "disease_risk"]
+    # + 0.0 ramène -0.0 à 0.0, dont la représentation binaire diffère
+    content[measures] = content[measures].astype(np.float64).round(CONTENT_HASH_DECIMALS) + 0.0
+    content["disease_risk"] = content["disease_risk"].astype(object).where(content["disease_risk"].notna(), None)
+
+    hashes = pd.util.hash_pandas_object(content, index=False).to_numpy()
+    return pd.Series([f"{value:016x}" for value in hashes.tolist()], index=forecasts.index, dtype=object)
+
 
 class WeatherDataTransformer:
     """Transforme les données météo brutes en format exploitable"""
@@ -51,6 +110,51 @@ class WeatherDataTransformer:
             logger.error(f"Erreur transformation données météo: {e}")
             raise
 
+    @staticmethod
+    def transform_current_weather_batch(raw_batch: List[Dict], dtype=np.float32) -> pd.DataFrame:
+        """
+        Transforme les données météo actuelles de plusieurs localisations
+
+        Args:
+            raw_batch: Données extraites ('location' et 'weather') par localisation
+            dtype: Type des mesures
+
+        Returns:
+            DataFrame typé, une ligne par localisation: location_id, latitude,
+            longitude, puis les colonnes de transform_current_weather
+        """
+        try:
+            currents = [(raw_data.get("weather") or {}).get("current") or {} for raw_data in raw_batch]
+            raw = pd.DataFrame.from_records(currents, columns=["dt", *CURRENT_FIELDS.values(), "weather"])
+            locations = pd.DataFrame.from_records(
+                [raw_data.get("location") or {} for raw_data in raw_batch], columns=["latitude", "longitude"]
+            )
+
+            df = pd.DataFrame({
+                "location_id": np.arange(len(raw_batch), dtype=np.int32),
+                "latitude": locations["latitude"].astype(np.float64),
+                "longitude": locations["longitude"].astype(np.float64),
+                "timestamp": epoch_to_datetime(raw["dt"].fillna(0)),
+            })
+            for column, field in CURRENT_FIELDS.items():
+                df[column] = raw[field].astype(dtype)
+            descriptions = pd.Series([
+                weather[0].get("description", "") if isinstance(weather, list) and weather else ""
+                for weather in raw["weather"]
+            ], dtype=object)
+            df["weather_description"] = descriptions.fillna("unknown")
+
+            missing = df[list(CURRENT_FIELDS)].isna().sum()
+            for column, count in missing[missing > 0].items():
+                logger.warning(f"Valeur manquante pour {column} ({count} localisations)")
+
+            logger.info(f"Données météo actuelles transformées pour {len(df)} localisations")
+            return df
+
+        except Exception as e:
+            logger.error(f"Erreur transformation données météo: {e}")
+            raise
+
     @staticmethod
     def transform_forecast(raw_forecasts: List[Dict]) -> pd.DataFrame:
         """
@@ -62,31 +166,67 @@ class WeatherDataTransformer:
         Returns:
             DataFrame avec prévisions transformées
         """
+        frame = WeatherDataTransformer.transform_forecast_batch([{"forecast": raw_forecasts}], dtype=np.float64)
+        return frame.drop(columns=LOCATION_COLUMNS)
+
+    @staticmethod
+    def transform_forecast_batch(raw_batch: List[Dict], dtype=np.float32) -> pd.DataFrame:
+        """
+        Transforme les prévisions de plusieurs localisations en un seul DataFrame
+
+        Les prévisions brutes sont aplaties en une passe, puis normalisées
+        colonne par colonne (conversion des epochs, valeurs par défaut, pop
+        en %), sans dict intermédiaire par jour.
+
+        Args:
+            raw_batch: Données extraites ('location' et 'forecast') par localisation
+            dtype: Type des mesures
+
+        Returns:
+            DataFrame typé: location_id (rang dans le lot), latitude, longitude,
+            date, puis les mesures de FORECAST_MEASURES
+        """
         try:
-            forecasts = []
-
-            for forecast in raw_forecasts:
-                transformed = {
-                    "date": datetime.fromtimestamp(forecast.get("dt", 0)),
-                    "temp_min": forecast.get("temp", {}).get("min"),
-                    "temp_max": forecast.get("temp", {}).get("max"),
-                    "temp_day": forecast.get("temp", {}).get("day"),
-                    "humidity": forecast.get("humidity"),
-                    "pressure": forecast.get("pressure"),
-                    "wind_speed": forecast.get("wind_speed"),
-                    "clouds": forecast.get("clouds"),
-                    "rain_mm": forecast.get("rain", 0),  # Précipitations
-                    "pop": forecast.get("pop", 0) * 100,  # Probabilité de pluie en %
-                    "uvi": forecast.get("uvi")
-                }
-                forecasts.append(transformed)
-
-            df = pd.DataFrame(forecasts)
+            days = []
+            counts = np.zeros(len(raw_batch), dtype=np.int64)
+            latitudes = np.full(len(raw_batch), np.nan)
+            longitudes = np.full(len(raw_batch), np.nan)
+            for index, raw_data in enumerate(raw_batch):
+                forecast = raw_data.get("forecast") or []
+                days.extend(forecast)
+                counts[index] = len(forecast)
+                location = raw_data.get("location") or {}
+                latitudes[index] = location.get("latitude", np.nan)
+                longitudes[index] = location.get("longitude", np.nan)
+
+            raw = pd.DataFrame.from_records(days, columns=["dt", "temp", *FORECAST_FIELDS])
+            temperatures = pd.DataFrame.from_records(
+                [temp if isinstance(temp, dict) else {} for temp in raw["temp"]], columns=["min", "max", "day"]
+            )
+
+            location_id = np.repeat(np.arange(len(raw_batch), dtype=np.int32), counts)
+            df = pd.DataFrame({
+                "location_id": location_id,
+                "latitude": latitudes[location_id],
+                "longitude": longitudes[location_id],
+                "date": epoch_to_datetime(raw["dt"].fillna(0)),
+                "temp_min": temperatures["min"],
+                "temp_max": temperatures["max"],
+                "temp_day": temperatures["day"],
+                "humidity": raw["humidity"],
+                "pressure": raw["pressure"],
+                "wind_speed": raw["wind_speed"],
+                "clouds": raw["clouds"],
+                "rain_mm": raw["rain"].fillna(0),  # Précipitations
+                "pop": raw["pop"].fillna(0) * 100,  # Probabilité de pluie en %
+                "uvi": raw["uvi"],
+            })
+            df[FORECAST_MEASURES] = df[FORECAST_MEASURES].astype(dtype)
 
             # Nettoyage des valeurs aberrantes
-            df = df.replace([np.inf, -np.inf], np.nan)
+            df[FORECAST_MEASURES] = df[FORECAST_MEASURES].replace([np.inf, -np.inf], np.nan)
 
-            logger.info(f"{len(df)} prévisions transformées")
+            logger.info(f"{len(df)} prévisions transformées pour {len(raw_batch)} localisations")
             return df
 
         except Exception as e:
@@ -166,6 +306,7 @@ def transform_data_pipeline(raw_data: Dict) -> Dict:
 
     # Calcul features dérivées
     forecasts_enriched = transformer.calculate_derived_features(forecasts_df)
+    forecasts_enriched["content_hash"] = forecast_content_hash(forecasts_enriched)
 
     transformed_data = {
         "current_weather": current_weather,
@@ -181,6 +322,64 @@ def transform_data_pipeline(raw_data: Dict) -> Dict:
     return transformed_data
 
 
+def transform_batch_pipeline(raw_data_list: List[Dict]) -> Dict:
+    """
+    Pipeline de transformation de plusieurs localisations en une passe
+
+    Les prévisions de toutes les localisations sont concaténées dans un seul
+    DataFrame et les features dérivées calculées une seule fois, au lieu
+    d'un DataFrame de 7 lignes par localisation.
+
+    Args:
+        raw_data_list: Données brutes extraites (extract_many)
+
+    Returns:
+        Dict avec 'current_weather' et 'forecasts' (DataFrames, clé
+        location_id), 'locations' (métadonnées par localisation) et
+        'metadata' (volumes et débit)
+    """
+    start = time.perf_counter()
+    transformer = WeatherDataTransformer()
+
+    current_weather = transformer.transform_current_weather_batch(raw_data_list)
+    forecasts = transformer.calculate_derived_features(transformer.transform_forecast_batch(raw_data_list))
+    # Empreinte par (localisation, date): le chargement ignore les prévisions inchangées
+    forecasts["content_hash"] = forecast_content_hash(forecasts)
+
+    num_forecasts = np.bincount(forecasts["location_id"], minlength=len(raw_data_list))
+    locations = [
+        {
+            "location_id": index,
+            "location": raw_data.get("location", {}),
+            "location_name": raw_data.get("location_name"),
+            "grid_cell": raw_data.get("grid_cell"),
+            "num_forecasts": int(num_forecasts[index]),
+        }
+        for index, raw_data in enumerate(raw_data_list)
+    ]
+
+    elapsed = time.perf_counter() - start
+    rows = len(current_weather) + len(forecasts)
+    metadata = {
+        "transformed_at": datetime.now().isoformat(),
+        "num_locations": len(raw_data_list),
+        "num_forecasts": len(forecasts),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+    }
+
+    logger.info(
+        f"Pipeline de transformation par lot complété: {len(raw_data_list)} localisations, "
+        f"{rows} lignes en {elapsed:.2f}s ({metadata['rows_per_second']} lignes/s)"
+    )
+    return {
+        "current_weather": current_weather,
+        "forecasts": forecasts,
+        "locations": locations,
+        "metadata": metadata,
+    }
+
+
 if __name__ == "__main__":
     # Test avec données exemple
     from extract import extract_all_data
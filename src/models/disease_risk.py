@@ -15,8 +15,15 @@ from sklearn.preprocessing import StandardScaler, LabelEncoder
 import xgboost as xgb
 from loguru import logger
 import warnings
+
+from ..etl.synthetic import DEFAULT_SEED, generate_frame, random_locations
+
 warnings.filterwarnings('ignore')
 
+# Localisation et cultures des données d'exemple
+DAKAR_LAT, DAKAR_LON = 14.7167, -17.4677
+CROP_TYPES = ['rice', 'maize', 'millet', 'groundnut', 'cotton', 'mixed']
+
 class DiseaseRiskModel:
     """
     Modèle de prédiction de risques de maladies agricoles
@@ -219,7 +226,7 @@ class DiseaseRiskModel:
         df = self._prepare_features(df)
         
         # Colonnes de features (toutes les colonnes sauf la cible, la date et d'autres colonnes non numériques)
-        feature_cols = [col for col in df.columns if col not in ['disease_risk_level', 'date', 'created_at', 'disease_risk']]
+        feature_cols = [col for col in df.columns if col not in ['disease_risk_level', 'date', 'created_at', 'disease_risk', 'crop_type', 'crop_type_safe']]
         
         # Vérifier qu'il y a suffisamment de données
         if len(df) < 10:
@@ -263,6 +270,7 @@ class DiseaseRiskModel:
         
         # Calculer un report de classification détaillé
         class_report = classification_report(y_test, y_test_pred, 
+                                           labels=np.arange(len(self.label_encoder.classes_)),
                                            target_names=self.label_encoder.classes_,
                                            output_dict=True)
         
@@ -307,7 +315,7 @@ class DiseaseRiskModel:
         df = self._create_features_for_prediction(future_weather_data)
         
         # Colonnes de features
-        feature_cols = [col for col in df.columns if col not in ['disease_risk_level', 'date', 'created_at', 'disease_risk']]
+        feature_cols = [col for col in df.columns if col not in ['disease_risk_level', 'date', 'created_at', 'disease_risk', 'crop_type', 'crop_type_safe']]
         
         # Vérifier que toutes les colonnes de features sont présentes, créer avec 0 si absentes
         for col in feature_cols:
@@ -318,7 +326,8 @@ class DiseaseRiskModel:
         df[feature_cols] = df[feature_cols].replace([np.inf, -np.inf], np.nan)
         df[feature_cols] = df[feature_cols].fillna(df[feature_cols].mean())
         
-        X = df[feature_cols]
+        # Aligner les colonnes sur celles vues à l'entraînement
+        X = df.reindex(columns=self.model.feature_names_in_, fill_value=0.0)
         
         # Faire les prédictions
         predictions_encoded = self.model.predict(X)
@@ -395,42 +404,40 @@ class DiseaseRiskModel:
         self.label_encoder = model_data['label_encoder']
         self.scaler = model_data['scaler']
         self.is_trained = model_data['is_trained']
+        # L'encodeur restauré est déjà ajusté: ne pas le ré-entraîner sur les cultures
+        self._crop_fitted = True
         logger.info(f"Modèle chargé depuis {filepath}")
 
 
-def create_sample_data():
+def create_sample_data(days: int = 365, locations: int = 1, seed: int = DEFAULT_SEED) -> List[Dict]:
     """
     Crée des données d'exemple pour tester le modèle
+
+    Args:
+        days: Nombre de jours à partir du 2023-01-01
+        locations: Nombre de localisations (1 = Dakar), séries mises bout à bout
+        seed: Graine du générateur synthétique
+
+    Returns:
+        Enregistrements journaliers (date, temp_day, temp_mean, humidity, rain_mm, crop_type)
     """
-    dates = pd.date_range(start='2023-01-01', end='2023-12-31', freq='D')
-    n = len(dates)
-    
-    data = []
-    for i, date in enumerate(dates):
-        # Simuler des conditions météo
-        temp_day = 25 + 10 * np.sin(2 * np.pi * i / 365.25) + np.random.normal(0, 3)
-        humidity = max(30, min(95, 70 + 10 * np.sin(2 * np.pi * i / 365.25) + np.random.normal(0, 10)))
-        rain_mm = max(0, np.random.exponential(0.5))
-        
-        # Simuler des conditions qui favorisent les maladies
-        # Plus de risques pendant les périodes chaudes et humides
-        if humidity > 80 and 15 < temp_day < 30:
-            # Augmenter la probabilité de conditions favorables aux maladies
-            humidity *= 1.2
-            rain_mm += 1
-        
-        crop_type = np.random.choice(['rice', 'maize', 'millet', 'groundnut', 'cotton', 'mixed'])
-        
-        data.append({
-            'date': date,
-            'temp_day': temp_day,
-            'temp_mean': temp_day,
-            'humidity': humidity,
-            'rain_mm': rain_mm,
-            'crop_type': crop_type
-        })
-    
-    return data
+    if locations == 1:
+        latitudes, longitudes = [DAKAR_LAT], [DAKAR_LON]
+    else:
+        latitudes, longitudes = random_locations(locations, seed)
+
+    df = generate_frame(latitudes, longitudes, start="2023-01-01", days=days, seed=seed)
+    df['temp_mean'] = df['temp_day']
+
+    # Conditions favorables aux maladies: périodes chaudes et humides renforcées
+    favorable = (df['humidity'] > 80) & (df['temp_day'] > 15) & (df['temp_day'] < 30)
+    df.loc[favorable, 'humidity'] *= 1.2
+    df.loc[favorable, 'rain_mm'] += 1
+
+    rng = np.random.default_rng(seed)
+    df['crop_type'] = rng.choice(CROP_TYPES, size=len(df))
+
+    return df[['date', 'temp_day', 'temp_mean', 'humidity', 'rain_mm', 'crop_type']].to_dict('records')
 
 
 if __name__ == "__main__":
@@ -16,8 +16,14 @@ from sklearn.utils.class_weight import compute_class_weight
 import xgboost as xgb
 from loguru import logger
 import warnings
+
+from ..etl.synthetic import DEFAULT_SEED, generate_frame, random_locations
+
 warnings.filterwarnings('ignore')
 
+# Localisation des données d'exemple
+DAKAR_LAT, DAKAR_LON = 14.7167, -17.4677
+
 class DroughtDetectionModel:
     """
     Modèle de détection de sécheresse utilisant Random Forest
@@ -270,7 +276,8 @@ class DroughtDetectionModel:
             if col not in df.columns:
                 df[col] = 0.0
         
-        X = df[feature_cols]
+        # Aligner les colonnes sur celles vues à l'entraînement
+        X = df.reindex(columns=self.model.feature_names_in_, fill_value=0.0)
         
         # Faire les prédictions
         predictions = self.model.predict(X)
@@ -322,38 +329,25 @@ class DroughtDetectionModel:
         logger.info(f"Modèle chargé depuis {filepath}")
 
 
-def create_sample_data():
+def create_sample_data(days: int = 365, locations: int = 1, seed: int = DEFAULT_SEED) -> List[Dict]:
     """
     Crée des données d'exemple pour tester le modèle
+
+    Args:
+        days: Nombre de jours à partir du 2023-01-01
+        locations: Nombre de localisations (1 = Dakar), séries mises bout à bout
+        seed: Graine du générateur synthétique
+
+    Returns:
+        Enregistrements journaliers (date, temp_mean, humidity, rain_mm, temp_amplitude)
     """
-    dates = pd.date_range(start='2023-01-01', end='2023-12-31', freq='D')
-    n = len(dates)
-    
-    data = []
-    for i, date in enumerate(dates):
-        # Simuler des conditions météo
-        temp_mean = 25 + 10 * np.sin(2 * np.pi * i / 365.25) + np.random.normal(0, 3)
-        humidity = max(30, min(95, 70 + 10 * np.sin(2 * np.pi * i / 365.25) + np.random.normal(0, 10)))
-        rain_mm = max(0, np.random.exponential(0.5))
-        
-        # Simuler des conditions de sécheresse saisonnière
-        # Plus de sécheresse pendant les mois chauds et secs
-        seasonal_factor = 1 + 0.5 * np.sin(2 * np.pi * (i % 365) / 365 - np.pi/2)
-        if 150 < (i % 365) < 250:  # Saison sèche
-            humidity = max(20, humidity * 0.7)
-            rain_mm = rain_mm * 0.5
-        
-        temp_amplitude = max(5, 10 + 5 * np.random.normal(0, 1))
-        
-        data.append({
-            'date': date,
-            'temp_mean': temp_mean,
-            'humidity': humidity,
-            'rain_mm': rain_mm,
-            'temp_amplitude': temp_amplitude
-        })
-    
-    return data
+    if locations == 1:
+        latitudes, longitudes = [DAKAR_LAT], [DAKAR_LON]
+    else:
+        latitudes, longitudes = random_locations(locations, seed)
+
+    df = generate_frame(latitudes, longitudes, start="2023-01-01", days=days, seed=seed)
+    return df[['date', 'temp_mean', 'humidity', 'rain_mm', 'temp_amplitude']].to_dict('records')
 
 
 if __name__ == "__main__":
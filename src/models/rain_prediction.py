@@ -10,10 +10,17 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import joblib
 from loguru import logger
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import os
 
 
+# Valeurs neutres pour les features absentes des données (ex: nébulosité non stockée)
+DEFAULT_FEATURE_VALUES = {
+    'temp_day': 28.0, 'temp_min': 22.0, 'temp_max': 33.0, 'humidity': 60.0,
+    'pressure': 1013.0, 'wind_speed': 5.0, 'clouds': 50.0, 'pop': 30.0
+}
+
+
 class RainPredictor:
     """
     Modèle de prédiction de pluie basé sur Random Forest
@@ -93,11 +100,12 @@ class RainPredictor:
         Returns:
             DataFrame avec features préparées
         """
-        # Sélectionner les features pertinentes
-        features = df[self.feature_names].copy()
+        # Sélectionner les features pertinentes (colonnes absentes ajoutées vides)
+        features = df.reindex(columns=self.feature_names).astype(float)
 
-        # Gérer les valeurs manquantes
+        # Gérer les valeurs manquantes, puis les colonnes entièrement vides
         features = features.fillna(features.mean())
+        features = features.fillna(DEFAULT_FEATURE_VALUES)
 
         return features
 
@@ -139,6 +147,35 @@ class RainPredictor:
 
         return float(prediction)
 
+    def predict_forecast(self, forecast_data: List[Dict]) -> List[Dict]:
+        """
+        Prédit la pluie pour chaque jour d'une prévision
+
+        Args:
+            forecast_data: Liste de prévisions journalières (avec 'date')
+
+        Returns:
+            Liste de dictionnaires date / pluie prédite / confiance
+        """
+        df = pd.DataFrame(forecast_data)
+        X = self.prepare_features(df)
+        predictions = self.predict(X)
+
+        # Confiance dérivée de la dispersion des arbres de la forêt
+        tree_predictions = np.stack([tree.predict(X.values) for tree in self.model.estimators_])
+        confidence = 1 / (1 + tree_predictions.std(axis=0))
+
+        dates = df["date"] if "date" in df.columns else pd.Series(range(len(df)))
+
+        return [
+            {
+                "date": date.isoformat() if hasattr(date, "isoformat") else str(date),
+                "predicted_rain_mm": float(rain),
+                "confidence": float(conf)
+            }
+            for date, rain, conf in zip(dates, predictions, confidence)
+        ]
+
     def save_model(self, path: str):
         """Sauvegarde le modèle"""
         if not self.is_trained:
@@ -0,0 +1,149 @@
+"""
+Registre des modèles ML
+Charge les modèles une seule fois au démarrage de l'API et les partage entre les requêtes
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+from loguru import logger
+
+from .rain_prediction import RainPredictor
+from .drought_detection import DroughtDetectionModel, create_sample_data as create_drought_sample_data
+from .disease_risk import DiseaseRiskModel, create_sample_data as create_disease_sample_data
+
+
+DEFAULT_MODELS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "models"
+)
+
+
+class ModelNotReadyError(RuntimeError):
+    """Levée quand un modèle est demandé avant la fin du chargement du registre"""
+
+
+class ModelRegistry:
+    """
+    Registre partagé des modèles de pluie, sécheresse et maladies
+
+    Les modèles sont chargés depuis les artefacts `save_model` du répertoire
+    des modèles; un modèle absent est entraîné une seule fois puis sauvegardé.
+    """
+
+    MODEL_FILES = {
+        "rain": "rain_model.joblib",
+        "drought": "drought_model.joblib",
+        "disease": "disease_model.joblib",
+    }
+
+    def __init__(self, models_dir: Optional[str] = None):
+        """
+        Initialise le registre
+
+        Args:
+            models_dir: Répertoire des artefacts (défaut: MODELS_DIR ou data/models)
+        """
+        self.models_dir = models_dir or os.getenv("MODELS_DIR", DEFAULT_MODELS_DIR)
+        self._models: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.load_times: Dict[str, float] = {}
+        self.sources: Dict[str, str] = {}
+        self.is_ready = False
+
+    def model_path(self, name: str) -> str:
+        """Chemin de l'artefact d'un modèle"""
+        return os.path.join(self.models_dir, self.MODEL_FILES[name])
+
+    def _load_or_train(self, name: str):
+        """
+        Charge un modèle depuis son artefact ou l'entraîne s'il est absent
+
+        Args:
+            name: Nom du modèle (rain, drought, disease)
+
+        Returns:
+            Modèle prêt pour la prédiction
+        """
+        path = self.model_path(name)
+        exists = os.path.exists(path)
+
+        if name == "rain":
+            # RainPredictor charge l'artefact ou crée son modèle pré-entraîné
+            model = RainPredictor(model_path=path if exists else None)
+        else:
+            model = DroughtDetectionModel() if name == "drought" else DiseaseRiskModel()
+            if exists:
+                model.load_model(path)
+            else:
+                sample_data = create_drought_sample_data() if name == "drought" else create_disease_sample_data()
+                model.train(sample_data)
+
+        if not exists:
+            os.makedirs(self.models_dir, exist_ok=True)
+            model.save_model(path)
+
+        self.sources[name] = "artifact" if exists else "trained"
+        return model
+
+    def load_all(self) -> "ModelRegistry":
+        """
+        Charge tous les modèles (idempotent)
+
+        Returns:
+            Le registre, prêt à servir
+        """
+        with self._lock:
+            if self.is_ready:
+                return self
+
+            for name in self.MODEL_FILES:
+                start = time.perf_counter()
+                self._models[name] = self._load_or_train(name)
+                self.load_times[name] = round(time.perf_counter() - start, 3)
+                logger.info(f"Modèle '{name}' prêt ({self.sources[name]}, {self.load_times[name]}s)")
+
+            self.is_ready = True
+
+        return self
+
+    def get(self, name: str):
+        """
+        Retourne un modèle chargé
+
+        Args:
+            name: Nom du modèle (rain, drought, disease)
+
+        Returns:
+            Instance du modèle
+        """
+        if not self.is_ready:
+            raise ModelNotReadyError("Les modèles ne sont pas encore chargés")
+        return self._models[name]
+
+    def status(self) -> Dict:
+        """État du registre pour les sondes de disponibilité"""
+        return {
+            "ready": self.is_ready,
+            "models_dir": self.models_dir,
+            "models": {
+                name: {
+                    "loaded": name in self._models,
+                    "source": self.sources.get(name),
+                    "load_seconds": self.load_times.get(name),
+                }
+                for name in self.MODEL_FILES
+            },
+        }
+
+
+_registry: Optional[ModelRegistry] = None
+
+
+def get_registry() -> ModelRegistry:
+    """Retourne le registre de modèles du processus"""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
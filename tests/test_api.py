@@ -2,13 +2,65 @@
 Tests pour l'API FastAPI
 """
 
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
 from src.api.main import app
+from src.api.database import get_db, run_in_db_thread
+from src.api import locations
+from src.etl.cache import get_cache, invalidate_locations
+from src.etl.load import AgriculturalField, Base, DatabaseLoader, WeatherForecast, WeatherLocation, WeatherRecord
+from src.etl.spatial import encode_geohash
 
 client = TestClient(app)
 
 
+@pytest.fixture
+def sqlite_session(tmp_path, monkeypatch):
+    """Base SQLite temporaire branchée sur la dépendance get_db"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    get_cache().clear()
+    monkeypatch.setattr(locations, "_resolver", locations.LocationResolver(radius_km=5))
+    yield Session
+    app.dependency_overrides.pop(get_db, None)
+
+
+def add_forecasts(Session, latitude, longitude, days=3):
+    """Insère des prévisions de test à partir d'aujourd'hui"""
+    session = Session()
+    now = datetime.now()
+    session.add_all([
+        WeatherForecast(
+            forecast_date=now + timedelta(days=i), latitude=latitude, longitude=longitude,
+            geohash=encode_geohash(latitude, longitude),
+            temp_min=20, temp_max=30, temp_day=25, humidity=80, rain_mm=1,
+            irrigation_need_mm=6, disease_risk="high"
+        )
+        for i in range(days)
+    ])
+    # Localisation ingérée, comme l'enregistre le chargeur
+    session.merge(WeatherLocation(geohash=encode_geohash(latitude, longitude), latitude=latitude, longitude=longitude))
+    session.commit()
+    session.close()
+
+
 class TestAPI:
     """Tests pour les endpoints API"""
 
@@ -24,6 +76,12 @@ class TestAPI:
         assert response.status_code == 200
         assert response.json()["status"] == "healthy"
 
+    def test_model_endpoints_wait_for_registry(self):
+        """Test que les endpoints ML répondent 503 tant que les modèles ne sont pas chargés"""
+        assert client.get("/ready").status_code == 503
+        response = client.get("/api/models/rain-prediction?latitude=14.7167&longitude=-17.4677")
+        assert response.status_code == 503
+
     @pytest.mark.skip(reason="Nécessite clé API")
     def test_get_current_weather(self):
         """Test endpoint météo actuelle"""
@@ -37,3 +95,271 @@ class TestAPI:
         response = client.get("/api/weather/forecast?latitude=14.7167&longitude=-17.4677&days=7")
         assert response.status_code == 200
         assert "forecasts" in response.json()
+
+
+class TestDatabaseAccess:
+    """Tests pour l'accès base de données non bloquant"""
+
+    def test_run_in_db_thread_leaves_event_loop(self):
+        """Test que les appels bloquants s'exécutent hors du thread de la boucle"""
+        async def call():
+            return await run_in_db_thread(lambda: threading.current_thread().name)
+
+        assert asyncio.run(call()).startswith("db")
+
+    def test_create_field_reuses_process_loader(self, tmp_path, monkeypatch):
+        """Test création de champs via le chargeur du processus (un seul DatabaseLoader)"""
+        import src.api.database as database
+
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'fields.db'}")
+        monkeypatch.setattr(database, "_loader", None)
+        created = []
+        monkeypatch.setattr(database, "DatabaseLoader", lambda: created.append(DatabaseLoader()) or created[-1])
+
+        for name in ("Champ A", "Champ B"):
+            response = client.post("/api/fields", json={"name": name, "latitude": 14.7, "longitude": -17.4})
+            assert response.status_code == 201
+
+        assert len(created) == 1
+        session = created[0].Session()
+        assert session.query(AgriculturalField).count() == 2
+        session.close()
+
+    def test_forecast_and_irrigation(self, sqlite_session):
+        """Test prévisions et irrigation depuis la base"""
+        add_forecasts(sqlite_session, 14.7167, -17.4677)
+
+        response = client.get("/api/weather/forecast?latitude=14.7167&longitude=-17.4677&days=7")
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+
+        response = client.get("/api/predictions/irrigation?latitude=14.7167&longitude=-17.4677")
+        assert response.status_code == 200
+        assert all(item["irrigation_needed"] for item in response.json())
+
+    def test_unknown_location_returns_404(self, sqlite_session):
+        """Test 404 (et non 500) pour une localisation sans prévision"""
+        response = client.get("/api/predictions/disease-risk?latitude=0&longitude=0")
+        assert response.status_code == 404
+
+    def test_nearby_coordinates_snap_to_ingested_location(self, sqlite_session):
+        """Test qu'un champ voisin (quelques mètres) obtient les prévisions du point ingéré"""
+        add_forecasts(sqlite_session, 14.7167, -17.4677)
+
+        response = client.get("/api/weather/forecast?latitude=14.7168&longitude=-17.4678")
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+
+        response = client.get("/api/weather/forecast?latitude=14.9&longitude=-17.4677")
+        assert response.status_code == 404
+
+
+    def test_single_refresh_while_others_use_current_index(self, sqlite_session):
+        """Test qu'un seul thread reconstruit l'index, les autres gardent l'index en place"""
+        add_forecasts(sqlite_session, 14.7167, -17.4677)
+        resolver = locations.get_location_resolver()
+        session = sqlite_session()
+        resolver.refresh(session)
+
+        calls, release = [], threading.Event()
+
+        class SlowSession:
+            def execute(self, query):
+                calls.append(query)
+                release.wait(5)
+                return session.execute(query)
+
+        resolver.refreshed_at -= resolver.ttl_seconds + 1
+        rebuild = threading.Thread(target=resolver.resolve, args=(SlowSession(), 14.7167, -17.4677))
+        rebuild.start()
+        while not resolver.refreshing:
+            pass
+
+        # Pendant la reconstruction: pas de second SELECT, réponse depuis l'ancien index
+        assert resolver.resolve(SlowSession(), 14.7168, -17.4678)["geohash"] == encode_geohash(14.7167, -17.4677)
+        release.set()
+        rebuild.join()
+        session.close()
+
+        assert len(calls) == 1
+        assert "weather_forecasts" not in str(calls[0])
+
+
+class TestForecastCache:
+    """Tests pour le cache des prévisions"""
+
+    def test_second_request_served_from_cache(self, sqlite_session):
+        """Test qu'une requête répétée ne relit pas la base"""
+        add_forecasts(sqlite_session, 14.7167, -17.4677)
+        before = get_cache().stats()
+
+        client.get("/api/weather/forecast?latitude=14.7167&longitude=-17.4677")
+        client.get("/api/predictions/irrigation?latitude=14.7167&longitude=-17.4677")
+
+        stats = client.get("/api/cache/stats").json()
+        assert stats["misses"] == before["misses"] + 1
+        assert stats["hits"] == before["hits"] + 1
+
+    def test_invalidation_reloads_new_forecasts(self, sqlite_session):
+        """Test que l'invalidation ETL rend visibles les nouvelles prévisions"""
+        add_forecasts(sqlite_session, 14.7167, -17.4677, days=2)
+        assert len(client.get("/api/weather/forecast?latitude=14.7167&longitude=-17.4677").json()) == 2
+
+        add_forecasts(sqlite_session, 14.7167, -17.4677, days=1)
+        assert len(client.get("/api/weather/forecast?latitude=14.7167&longitude=-17.4677").json()) == 2
+
+        assert invalidate_locations([encode_geohash(14.7167, -17.4677)]) == 1
+        assert len(client.get("/api/weather/forecast?latitude=14.7167&longitude=-17.4677").json()) == 3
+
+
+class TestBatchEndpoints:
+    """Tests pour les endpoints multi-localisations"""
+
+    def test_forecast_batch_groups_by_location(self, sqlite_session):
+        """Test regroupement des prévisions par localisation (coordonnées et champs)"""
+        add_forecasts(sqlite_session, 14.7167, -17.4677, days=3)
+        add_forecasts(sqlite_session, 16.0179, -16.5119, days=2)
+
+        session = sqlite_session()
+        field = AgriculturalField(name="Champ Saint-Louis", latitude=16.0180, longitude=-16.5119)
+        session.add(field)
+        session.commit()
+        field_id = field.id
+        session.close()
+
+        response = client.post("/api/weather/forecast/batch", json={
+            "locations": [{"latitude": 14.7167, "longitude": -17.4677}, {"latitude": 0, "longitude": 0}],
+            "field_ids": [field_id, 9999],
+        })
+        assert response.status_code == 200
+
+        results = response.json()["results"]
+        assert [len(result["forecasts"]) for result in results] == [3, 0, 2, 0]
+        assert [("error" in result) for result in results] == [False, True, False, True]
+
+    def test_irrigation_batch(self, sqlite_session):
+        """Test recommandations d'irrigation en lot"""
+        add_forecasts(sqlite_session, 14.7167, -17.4677, days=2)
+
+        response = client.post("/api/predictions/irrigation/batch", json={
+            "locations": [{"latitude": 14.7167, "longitude": -17.4677}]
+        })
+        assert response.status_code == 200
+        assert len(response.json()["results"][0]["recommendations"]) == 2
+
+    def test_batch_size_limit(self, sqlite_session, monkeypatch):
+        """Test rejet des lots vides ou trop grands"""
+        import src.api.main as main
+        monkeypatch.setattr(main, "MAX_BATCH_SIZE", 2)
+
+        assert client.post("/api/weather/forecast/batch", json={}).status_code == 422
+        response = client.post("/api/weather/forecast/batch", json={"field_ids": [1, 2, 3]})
+        assert response.status_code == 422
+
+    def test_batch_days_bounds(self, sqlite_session):
+        """Test rejet d'un horizon hors de 1 à 16 jours"""
+        for days in (0, -1, 17):
+            response = client.post("/api/weather/forecast/batch", json={"field_ids": [1], "days": days})
+            assert response.status_code == 422
+        assert client.post("/api/weather/forecast/batch", json={"field_ids": [1], "days": 16}).status_code == 200
+
+
+class TestFieldReport:
+    """Tests pour le rapport combiné d'un champ"""
+
+    def test_report_combines_all_models(self, sqlite_session, tmp_path, monkeypatch):
+        """Test rapport irrigation / maladies / sécheresse / pluie avec durées par étape"""
+        from src.models import registry as model_registry
+        monkeypatch.setattr(
+            model_registry, "_registry",
+            model_registry.ModelRegistry(models_dir=str(tmp_path / "models")).load_all()
+        )
+
+        add_forecasts(sqlite_session, 14.7167, -17.4677, days=3)
+        session = sqlite_session()
+        field = AgriculturalField(name="Champ Dakar", latitude=14.7167, longitude=-17.4677, crop_type="rice")
+        session.add(field)
+        session.commit()
+        field_id = field.id
+        session.close()
+
+        response = client.get(f"/api/fields/{field_id}/report")
+        assert response.status_code == 200, response.text
+
+        report = response.json()
+        for section in ("irrigation", "drought", "rain"):
+            assert len(report[section]) == 3
+        assert report["disease"]["alert_count"] == 3
+        assert {"forecast_load_ms", "rain_model_ms", "drought_model_ms", "disease_model_ms", "total_ms"} <= set(report["timings"])
+
+        assert client.get("/api/fields/9999/report").status_code == 404
+
+
+class TestModelEndpoints:
+    """Tests pour les endpoints de prédiction ML"""
+
+    def test_forecast_fetch_reuses_extractor_off_event_loop(self, tmp_path, monkeypatch):
+        """Test extracteur unique du processus, appelé hors du thread de la boucle"""
+        from src.api.routers import models as model_routes
+        from src.etl.synthetic import onecall_payload
+        from src.models import registry as model_registry
+        monkeypatch.setattr(
+            model_registry, "_registry",
+            model_registry.ModelRegistry(models_dir=str(tmp_path / "models")).load_all()
+        )
+
+        class RecordingExtractor:
+            def __init__(self):
+                self.calls_on_loop = []
+
+            def get_forecast(self, latitude, longitude, days):
+                try:
+                    asyncio.get_running_loop()
+                    self.calls_on_loop.append(True)
+                except RuntimeError:
+                    self.calls_on_loop.append(False)
+                return onecall_payload(latitude, longitude)["daily"][:days]
+
+        extractor = RecordingExtractor()
+        monkeypatch.setattr(model_routes, "get_weather_extractor", lambda: extractor)
+
+        for endpoint in ("rain-prediction", "drought-prediction", "disease-risk"):
+            response = client.get(f"/api/models/{endpoint}?latitude=14.7167&longitude=-17.4677&days=3")
+            assert response.status_code == 200, response.text
+            assert len(response.json()["predictions"]) == 3
+
+        assert extractor.calls_on_loop == [False, False, False]
+
+
+class TestWeatherHistory:
+    """Tests pour l'historique agrégé"""
+
+    def test_history_reads_daily_aggregate(self, sqlite_session):
+        """Test lecture de l'agrégat journalier (vue SQLite équivalente à l'agrégat continu)"""
+        session = sqlite_session()
+        session.execute(text("""
+            CREATE VIEW weather_records_daily AS
+            SELECT date(timestamp) AS bucket, geohash,
+                   AVG(temperature_celsius) AS temperature_avg, COUNT(*) AS record_count
+            FROM weather_records GROUP BY bucket, geohash
+        """))
+        now = datetime.now().replace(hour=12)
+        session.add_all([
+            WeatherRecord(
+                timestamp=now - timedelta(days=day, hours=hour), latitude=14.7167, longitude=-17.4677,
+                geohash=encode_geohash(14.7167, -17.4677), temperature_celsius=20 + hour
+            )
+            for day in range(3) for hour in (0, 2)
+        ])
+        session.add(WeatherLocation(geohash=encode_geohash(14.7167, -17.4677), latitude=14.7167, longitude=-17.4677))
+        session.commit()
+        session.close()
+
+        response = client.get("/api/weather/history?latitude=14.7167&longitude=-17.4677&days=7")
+        assert response.status_code == 200, response.text
+        history = response.json()["history"]
+        assert len(history) == 3
+        assert all(item["record_count"] == 2 and item["temperature_avg"] == 21 for item in history)
+
+        response = client.get("/api/weather/history?latitude=14.7167&longitude=-17.4677&granularity=hourly")
+        assert response.status_code == 422
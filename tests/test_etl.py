@@ -2,9 +2,73 @@
 Tests pour le module ETL
 """
 
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import numpy as np
+import pandas as pd
 import pytest
-from src.etl.extract import WeatherDataExtractor
+import requests
+from src.etl.extract import WeatherDataExtractor, extract_many, group_locations
+from src.etl.http_cache import ResponseCache
+from src.etl.openweather_stub import OpenWeatherStub
+import src.etl.quota as quota
+from src.etl.quota import RequestBudget, TokenBucket
 from src.etl.transform import WeatherDataTransformer
+from src.etl.cache import TTLCache
+from src.etl.spatial import LocationIndex, encode_geohash
+from src.etl.synthetic import generate_weather, onecall_payload, random_locations
+
+
+@pytest.fixture
+def one_call_server(monkeypatch):
+    """Serveur One Call local; retourne une fabrique (échecs initiaux, 503 par défaut) -> liste des appels"""
+    servers = []
+
+    def start(fail_first: int = 0, status_code: int = 503, retry_after: Optional[str] = None):
+        calls = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                calls.append(self.path)
+                failing = len(calls) <= fail_first
+                if failing:
+                    status, body = status_code, {}
+                else:
+                    status, body = 200, {"current": {"temp": 30}, "daily": [{"dt": 0}] * 7}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                if failing and retry_after is not None:
+                    self.send_header("Retry-After", retry_after)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setenv("USE_MOCK_DATA", "false")
+        monkeypatch.setenv("HTTP_CACHE_TTL_SECONDS", "0")
+        monkeypatch.setenv("OPENWEATHER_API_KEY", "test")
+        monkeypatch.setenv("OPENWEATHER_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+        # Budget partagé isolé du fichier de data/cache
+        monkeypatch.setenv("OPENWEATHER_BUDGET_PATH", "")
+        monkeypatch.setattr(quota, "_budget", None)
+        return calls
+
+    yield start
+    for server in servers:
+        server.shutdown()
 
 
 class TestWeatherDataExtractor:
@@ -23,6 +87,344 @@ class TestWeatherDataExtractor:
         assert "current" in data
 
 
+class TestConcurrentExtraction:
+    """Tests pour l'extraction concurrente"""
+
+    def test_extract_many_keeps_location_order(self, monkeypatch):
+        """Test extraction parallèle (mode mock) dans l'ordre des localisations"""
+        monkeypatch.setenv("USE_MOCK_DATA", "true")
+        locations = [{"name": f"champ-{i}", "lat": 14.0 + i / 100, "lon": -17.0} for i in range(20)]
+
+        results = extract_many(locations, max_workers=4)
+
+        assert [data["location_name"] for data in results] == [location["name"] for location in locations]
+        assert all(len(data["forecast"]) == 7 for data in results)
+
+    def test_transient_error_is_retried(self, one_call_server):
+        """Test nouvelle tentative après une réponse 503"""
+        calls = one_call_server(fail_first=1)
+
+        data = WeatherDataExtractor().get_current_weather(14.7167, -17.4677)
+
+        assert data["current"]["temp"] == 30
+        assert len(calls) == 2
+
+    def test_retries_follow_max_retries_and_retry_after(self, one_call_server, monkeypatch):
+        """Test max_retries nouvelles tentatives après le premier appel, délai Retry-After sur 429"""
+        monkeypatch.setenv("OPENWEATHER_MAX_RETRIES", "2")
+        calls = one_call_server(fail_first=2, status_code=429, retry_after="1")
+        extractor = WeatherDataExtractor(budget=RequestBudget(0, 0))
+
+        start = time.monotonic()
+        assert extractor.get_current_weather(14.7167, -17.4677)["current"]["temp"] == 30
+        # Backoff exponentiel seul: 0.5 s puis 1 s
+        assert time.monotonic() - start >= 2
+        assert len(calls) == 3
+        # Chaque tentative est décomptée du budget
+        assert extractor.budget.calls == 3
+
+        # Au-delà de max_retries, l'erreur remonte
+        calls = one_call_server(fail_first=3, retry_after="0")
+        with pytest.raises(requests.exceptions.HTTPError):
+            WeatherDataExtractor(budget=RequestBudget(0, 0)).get_current_weather(14.7167, -17.4677)
+        assert len(calls) == 3
+
+
+class TestSyntheticWeather:
+    """Tests pour le générateur de données synthétiques"""
+
+    def test_columns_are_reproducible(self):
+        """Test N x D lignes identiques pour une même graine"""
+        latitudes, longitudes = random_locations(50)
+        first = generate_weather(latitudes, longitudes, "2024-01-01", 30)
+        second = generate_weather(latitudes, longitudes, "2024-01-01", 30)
+
+        assert len(first["temp_day"]) == 50 * 30
+        assert all((first[name] == second[name]).all() for name in first)
+        assert (first["temp_min"] <= first["temp_max"]).all()
+
+    def test_spatial_correlation_and_rainy_season(self):
+        """Test anomalies corrélées entre voisins, pluies concentrées en saison humide"""
+        frame = pd.DataFrame(generate_weather([14.70, 14.72, 16.5], [-17.40, -17.41, -12.0], "2024-01-01", 366))
+        temperatures = frame.pivot(index="date", columns="location_id", values="temp_day").corr()
+        assert temperatures.loc[0, 1] > temperatures.loc[0, 2]
+
+        monthly_rain = frame.groupby(frame["date"].dt.month)["rain_mm"].mean()
+        assert monthly_rain[8] > 5 * monthly_rain[2]
+
+    def test_payload_is_deterministic_per_coordinate(self):
+        """Test même réponse One Call pour une même coordonnée arrondie"""
+        assert onecall_payload(14.71671, -17.4677) == onecall_payload(14.7167, -17.46771)
+        assert onecall_payload(14.7167, -17.4677) != onecall_payload(13.4, -16.0)
+        assert len(onecall_payload(14.7167, -17.4677)["daily"]) == 8
+
+
+class TestOpenWeatherStub:
+    """Tests pour le serveur OpenWeather local"""
+
+    def test_extraction_survives_errors_and_throttling(self, monkeypatch):
+        """Test extraction via HTTP malgré erreurs 5xx et réponses 429"""
+        monkeypatch.setenv("USE_MOCK_DATA", "false")
+        monkeypatch.setenv("HTTP_CACHE_TTL_SECONDS", "0")
+        monkeypatch.setenv("OPENWEATHER_API_KEY", "test")
+        monkeypatch.setenv("OPENWEATHER_MAX_RETRIES", "10")
+
+        with OpenWeatherStub(error_rate=0.2, rate_limit=20, burst=5, api_key="test") as stub:
+            monkeypatch.setenv("OPENWEATHER_BASE_URL", stub.url)
+            locations = [{"lat": 14.0 + i / 10, "lon": -17.0} for i in range(10)]
+            results = extract_many(locations, max_workers=10, budget=RequestBudget(0, 0), cell_degrees=0)
+
+        stats = stub.stats()
+        assert len(results) == 10
+        assert stats["ok"] == 10
+        assert stats["throttled"] > 0
+        assert results[3]["weather"] == onecall_payload(14.3, -17.0)
+        assert "forecast" in results[0] and len(results[0]["forecast"]) == 7
+
+
+class TestBackfill:
+    """Tests pour le backfill de l'historique journalier"""
+
+    @pytest.fixture
+    def loader(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("USE_MOCK_DATA", "true")
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.load import DatabaseLoader
+        return DatabaseLoader()
+
+    def test_resume_skips_loaded_partitions(self, loader):
+        """Test relance idempotente: seules les journées manquantes sont extraites"""
+        from datetime import date
+        from src.etl.backfill import run_backfill
+        from src.etl.load import WeatherHistory
+
+        locations = [{"lat": 14.0 + i / 10, "lon": -16.0} for i in range(3)]
+        first = run_backfill(locations, date(2022, 1, 1), date(2022, 1, 10), days_per_batch=4, loader=loader)
+        second = run_backfill(locations, date(2022, 1, 1), date(2022, 1, 15), days_per_batch=4, loader=loader)
+
+        assert first["loaded"] == 30
+        assert second["already_loaded"] == 30
+        assert second["loaded"] == second["calls"] == 15
+        session = loader.Session()
+        assert session.query(WeatherHistory).count() == 45
+        session.close()
+
+    def test_failed_days_are_retried_on_next_run(self, loader):
+        """Test journées en échec laissées manquantes, puis reprises"""
+        from datetime import date
+        from src.etl.backfill import DaySummarySource, run_backfill
+
+        class FlakySource(DaySummarySource):
+            def fetch(self, latitude, longitude, day):
+                if day.day % 2:
+                    raise RuntimeError("HTTP 503")
+                return super().fetch(latitude, longitude, day)
+
+        locations = [{"lat": 14.0, "lon": -16.0}]
+        interrupted = run_backfill(locations, date(2022, 8, 1), date(2022, 8, 10), FlakySource(), loader=loader)
+        resumed = run_backfill(locations, date(2022, 8, 1), date(2022, 8, 10), loader=loader)
+
+        assert interrupted["loaded"] == interrupted["failed"] == 5
+        assert resumed["already_loaded"] == 5
+        assert resumed["loaded"] == resumed["calls"] == 5
+
+    def test_file_source(self, loader, tmp_path):
+        """Test historique lu depuis un fichier CSV local"""
+        from datetime import date
+        from src.etl.backfill import FileHistorySource, run_backfill
+
+        pd.DataFrame({
+            "date": ["2020-07-01", "2020-07-02"],
+            "latitude": [14.01, 14.01],
+            "longitude": [-16.01, -16.01],
+            "temp_max": [33.5, 34.0],
+            "rain_mm": [12.0, 0.0],
+        }).to_csv(tmp_path / "historique.csv", index=False)
+
+        report = run_backfill([{"lat": 14.02, "lon": -16.02}], date(2020, 7, 1), date(2020, 7, 3),
+                              FileHistorySource(str(tmp_path / "historique.csv")), loader=loader)
+
+        assert report["loaded"] == 2
+        assert report["failed"] == 1  # 3 juillet absent du fichier
+        history = pd.read_sql("SELECT date, temp_max, rain_mm FROM weather_history ORDER BY date", loader.engine)
+        assert history["temp_max"].tolist() == [33.5, 34.0]
+
+    def test_day_summary_over_http(self, monkeypatch):
+        """Test endpoint day_summary du serveur local via l'extracteur"""
+        from datetime import date
+        from src.etl.backfill import day_summary_to_row
+
+        monkeypatch.setenv("USE_MOCK_DATA", "false")
+        monkeypatch.setenv("HTTP_CACHE_TTL_SECONDS", "0")
+        monkeypatch.setenv("OPENWEATHER_API_KEY", "test")
+
+        with OpenWeatherStub() as stub:
+            monkeypatch.setenv("OPENWEATHER_BASE_URL", stub.url)
+            payload = WeatherDataExtractor(budget=RequestBudget(0, 0)).get_day_summary(14.7, -17.4, date(2021, 8, 15))
+
+        row = day_summary_to_row(payload)
+        assert payload["date"] == "2021-08-15"
+        assert row["temp_min"] <= row["temp_mean"] <= row["temp_max"]
+        assert row["rain_mm"] == payload["precipitation"]["total"]
+
+
+class TestGridDeduplication:
+    """Tests pour le regroupement des champs par cellule de grille"""
+
+    def test_one_call_per_cell_fanned_out_to_fields(self, one_call_server):
+        """Test un appel par cellule, recopié avec les coordonnées propres de chaque champ"""
+        calls = one_call_server()
+        locations = [
+            {"name": "champ-1", "lat": 14.7101, "lon": -17.4601},
+            {"name": "champ-2", "lat": 14.7149, "lon": -17.4649},
+            {"name": "champ-3", "lat": 14.8101, "lon": -17.4601},
+        ]
+
+        assert len(group_locations(locations, cell_degrees=0.05)) == 2
+        results = extract_many(locations, budget=RequestBudget(0, 0), cell_degrees=0.05)
+
+        assert len(calls) == 2
+        assert [data["location"]["latitude"] for data in results] == [14.7101, 14.7149, 14.8101]
+        assert results[0]["grid_cell"] == results[1]["grid_cell"] == {"latitude": 14.725, "longitude": -17.475}
+
+    def test_field_locations_ordered_by_grid_band(self, tmp_path, monkeypatch):
+        """Test lecture des champs par bande de latitude (arrondi inférieur), ou par id sans grille"""
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        import src.etl.load as load
+
+        loader = load.DatabaseLoader()
+        for name, latitude, longitude in [("nord", 0.01, 0.03), ("sud", -0.01, 0.04), ("nord-ouest", 0.02, 0.02)]:
+            loader.create_field(name, latitude, longitude)
+
+        # -0.01 et +0.01 ne partagent pas la même bande
+        assert [field["name"] for field in loader.iter_field_locations()] == ["sud", "nord-ouest", "nord"]
+
+        monkeypatch.setattr(load, "GRID_CELL_DEGREES", 0)
+        assert [field["name"] for field in loader.iter_field_locations()] == ["nord", "sud", "nord-ouest"]
+
+
+class TestRequestBudget:
+    """Tests pour le budget de requêtes OpenWeather"""
+
+    def test_token_bucket_limits_rate(self):
+        """Test attente quand le seau est vide"""
+        bucket = TokenBucket(rate=20, capacity=2)
+        waits = [bucket.acquire() for _ in range(4)]
+
+        assert waits[:2] == [0.0, 0.0]
+        assert sum(waits[2:]) == pytest.approx(0.1, abs=0.05)
+
+    def test_one_call_per_location_and_priority_under_daily_cap(self, one_call_server):
+        """Test un appel par coordonnée, doublons évités, priorités servies avant épuisement"""
+        calls = one_call_server()
+        budget = RequestBudget(calls_per_minute=0, calls_per_day=2)
+        locations = [
+            {"name": "a", "lat": 14.0, "lon": -17.0},
+            {"name": "b", "lat": 15.0, "lon": -17.0, "priority": 1},
+            {"name": "b-bis", "lat": 15.00001, "lon": -17.0},
+            {"name": "c", "lat": 16.0, "lon": -17.0, "priority": 1},
+        ]
+
+        results = extract_many(locations, max_workers=1, budget=budget)
+
+        assert [data["location_name"] for data in results] == ["b", "b-bis", "c"]
+        assert len(calls) == 2
+        assert budget.stats()["deduplicated"] == 1
+        assert budget.stats()["rejected"] == 1
+        assert budget.remaining_today() == 0
+
+
+    def test_budget_shared_between_instances_and_processes(self, tmp_path):
+        """Test quota journalier commun à deux instances et à un autre processus"""
+        import subprocess
+        path = str(tmp_path / "budget.sqlite")
+        first = RequestBudget(calls_per_minute=0, calls_per_day=4, path=path)
+        second = RequestBudget(calls_per_minute=0, calls_per_day=4, path=path)
+
+        first.acquire()
+        second.acquire()
+        subprocess.run(
+            [sys.executable, "-c",
+             f"from src.etl.quota import RequestBudget; RequestBudget(0, 4, path={path!r}).acquire()"],
+            check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        first.acquire()
+
+        with pytest.raises(quota.QuotaExceededError):
+            second.acquire()
+        assert first.calls_today == second.calls_today == 4
+        assert first.stats()["calls"] == 2 and second.stats()["rejected"] == 1
+
+    def test_shared_token_bucket_limits_rate_across_instances(self, tmp_path):
+        """Test seau à jetons commun: la seconde instance attend les jetons consommés par la première"""
+        path = str(tmp_path / "budget.sqlite")
+        first = RequestBudget(calls_per_minute=1200, calls_per_day=0, path=path)
+        second = RequestBudget(calls_per_minute=1200, calls_per_day=0, path=path)
+        first._bucket.capacity = second._bucket.capacity = 2
+
+        first.acquire()
+        first.acquire()
+        second.acquire()
+
+        assert second.stats()["waited_seconds"] == pytest.approx(0.05, abs=0.03)
+
+
+class TestResponseCache:
+    """Tests pour le cache disque des réponses HTTP"""
+
+    def test_key_ignores_api_key_and_rounds_coordinates(self, tmp_path):
+        """Test clé indépendante de appid et des décimales au-delà de la précision"""
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+        key = cache.make_key("/onecall", {"lat": 14.71671, "lon": -17.4677, "appid": "a"}, now=1000)
+
+        assert key == cache.make_key("/onecall", {"lat": 14.71669, "lon": -17.4677, "appid": "b"}, now=1000)
+        assert key != cache.make_key("/onecall", {"lat": 14.7167, "lon": -17.4677}, now=1000 + cache.ttl_seconds)
+
+    def test_persistence_and_lru_eviction(self, tmp_path):
+        """Test relecture par une autre instance et éviction de l'entrée la moins récemment lue"""
+        path = str(tmp_path / "cache.sqlite")
+        cache = ResponseCache(path, max_bytes=60)
+        cache.set("a", "/onecall", {"value": "x" * 10})
+        cache.set("b", "/onecall", {"value": "y" * 10})
+        assert cache.get("a") is not None
+        cache.set("c", "/onecall", {"value": "z" * 10})
+
+        reopened = ResponseCache(path, max_bytes=60)
+        assert reopened.get("a") == {"value": "x" * 10}
+        assert reopened.get("b") is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_total_size_tracked_without_scanning(self, tmp_path):
+        """Test taille totale tenue à jour (remplacement, éviction, expiration) sans SUM sur la table"""
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=60)
+        statements = []
+        cache._connection.set_trace_callback(statements.append)
+        cache.set("a", "/onecall", {"value": "x" * 10})
+        cache.set("a", "/onecall", {"value": "x" * 5})
+        cache.set("b", "/onecall", {"value": "y" * 10})
+        assert not any("SUM" in statement for statement in statements)
+
+        cache.set("c", "/onecall", {"value": "z" * 10})
+        cache._connection.execute("UPDATE responses SET expires_at = 0 WHERE key = 'c'")
+        assert cache.get("c") is None
+        cache._connection.set_trace_callback(None)
+
+        actual = cache._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        assert cache.stats()["size_bytes"] == actual == len('{"value": "yyyyyyyyyy"}')
+        assert cache.stats()["evictions"] == 1
+
+    def test_extractor_reads_through_cache(self, tmp_path, one_call_server):
+        """Test un seul appel HTTP pour deux lectures des mêmes coordonnées"""
+        calls = one_call_server()
+        extractor = WeatherDataExtractor(response_cache=ResponseCache(str(tmp_path / "cache.sqlite")))
+
+        extractor.get_current_weather(14.7167, -17.4677)
+        extractor.get_current_weather(14.7167, -17.4677)
+
+        assert len(calls) == 1
+        assert extractor.response_cache.stats()["hits"] == 1
+
+
 class TestWeatherDataTransformer:
     """Tests pour la transformation de données"""
 
@@ -49,3 +451,602 @@ class TestWeatherDataTransformer:
         assert result["temperature_celsius"] == 25.5
         assert result["humidity_percent"] == 70
         assert result["weather_description"] == "clear sky"
+
+    def test_transform_forecast_batch(self):
+        """Test un DataFrame typé pour plusieurs localisations, valeurs par défaut comprises"""
+        raw_batch = [
+            {"location": {"latitude": 14.7, "longitude": -17.4},
+             "forecast": [{"dt": 1234567890, "temp": {"min": 22, "max": 33, "day": 28}, "humidity": 70, "pop": 0.4}] * 2},
+            {"location": {"latitude": 16.0, "longitude": -16.5}, "forecast": []},
+            {"location": {"latitude": 13.4, "longitude": -16.6}, "forecast": [{"dt": 1234654290, "rain": 4.5}]},
+        ]
+
+        df = WeatherDataTransformer.transform_forecast_batch(raw_batch)
+
+        assert df["location_id"].tolist() == [0, 0, 2]
+        assert df["latitude"].tolist() == [14.7, 14.7, 13.4]
+        assert df["temp_max"].dtype == "float32"
+        assert df["pop"].tolist()[0] == pytest.approx(40.0)
+        assert df["rain_mm"].tolist() == [0.0, 0.0, 4.5]
+        assert pd.isna(df["temp_max"].iloc[2])
+        assert df["date"].iloc[0] == pd.Timestamp(datetime.fromtimestamp(1234567890))
+
+        single = WeatherDataTransformer.transform_forecast(raw_batch[0]["forecast"])
+        assert "location_id" not in single.columns
+        assert single["temp_day"].tolist() == [28.0, 28.0]
+
+
+class TestTTLCache:
+    """Tests pour le cache LRU en mémoire"""
+
+    def test_lru_eviction(self):
+        """Test éviction de l'entrée la moins récemment utilisée"""
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_expiration(self):
+        """Test expiration des entrées après le TTL"""
+        cache = TTLCache(max_entries=10, ttl_seconds=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_invalidation_by_geohash(self):
+        """Test invalidation des seules clés d'une localisation, sans parcourir le cache"""
+        from src.etl.cache import forecast_cache_key
+
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        cache.set_many({
+            forecast_cache_key("efsh6z", 7, "2025-01-01"): [1],
+            forecast_cache_key("efsh6z", 3, "2025-01-01"): [2],
+            forecast_cache_key("efsm1b", 7, "2025-01-01"): [3],
+        })
+
+        assert cache.delete_geohashes(["efsh6z"]) == 2
+        assert cache.get_many([
+            forecast_cache_key("efsh6z", 7, "2025-01-01"), forecast_cache_key("efsm1b", 7, "2025-01-01")
+        ]) == [None, [3]]
+        assert cache.delete_geohashes(["efsh6z"]) == 0
+
+    def test_loader_invalidates_only_rewritten_locations(self, tmp_path, monkeypatch):
+        """Test invalidation limitée aux geohashes dont l'upsert a réécrit des prévisions"""
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        import src.etl.cache as cache_module
+        from src.etl.cache import forecast_cache_key
+        from src.etl.load import DatabaseLoader
+
+        cache = TTLCache()
+        monkeypatch.setattr(cache_module, "_cache", cache)
+        loader = DatabaseLoader()
+        frame = pd.DataFrame({
+            "latitude": [14.7167, 16.0179], "longitude": [-17.4677, -16.5119],
+            "date": [pd.Timestamp("2025-01-01")] * 2, "temp_max": [30.0, 31.0],
+            "created_at": [pd.Timestamp("2025-01-01 06:00")] * 2,
+        })
+        loader.bulk_sync_forecasts(frame)
+
+        dakar, saint_louis = encode_geohash(14.7167, -17.4677), encode_geohash(16.0179, -16.5119)
+        cache.set_many({forecast_cache_key(dakar, 7, "2025-01-01"): [1], forecast_cache_key(saint_louis, 7, "2025-01-01"): [2]})
+
+        reissued = frame.assign(created_at=pd.Timestamp("2025-01-02 06:00"))
+        reissued.loc[1, "temp_max"] = 29.0
+        assert loader.bulk_sync_forecasts(reissued)["written"] == 1
+
+        assert cache.get(forecast_cache_key(dakar, 7, "2025-01-01")) == [1]
+        assert cache.get(forecast_cache_key(saint_louis, 7, "2025-01-01")) is None
+
+    def test_etl_refuses_process_local_cache(self, monkeypatch):
+        """Test l'ETL hors API exige un cache partagé pour l'invalidation"""
+        import src.etl.cache as cache_module
+        from src.etl.cache import require_shared_cache
+
+        monkeypatch.setattr(cache_module, "_cache", TTLCache())
+        with pytest.raises(RuntimeError, match="CACHE_BACKEND=redis"):
+            require_shared_cache()
+
+        class SharedCache(TTLCache):
+            shared = True
+
+        monkeypatch.setattr(cache_module, "_cache", SharedCache())
+        require_shared_cache()
+
+
+class TestSpatialIndex:
+    """Tests pour l'indexation spatiale des localisations"""
+
+    def test_encode_geohash(self):
+        """Test encodage geohash (valeur de référence)"""
+        assert encode_geohash(57.64911, 10.40744, precision=11) == "u4pruydqqvj"
+
+    def test_nearest_within_radius(self):
+        """Test recherche du plus proche voisin dans le rayon"""
+        index = LocationIndex([
+            {"latitude": 14.7167, "longitude": -17.4677, "geohash": "dakar"},
+            {"latitude": 16.0179, "longitude": -16.5119, "geohash": "saint-louis"},
+        ])
+
+        assert index.nearest(14.7168, -17.4677, radius_km=1)["geohash"] == "dakar"
+        assert index.nearest(15.5, -17.0, radius_km=1) is None
+        assert LocationIndex([]).nearest(14.7, -17.4, radius_km=1) is None
+
+
+class TestArtifacts:
+    """Tests pour les artefacts Arrow échangés entre tâches"""
+
+    def test_artifact_round_trip_across_parts(self, tmp_path):
+        """Test types de colonnes et ordre conservés sur plusieurs fichiers"""
+        from src.etl.artifacts import read_artifact, write_artifact
+
+        frame = pd.DataFrame({
+            "location_id": np.arange(250, dtype=np.int32),
+            "date": pd.date_range("2024-01-01", periods=250, freq="h"),
+            "humidity": np.linspace(0, 100, 250, dtype=np.float32),
+            "disease_risk": ["low", "high"] * 125,
+        })
+        artifact = write_artifact(frame, "scheduled__2024-01-01T06:00:00+00:00", "forecasts",
+                                  base_dir=str(tmp_path), part_rows=100)
+
+        assert artifact["rows"] == 250
+        assert artifact["parts"] == 3
+        assert ":" not in os.path.relpath(artifact["path"], tmp_path)
+        pd.testing.assert_frame_equal(read_artifact(artifact["path"]), frame)
+
+    def test_read_artifact_filters_one_shard(self, tmp_path):
+        """Test lecture des seules localisations d'un shard"""
+        from src.etl.artifacts import read_artifact, write_artifact
+
+        plan = pd.DataFrame({"lat": np.linspace(12.5, 16.5, 10), "shard": np.arange(10) // 4})
+        artifact = write_artifact(plan, "manual_run", "shards", base_dir=str(tmp_path))
+
+        shard = read_artifact(artifact["path"], filters=[("shard", "==", 1)])
+        assert shard["lat"].tolist() == plan["lat"].iloc[4:8].tolist()
+
+    def test_raw_artifact_round_trip(self, tmp_path):
+        """Test réponses brutes relues à l'identique"""
+        from src.etl.artifacts import read_raw_artifact, write_raw_artifact
+
+        raw_data_list = [
+            {"location": {"latitude": 14.0, "longitude": -17.0}, "location_name": "Dakar",
+             "forecast": [{"dt": 1704067200, "temp": {"min": 20.0, "max": 30.0}}]},
+            {"location": {"latitude": 16.0, "longitude": -16.5}, "location_name": "Saint-Louis",
+             "forecast": []},
+        ]
+        artifact = write_raw_artifact(raw_data_list, "manual_run", base_dir=str(tmp_path))
+
+        assert read_raw_artifact(artifact["path"]) == raw_data_list
+
+    def test_raw_artifact_selects_locations_before_decoding(self, tmp_path, monkeypatch):
+        """Test relecture d'une localisation: seule sa réponse est décodée"""
+        from src.etl import artifacts
+        from src.etl.spatial import encode_geohash
+
+        raw_data_list = [
+            {"location": {"latitude": 14.0 + i, "longitude": -17.0}, "location_name": f"loc{i}", "forecast": []}
+            for i in range(3)
+        ]
+        artifact = artifacts.write_raw_artifact(raw_data_list, "manual_run", base_dir=str(tmp_path))
+        decoded, loads = [], json.loads
+        monkeypatch.setattr(artifacts.json, "loads", lambda payload: decoded.append(payload) or loads(payload))
+
+        reused = artifacts.read_raw_artifact(artifact["path"], geohashes={encode_geohash(15.0, -17.0)})
+
+        assert reused == [raw_data_list[1]]
+        assert len(decoded) == 1
+
+    def test_cleanup_keeps_recent_runs(self, tmp_path):
+        """Test suppression des seuls runs au-delà de la rétention"""
+        from src.etl.artifacts import cleanup_artifacts, write_artifact
+
+        frame = pd.DataFrame({"value": [1.0]})
+        old = write_artifact(frame, "old_run", "forecasts", base_dir=str(tmp_path))
+        recent = write_artifact(frame, "recent_run", "forecasts", base_dir=str(tmp_path))
+        two_days_ago = time.time() - 48 * 3600
+        for part in os.listdir(old["path"]):
+            os.utime(os.path.join(old["path"], part), (two_days_ago, two_days_ago))
+
+        removed = cleanup_artifacts(retention_hours=24, base_dir=str(tmp_path))
+
+        assert removed == [os.path.dirname(old["path"])]
+        assert os.path.exists(recent["path"])
+
+
+class TestStreamingPipeline:
+    """Tests pour le pipeline ETL en flux"""
+
+    def test_chunks_are_bounded_by_backpressure(self):
+        """Test paquets de taille fixe et nombre de paquets en vol borné par les files"""
+        from src.etl.pipeline import run_streaming_pipeline
+
+        counters = {"extracted": 0, "loaded": 0, "max_in_flight": 0}
+        sizes = []
+
+        def extract(chunk):
+            counters["extracted"] += 1
+            counters["max_in_flight"] = max(counters["max_in_flight"], counters["extracted"] - counters["loaded"])
+            sizes.append(len(chunk))
+            return chunk
+
+        def load(transformed):
+            time.sleep(0.01)  # étape la plus lente
+            counters["loaded"] += 1
+            return {"forecast_count": len(transformed)}
+
+        locations = ({"lat": 14.0, "lon": -17.0 + i / 1000} for i in range(95))
+        report = run_streaming_pipeline(locations, chunk_size=10, max_memory_mb=0, queue_size=1,
+                                        extract=extract, transform=lambda raw: raw, load=load)
+
+        assert sizes == [10] * 9 + [5]
+        assert report["rows"] == 95
+        assert report["chunks"] == 10
+        # Une file de 1 entre chaque étape: au plus un paquet par étape et par file
+        assert counters["max_in_flight"] <= 5
+        assert all("rss_mb" in chunk for chunk in report["chunk_stats"])
+
+    def test_memory_ceiling_shrinks_chunks(self):
+        """Test paquets réduits tant que le plafond mémoire reste dépassé"""
+        from src.etl.pipeline import run_streaming_pipeline
+
+        sizes = []
+        report = run_streaming_pipeline(
+            [{"lat": 14.0, "lon": -17.0}] * 20, chunk_size=8, max_memory_mb=1,
+            extract=lambda chunk: sizes.append(len(chunk)) or chunk,
+            transform=lambda raw: raw, load=lambda transformed: {"forecast_count": len(transformed)}
+        )
+
+        assert sizes[:3] == [4, 2, 1]
+        assert report["rows"] == 20
+        assert report["chunk_size"] == 1
+
+    def test_batch_etl_of_one_shard(self, tmp_path, monkeypatch):
+        """Test extraction (mock), transformation et chargement d'un shard"""
+        monkeypatch.setenv("USE_MOCK_DATA", "true")
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.pipeline import run_batch_etl
+
+        report = run_batch_etl([{"name": f"champ-{i}", "lat": 14.0 + i / 10, "lon": -16.0} for i in range(5)])
+
+        assert report["locations"] == report["extracted"] == 5
+        assert report["rows"] == 5 * 8
+
+    def test_streaming_etl_into_database(self, tmp_path, monkeypatch):
+        """Test extraction (mock), transformation et chargement par paquets"""
+        monkeypatch.setenv("USE_MOCK_DATA", "true")
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.load import DatabaseLoader, WeatherRecord
+        from src.etl.pipeline import run_streaming_pipeline
+
+        locations = [{"name": f"champ-{i}", "lat": 14.0 + i / 10, "lon": -16.0} for i in range(25)]
+        report = run_streaming_pipeline(iter(locations), chunk_size=10, max_memory_mb=0)
+
+        assert report["chunks"] == 3
+        assert report["extracted"] == 25
+        assert report["rows"] == 25 * 8
+
+        session = DatabaseLoader().Session()
+        assert session.query(WeatherRecord).count() == 25
+        session.close()
+
+    def test_streaming_retry_skips_loaded_locations(self, tmp_path, monkeypatch):
+        """Test paquet en échec: le run en flux lève, la relance ne reprend que ses localisations"""
+        monkeypatch.setenv("USE_MOCK_DATA", "true")
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.ledger import RunLedger
+        from src.etl.load import DatabaseLoader, WeatherRecord
+        from src.etl.pipeline import run_streaming_pipeline
+
+        ledger = RunLedger(str(tmp_path / "ledger.sqlite"))
+        locations = [{"name": f"champ-{i}", "lat": 14.0 + i / 10, "lon": -16.0} for i in range(25)]
+        requested = []
+
+        def flaky_extract(chunk):
+            requested.append(len(chunk))
+            # Premier run: le deuxième paquet échoue entièrement
+            if len(requested) == 2:
+                raise RuntimeError("API indisponible")
+            return extract_many(chunk)
+
+        with pytest.raises(RuntimeError, match="10/25"):
+            run_streaming_pipeline(iter(locations), chunk_size=10, max_memory_mb=0, extract=flaky_extract,
+                                   run_id="run-4", ledger=ledger)
+
+        report = run_streaming_pipeline(iter(locations), chunk_size=10, max_memory_mb=0, extract=flaky_extract,
+                                        run_id="run-4", ledger=ledger)
+        assert requested[3:] == [10]
+        assert report["skipped"] == 15 and report["extracted"] == 10 and report["missing"] == 0
+
+        session = DatabaseLoader().Session()
+        assert session.query(WeatherRecord).count() == 25
+        session.close()
+        assert ledger.summary("run-4")["stages"]["load"]["done"] == 25
+
+
+class TestRunLedger:
+    """Tests pour la reprise des runs ETL (registre d'exécution)"""
+
+    @pytest.fixture
+    def run(self, tmp_path, monkeypatch, one_call_server):
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        monkeypatch.setenv("ETL_ARTIFACTS_DIR", str(tmp_path / "artifacts"))
+        from src.etl.ledger import RunLedger
+        from src.etl.load import DatabaseLoader
+        return one_call_server(), RunLedger(str(tmp_path / "ledger.sqlite")), DatabaseLoader()
+
+    def test_retry_reuses_extractions_then_skips_loaded(self, run, monkeypatch):
+        """Test relance après échec du chargement: aucun nouvel appel, puis tout est ignoré"""
+        import src.etl.pipeline as pipeline
+
+        calls, ledger, loader = run
+        locations = [{"lat": 10.0 + i, "lon": -16.0} for i in range(3)]
+
+        def broken_load(transformed, loader=None):
+            raise RuntimeError("connexion perdue")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(pipeline, "load_batch_pipeline", broken_load)
+            with pytest.raises(RuntimeError):
+                pipeline.run_batch_etl(locations, loader, run_id="run-1", scope="shard-00000", ledger=ledger)
+        assert len(calls) == 3
+
+        retried = pipeline.run_batch_etl(locations, loader, run_id="run-1", scope="shard-00000", ledger=ledger)
+        assert len(calls) == 3
+        assert retried["reused"] == retried["extracted"] == 3
+        assert retried["rows"] == 6  # 3 relevés + 3 prévisions (dt identiques dans la réponse du serveur)
+
+        rerun = pipeline.run_batch_etl(locations, loader, run_id="run-1", scope="shard-00000", ledger=ledger)
+        assert rerun["skipped"] == 3 and rerun["rows"] == 0
+        assert len(calls) == 3
+
+        summary = ledger.summary("run-1")
+        assert summary["stages"]["load"]["done"] == 3
+        assert summary["stages"]["load"]["retried"] == 3
+        assert summary["stages"]["extract"]["retried"] == 0
+        assert summary["failures"] == []
+
+    def test_failed_location_raises_then_retry_extracts_only_it(self, run, monkeypatch):
+        """Test échec d'une localisation: les autres sont chargées, le lot lève, la relance ne reprend qu'elle"""
+        import src.etl.pipeline as pipeline
+        from src.etl.load import WeatherRecord
+
+        calls, ledger, loader = run
+        locations = [{"lat": 10.0 + i, "lon": -16.0} for i in range(3)]
+        requested = []
+
+        def flaky_extract(batch):
+            requested.append([location["lat"] for location in batch])
+            # Première tentative: la localisation 11.0 échoue (erreur ou budget épuisé)
+            if len(requested) == 1:
+                batch = [location for location in batch if location["lat"] != 11.0]
+            return extract_many(batch)
+
+        monkeypatch.setattr(pipeline, "extract_many", flaky_extract)
+        with pytest.raises(RuntimeError, match="1/3"):
+            pipeline.run_batch_etl(locations, loader, run_id="run-3", scope="shard-00000", ledger=ledger)
+
+        session = loader.Session()
+        assert session.query(WeatherRecord).count() == 2
+        session.close()
+
+        retried = pipeline.run_batch_etl(locations, loader, run_id="run-3", scope="shard-00000", ledger=ledger)
+        assert requested[1] == [11.0]
+        assert retried["skipped"] == 2 and retried["extracted"] == 1
+        assert len(calls) == 3
+        assert ledger.summary("run-3")["stages"]["load"]["done"] == 3
+
+    def test_summary_lists_failures(self, tmp_path):
+        """Test bilan par étape: échecs, lignes et purge"""
+        from src.etl.ledger import DONE, FAILED, RunLedger
+
+        ledger = RunLedger(str(tmp_path / "ledger.sqlite"))
+        ledger.record("run-2", "transform", ["a", "b"], DONE, "shard-00000", {"a": 7, "b": 7}, 0.5)
+        ledger.record("run-2", "load", ["a", "b"], FAILED, "shard-00000", error="timeout")
+
+        summary = ledger.summary("run-2")
+        assert summary["stages"]["transform"]["rows"] == 14
+        assert summary["stages"]["transform"]["rows_per_second"] == 28.0
+        assert summary["stages"]["load"]["failed"] == 2
+        assert {failure["error"] for failure in summary["failures"]} == {"timeout"}
+        assert ledger.completed("run-2", "load") == set()
+
+        assert ledger.prune(retention_hours=0) == 4
+        assert ledger.summary("run-2")["stages"] == {}
+
+
+class TestDatabaseLoader:
+    """Tests pour le chargement en base"""
+
+    def test_bulk_load_forecasts_in_batches(self, tmp_path, monkeypatch):
+        """Test chargement en masse (chemin executemany) avec geohash par localisation"""
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.load import DatabaseLoader, WeatherForecast
+        from src.etl.spatial import encode_geohash
+
+        frame = pd.DataFrame({
+            "latitude": [14.7167] * 3 + [16.0179] * 2,
+            "longitude": [-17.4677] * 3 + [-16.5119] * 2,
+            "date": pd.date_range("2025-01-01", periods=5, freq="D"),
+            "temp_max": [33.0, 34.0, None, 31.0, 30.0],
+            "disease_risk": ["low", "high", "medium", "low", "low"],
+        })
+
+        loader = DatabaseLoader()
+        assert loader.bulk_load_forecasts(frame, batch_size=2) == 5
+
+        session = loader.Session()
+        rows = session.query(WeatherForecast).order_by(WeatherForecast.forecast_date).all()
+        session.close()
+
+        assert len(rows) == 5
+        assert rows[0].geohash == encode_geohash(14.7167, -17.4677)
+        assert rows[2].temp_max is None
+        assert rows[4].geohash == encode_geohash(16.0179, -16.5119)
+
+    def test_batch_pipeline_matches_per_location_pipeline(self, tmp_path, monkeypatch):
+        """Test transformation par lot identique au pipeline unitaire, puis chargement en masse"""
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.load import DatabaseLoader, WeatherForecast, WeatherRecord, load_batch_pipeline
+        from src.etl.transform import transform_batch_pipeline, transform_data_pipeline
+
+        raw_data_list = [
+            {"location": {"latitude": latitude, "longitude": longitude}, "location_name": name,
+             "weather": payload, "forecast": payload["daily"][:7]}
+            for name, latitude, longitude in [("Dakar", 14.7167, -17.4677), ("Thiès", 14.7886, -16.9260)]
+            for payload in [onecall_payload(latitude, longitude)]
+        ]
+
+        batch = transform_batch_pipeline(raw_data_list)
+
+        assert [location["location_name"] for location in batch["locations"]] == ["Dakar", "Thiès"]
+        assert batch["metadata"]["num_forecasts"] == 14
+        single = pd.DataFrame(transform_data_pipeline(raw_data_list[1])["forecasts"])
+        forecasts = batch["forecasts"][batch["forecasts"]["location_id"] == 1].reset_index(drop=True)
+        assert forecasts["disease_risk"].tolist() == single["disease_risk"].tolist()
+        assert forecasts["irrigation_need_mm"].tolist() == pytest.approx(single["irrigation_need_mm"].tolist(), abs=1e-4)
+        assert forecasts["content_hash"].tolist() == single["content_hash"].tolist()
+
+        # Colonnes telles que transmises par XCom
+        result = load_batch_pipeline({
+            "current_weather": batch["current_weather"].to_dict(orient="list"),
+            "forecasts": batch["forecasts"].to_dict(orient="list"),
+            "locations": batch["locations"],
+        })
+        assert result["weather_record_count"] == 2
+        assert result["forecast_count"] == 14
+
+        session = DatabaseLoader().Session()
+        assert session.query(WeatherForecast).count() == 14
+        assert session.query(WeatherRecord).first().weather_description
+        session.close()
+
+    def test_load_forecasts_keeps_latest_issuance(self, tmp_path, monkeypatch):
+        """Test rechargement idempotent: une ligne par jour, l'émission la plus récente gagne"""
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.load import DatabaseLoader, WeatherForecast
+
+        loader = DatabaseLoader()
+        days = pd.date_range("2025-01-01", periods=3, freq="D").to_pydatetime()
+
+        loader.load_forecasts([{"date": day, "temp_max": 30.0} for day in days], 14.7167, -17.4677)
+        loader.load_forecasts([{"date": day, "temp_max": 35.0} for day in days], 14.7167, -17.4677)
+
+        # Une émission plus ancienne ne remplace pas la prévision en place
+        stale = pd.DataFrame({
+            "latitude": [14.7167], "longitude": [-17.4677], "date": [days[0]],
+            "temp_max": [10.0], "created_at": [pd.Timestamp("2000-01-01")],
+        })
+        loader.bulk_load_forecasts(stale)
+
+        session = loader.Session()
+        rows = session.query(WeatherForecast).order_by(WeatherForecast.forecast_date).all()
+        session.close()
+
+        assert len(rows) == 3
+        assert [row.temp_max for row in rows] == [35.0, 35.0, 35.0]
+
+    def test_loader_registers_ingested_locations(self, tmp_path, monkeypatch):
+        """Test table weather_locations tenue à jour par le chargeur (une ligne par geohash)"""
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.load import DatabaseLoader, WeatherLocation
+        from src.etl.spatial import encode_geohash
+
+        loader = DatabaseLoader()
+        days = pd.date_range("2025-01-01", periods=2, freq="D").to_pydatetime()
+        loader.load_forecasts([{"date": day, "temp_max": 30.0} for day in days], 14.7167, -17.4677)
+        loader.bulk_load_forecasts(pd.DataFrame({
+            "latitude": [14.7167, 16.0179], "longitude": [-17.4677, -16.5119],
+            "date": [days[0], days[0]], "temp_max": [31.0, 29.0],
+        }))
+
+        session = loader.Session()
+        geohashes = sorted(location.geohash for location in session.query(WeatherLocation))
+        session.close()
+
+        assert geohashes == sorted([encode_geohash(14.7167, -17.4677), encode_geohash(16.0179, -16.5119)])
+
+    def test_loaders_share_engine_and_pool(self, tmp_path, monkeypatch):
+        """Test moteur et pool partagés entre chargeurs, schéma créé une seule fois"""
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.database import pool_stats
+        from src.etl.load import Base, DatabaseLoader
+
+        calls = []
+        monkeypatch.setattr(Base.metadata, "create_all", lambda engine: calls.append(engine))
+        first, second = DatabaseLoader(), DatabaseLoader()
+        assert first.engine is second.engine
+        assert first.Session is second.Session
+        assert len(calls) == 1
+
+        # Hors SQLite, le schéma vient des migrations
+        monkeypatch.setenv("DB_CREATE_SCHEMA", "false")
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'other.db'}")
+        DatabaseLoader()
+        assert len(calls) == 1
+
+        with first.engine.connect():
+            stats = pool_stats(first.database_url)
+            assert stats["pool"] == "MeteredQueuePool"
+            assert stats["checked_out"] == 1
+        assert pool_stats(first.database_url)["checkouts"] >= 1
+
+    def test_unchanged_forecasts_are_not_rewritten(self, tmp_path, monkeypatch):
+        """Test détection des changements: seules les prévisions modifiées sont réécrites"""
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.load import DatabaseLoader, WeatherForecast
+
+        loader = DatabaseLoader()
+        frame = pd.DataFrame({
+            "latitude": [14.7167] * 3, "longitude": [-17.4677] * 3,
+            "date": pd.date_range("2025-01-01", periods=3, freq="D"),
+            "temp_max": [30.0, 31.0, 32.0],
+            "created_at": [pd.Timestamp("2025-01-01 06:00")] * 3,
+        })
+
+        assert loader.bulk_sync_forecasts(frame) == {"forecasts": 3, "written": 3, "skipped": 0}
+        reissued = frame.assign(created_at=pd.Timestamp("2025-01-02 06:00"))
+        assert loader.bulk_sync_forecasts(reissued) == {"forecasts": 3, "written": 0, "skipped": 3}
+        reissued.loc[2, "temp_max"] = 29.0
+        assert loader.bulk_sync_forecasts(reissued) == {"forecasts": 3, "written": 1, "skipped": 2}
+
+        session = loader.Session()
+        rows = session.query(WeatherForecast).order_by(WeatherForecast.forecast_date).all()
+        session.close()
+
+        # created_at date le dernier changement de la prévision
+        assert [row.created_at.day for row in rows] == [1, 1, 2]
+        assert rows[2].temp_max == 29.0
+
+    def test_written_and_skipped_counts_span_insert_pages(self, tmp_path, monkeypatch):
+        """Test comptage exact au-delà d'une page insertmanyvalues (1000 lignes par instruction)"""
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        from src.etl.load import DatabaseLoader
+
+        loader = DatabaseLoader()
+        # Pages de 1000 lignes même sans RETURNING, comme psycopg2 sous PostgreSQL
+        monkeypatch.setattr(loader.engine.dialect, "use_insertmanyvalues_wo_returning", True)
+        frame = pd.DataFrame({
+            "latitude": [14.7167] * 2500, "longitude": [-17.4677] * 2500,
+            "date": pd.date_range("2000-01-01", periods=2500, freq="D"),
+            "temp_max": [30.0] * 2500,
+            "created_at": [pd.Timestamp("2025-01-01 06:00")] * 2500,
+        })
+
+        assert loader.bulk_sync_forecasts(frame, batch_size=5000) == {"forecasts": 2500, "written": 2500, "skipped": 0}
+
+        # Modifications dans la première page seulement
+        reissued = frame.assign(created_at=pd.Timestamp("2025-01-02 06:00"))
+        reissued.loc[:1199, "temp_max"] = 29.0
+        assert loader.bulk_sync_forecasts(reissued, batch_size=5000) == {"forecasts": 2500, "written": 1200, "skipped": 1300}
+
+        # Chemin unitaire: seule l'année 2000 change
+        forecasts = [
+            {"date": day, "temp_max": 28.0 if day.year == 2000 else temp_max}
+            for day, temp_max in zip(reissued["date"], reissued["temp_max"])
+        ]
+        assert loader.load_forecasts(forecasts, 14.7167, -17.4677) == 366
@@ -0,0 +1,29 @@
+"""
+Tests pour les modèles ML
+"""
+
+import os
+import pytest
+from src.models.registry import ModelRegistry, ModelNotReadyError
+
+
+class TestModelRegistry:
+    """Tests pour le registre de modèles"""
+
+    def test_get_before_load_raises(self, tmp_path):
+        """Test qu'aucun modèle n'est servi avant le chargement"""
+        registry = ModelRegistry(models_dir=str(tmp_path))
+        with pytest.raises(ModelNotReadyError):
+            registry.get("rain")
+
+    def test_trains_once_then_loads_artifacts(self, tmp_path):
+        """Test entraînement des modèles absents puis rechargement des artefacts"""
+        registry = ModelRegistry(models_dir=str(tmp_path)).load_all()
+
+        assert registry.is_ready
+        assert set(registry.sources.values()) == {"trained"}
+        for name in ModelRegistry.MODEL_FILES:
+            assert os.path.exists(registry.model_path(name))
+
+        reloaded = ModelRegistry(models_dir=str(tmp_path)).load_all()
+        assert set(reloaded.sources.values()) == {"artifact"}